@@ -0,0 +1,225 @@
+import json
+import time
+import random
+import socket
+import threading
+from collections import deque
+from urllib.parse import urlparse
+import config
+
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+# 403s that mean "slow down" rather than "not allowed"
+RATE_LIMIT_REASONS = {"rateLimitExceeded", "userRateLimitExceeded", "quotaExceeded"}
+TRANSPORT_ERRORS = (ConnectionError, TimeoutError, socket.timeout)
+
+
+class TokenBucket:
+    """Allows `rate_per_minute` calls on average, with bursts of up to `capacity`."""
+
+    def __init__(self, rate_per_minute, capacity=None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or max(1, rate_per_minute // 6)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Takes one token, sleeping until one is available. Returns the seconds waited."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class EndpointStats:
+    __slots__ = ("calls", "errors", "retries", "throttled_s", "total_ms", "max_ms", "recent_ms")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.throttled_s = 0.0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.recent_ms = deque(maxlen=500)
+
+    def as_dict(self):
+        recent = sorted(self.recent_ms)
+        pct = lambda q: round(recent[min(len(recent) - 1, int(q * len(recent)))], 1) if recent else None
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "retries": self.retries,
+            "throttled_s": round(self.throttled_s, 2),
+            "avg_ms": round(self.total_ms / self.calls, 1) if self.calls else None,
+            "p50_ms": pct(0.5),
+            "p95_ms": pct(0.95),
+            "max_ms": round(self.max_ms, 1),
+        }
+
+
+_stats = {}
+_stats_lock = threading.Lock()
+_buckets = {}
+
+
+def _bucket(service):
+    with _stats_lock:
+        if service not in _buckets:
+            rate = config.SHEETS_REQUESTS_PER_MINUTE if service == "sheets" else config.DRIVE_REQUESTS_PER_MINUTE
+            _buckets[service] = TokenBucket(rate)
+        return _buckets[service]
+
+
+def _record(endpoint, elapsed_ms=None, error=False, retry=False, throttled_s=0.0):
+    with _stats_lock:
+        stats = _stats.setdefault(endpoint, EndpointStats())
+        stats.throttled_s += throttled_s
+        if retry:
+            stats.retries += 1
+        if elapsed_ms is not None:
+            stats.calls += 1
+            stats.total_ms += elapsed_ms
+            stats.max_ms = max(stats.max_ms, elapsed_ms)
+            stats.recent_ms.append(elapsed_ms)
+        if error:
+            stats.errors += 1
+
+
+def _google_errors():
+    """
+    (HttpError, APIError, requests' transport errors), imported on first
+    failure so this module stays cheap to import.
+    """
+    import requests
+    from gspread.exceptions import APIError
+    from googleapiclient.errors import HttpError
+    return HttpError, APIError, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)
+
+
+def _retry_after(exc):
+    """Seconds the server asked us to wait, if it said."""
+    HttpError, APIError, _ = _google_errors()
+    headers = None
+    if isinstance(exc, HttpError):
+        headers = exc.resp
+    elif isinstance(exc, APIError):
+        headers = exc.response.headers
+    try:
+        return float(headers.get("retry-after")) if headers else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _error_reasons(exc):
+    """The `reason` fields of a Google API error body ({"error": {"errors": [...]}})."""
+    try:
+        errors = json.loads(exc.content)["error"].get("errors", [])
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return set()
+    return {e.get("reason") for e in errors if isinstance(e, dict)}
+
+
+def is_retryable(exc):
+    """True for rate limiting, server errors and dropped connections."""
+    HttpError, APIError, request_errors = _google_errors()
+    if isinstance(exc, HttpError):
+        if exc.resp.status in RETRYABLE_STATUS:
+            return True
+        return exc.resp.status == 403 and bool(_error_reasons(exc) & RATE_LIMIT_REASONS)
+    if isinstance(exc, APIError):
+        if exc.code in RETRYABLE_STATUS:
+            return True
+        errors = exc.error.get("errors", []) if isinstance(exc.error, dict) else []
+        return exc.code == 403 and any(e.get("reason") in RATE_LIMIT_REASONS for e in errors)
+    return isinstance(exc, TRANSPORT_ERRORS + request_errors)
+
+
+def backoff_delay(attempt):
+    """Full-jitter exponential backoff: uniform in [0, base * 2**attempt], capped."""
+    cap = min(config.API_BACKOFF_MAX_SECONDS, config.API_BACKOFF_BASE_SECONDS * 2 ** attempt)
+    return random.uniform(0, cap)
+
+
+def call(endpoint, fn, *args, **kwargs):
+    """
+    Calls fn(*args, **kwargs) as one request to `endpoint` (e.g. "drive.files.list"):
+    waits for the service's rate limiter, retries retryable errors with jittered
+    exponential backoff (or the server's Retry-After), and records latency.
+    """
+    bucket = _bucket(endpoint.split(".", 1)[0])
+    attempt = 0
+    while True:
+        throttled = bucket.acquire()
+        start = time.perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            retry = is_retryable(e) and attempt < config.API_MAX_RETRIES
+            _record(endpoint, elapsed_ms, error=True, retry=retry, throttled_s=throttled)
+            if not retry:
+                raise
+            delay = _retry_after(e) or backoff_delay(attempt)
+            print(f"{endpoint} failed ({e}); retry {attempt + 1}/{config.API_MAX_RETRIES} in {delay:.1f}s.")
+            time.sleep(delay)
+            attempt += 1
+            continue
+        _record(endpoint, (time.perf_counter() - start) * 1000, throttled_s=throttled)
+        return result
+
+
+def execute(request):
+    """Runs a googleapiclient request through call(), named by its method id."""
+    return call(request.methodId or "drive.unknown", request.execute)
+
+
+VALUES_METHODS = {"GET": "get", "PUT": "update", "POST": "append"}
+
+def sheets_endpoint(method, url):
+    """Short endpoint name for a gspread request URL, e.g. "sheets.values.batchUpdate"."""
+    method = method.upper()
+    path = urlparse(url).path
+    if path.startswith("/drive/"):
+        # gspread looks spreadsheets up by title through Drive
+        parts = [p for p in path.split("/") if p][2:]
+        action = "list" if method == "GET" and len(parts) == 1 else method.lower()
+        return f"drive.{parts[0] if parts else 'files'}.{action}"
+    tail = path.rsplit("/", 1)[-1]
+    if ":" in tail:
+        resource = "values" if "/values" in path else "spreadsheets"
+        return f"sheets.{resource}.{tail.split(':', 1)[1]}"
+    if "/values/" in path:
+        return f"sheets.values.{VALUES_METHODS.get(method, method.lower())}"
+    return f"sheets.spreadsheets.{method.lower()}"
+
+
+def get_stats():
+    """{endpoint: {calls, errors, retries, throttled_s, avg/p50/p95/max latency ms}}."""
+    with _stats_lock:
+        return {endpoint: stats.as_dict() for endpoint, stats in sorted(_stats.items())}
+
+
+def dump_stats():
+    """Prints the per-endpoint call counters and latencies."""
+    stats = get_stats()
+    if not stats:
+        print("API stats: no calls yet.", flush=True)
+        return
+    print("API stats:", flush=True)
+    for endpoint, s in stats.items():
+        print(f"  {endpoint:<32} calls={s['calls']} errors={s['errors']} retries={s['retries']} "
+              f"throttled={s['throttled_s']}s avg={s['avg_ms']}ms p95={s['p95_ms']}ms max={s['max_ms']}ms", flush=True)
+
+
+def reset_stats():
+    with _stats_lock:
+        _stats.clear()
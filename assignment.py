@@ -0,0 +1,73 @@
+import numpy as np
+
+
+def solve_assignment(weights):
+    """
+    One-to-one assignment between rows and columns of a weight matrix,
+    maximizing the total weight. Cells <= 0 are not allowed pairs.
+    Returns a list of (row, col) pairs sorted by row.
+
+    Uses scipy's solver when installed, otherwise the numpy Hungarian below.
+    """
+    weights = np.asarray(weights, dtype=float)
+    if weights.size == 0:
+        return []
+    weights = np.where(weights > 0, weights, 0.0)
+
+    try:
+        from scipy.optimize import linear_sum_assignment
+    except ImportError:
+        linear_sum_assignment = None
+
+    if linear_sum_assignment is not None:
+        rows, cols = linear_sum_assignment(weights, maximize=True)
+        pairs = zip(rows, cols)
+    else:
+        pairs = _hungarian_max(weights)
+    return sorted((int(r), int(c)) for r, c in pairs if weights[r, c] > 0)
+
+
+def _hungarian_max(weights):
+    """Maximum-weight assignment via the shortest augmenting path Hungarian method."""
+    transposed = weights.shape[0] > weights.shape[1]
+    if transposed:
+        weights = weights.T
+    n, m = weights.shape
+    cost = weights.max() - weights
+
+    # Potentials and matching use 1-based columns; column 0 is the virtual root
+    u = np.zeros(n + 1)
+    v = np.zeros(m + 1)
+    col_owner = np.zeros(m + 1, dtype=int)
+    for row in range(1, n + 1):
+        col_owner[0] = row
+        j0 = 0
+        min_slack = np.full(m + 1, np.inf)
+        prev_col = np.zeros(m + 1, dtype=int)
+        used = np.zeros(m + 1, dtype=bool)
+        while True:
+            used[j0] = True
+            i0 = col_owner[j0]
+            free = ~used[1:]
+            reduced = cost[i0 - 1] - u[i0] - v[1:]
+            better = free & (reduced < min_slack[1:])
+            min_slack[1:][better] = reduced[better]
+            prev_col[1:][better] = j0
+            candidates = np.where(free, min_slack[1:], np.inf)
+            j1 = int(np.argmin(candidates)) + 1
+            delta = candidates[j1 - 1]
+            u[col_owner[used]] += delta
+            v[used] -= delta
+            min_slack[1:][free] -= delta
+            j0 = j1
+            if col_owner[j0] == 0:
+                break
+        while j0:
+            j1 = prev_col[j0]
+            col_owner[j0] = col_owner[j1]
+            j0 = j1
+
+    pairs = [(col_owner[j] - 1, j - 1) for j in range(1, m + 1) if col_owner[j]]
+    if transposed:
+        pairs = [(c, r) for r, c in pairs]
+    return pairs
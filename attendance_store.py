@@ -0,0 +1,127 @@
+import json
+import time
+import sqlite3
+import threading
+from collections import namedtuple
+import config
+
+Mirror = namedtuple("Mirror", "grid revision full_sync_at")
+
+
+def changed_cells(old_grid, new_grid):
+    """Returns [(row, col, old, new)] (1-based) for every cell that differs between two grids."""
+    changes = []
+    height = max(len(old_grid), len(new_grid))
+    for r in range(height):
+        old_row = old_grid[r] if r < len(old_grid) else []
+        new_row = new_grid[r] if r < len(new_grid) else []
+        if old_row == new_row:
+            continue
+        for c in range(max(len(old_row), len(new_row))):
+            old = old_row[c] if c < len(old_row) else ""
+            new = new_row[c] if c < len(new_row) else ""
+            if old != new:
+                changes.append((r + 1, c + 1, old, new))
+    return changes
+
+
+class AttendanceStore:
+    """
+    Local copy of the attendance sheet (members x dates plus the streak
+    column), stored column by column: one record per sheet column holding its
+    cells top to bottom, so writing a meeting date rewrites one record.
+
+    Each mirror remembers the spreadsheet revision (Drive modifiedTime) it
+    matches. SheetSession serves reads from the mirror while the revision is
+    unchanged and re-reads the sheet when someone edited it. Safe to use from
+    several threads.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS sheets ("
+            " sheet TEXT PRIMARY KEY,"
+            " revision TEXT,"
+            " full_sync_at REAL NOT NULL,"
+            " height INTEGER NOT NULL,"
+            " width INTEGER NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS columns ("
+            " sheet TEXT,"
+            " col INTEGER,"
+            " cells TEXT NOT NULL,"
+            " PRIMARY KEY (sheet, col));"
+        )
+        self._conn.commit()
+
+    def load(self, sheet):
+        """Returns Mirror(grid, revision, full_sync_at), or None if the sheet was never synced."""
+        with self._lock:
+            meta = self._conn.execute(
+                "SELECT revision, full_sync_at, height, width FROM sheets WHERE sheet = ?", (sheet,)
+            ).fetchone()
+            if meta is None:
+                return None
+            columns = self._conn.execute("SELECT col, cells FROM columns WHERE sheet = ?", (sheet,)).fetchall()
+        revision, full_sync_at, height, width = meta
+        grid = [[""] * width for _ in range(height)]
+        for col, cells in columns:
+            for r, value in enumerate(json.loads(cells)):
+                grid[r][col - 1] = value
+        return Mirror(grid, revision, full_sync_at)
+
+    def save(self, sheet, grid, revision, columns=None):
+        """
+        Stores `grid` as the mirror of `sheet` at `revision`.
+        With `columns` (1-based indexes) only those columns are rewritten, e.g.
+        after pushing our own changes; without, the whole mirror is replaced
+        and counts as a full sync.
+        """
+        height = len(grid)
+        width = max((len(row) for row in grid), default=0)
+        cols = range(1, width + 1) if columns is None else sorted(columns)
+        records = [
+            (sheet, c, json.dumps([row[c - 1] if len(row) >= c else "" for row in grid], ensure_ascii=False))
+            for c in cols
+        ]
+        with self._lock:
+            if columns is None:
+                self._conn.execute("DELETE FROM columns WHERE sheet = ?", (sheet,))
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO sheets (sheet, revision, full_sync_at, height, width)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    (sheet, revision, time.time(), height, width),
+                )
+            else:
+                self._conn.execute(
+                    "UPDATE sheets SET revision = ?, height = ?, width = ? WHERE sheet = ?",
+                    (revision, height, width, sheet),
+                )
+            self._conn.executemany("INSERT OR REPLACE INTO columns (sheet, col, cells) VALUES (?, ?, ?)", records)
+            self._conn.commit()
+
+    def invalidate(self, sheet):
+        """Forces the next session to re-read the sheet."""
+        with self._lock:
+            self._conn.execute("UPDATE sheets SET revision = NULL WHERE sheet = ?", (sheet,))
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_store = None
+
+
+def get_store():
+    """Returns the process-wide store, or None if the mirror is disabled."""
+    global _store
+    if not config.ATTENDANCE_STORE_FILE:
+        return None
+    if _store is None or _store.path != config.ATTENDANCE_STORE_FILE:
+        _store = AttendanceStore(config.ATTENDANCE_STORE_FILE)
+    return _store
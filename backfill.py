@@ -0,0 +1,146 @@
+"""
+Imports a batch of archived screenshots (e.g. a whole semester) in one pass.
+
+    python backfill.py path/to/screenshots/
+    python backfill.py --drive-folder <FOLDER_ID>
+    python backfill.py path/to/screenshots/ --dry-run
+
+Meeting dates come from the filenames (YYYY-MM-DD or DD.MM.YYYY); files
+without one are skipped. Every image is OCR'd in parallel, screenshots of the
+same meeting are merged, and all date columns are filled in one SheetSession:
+one sheet read, one batched write covering every column, one streak pass.
+Files are left where they are.
+"""
+import os
+import sys
+import argparse
+import api_client
+import metrics
+import drive_monitor
+import main as attendance_script
+from sheet_session import SheetSession
+
+
+def collect_local(directory):
+    """Returns ({date: [path]}, [undated paths]) for every image under `directory`."""
+    by_date, undated = {}, []
+    for root, _, names in os.walk(directory):
+        for fname in sorted(names):
+            if os.path.splitext(fname)[1].lower() not in drive_monitor.IMAGE_EXTENSIONS:
+                continue
+            path = os.path.join(root, fname)
+            meeting_date = attendance_script._parse_date_from_filename(fname)
+            if meeting_date is None:
+                undated.append(path)
+            else:
+                by_date.setdefault(meeting_date, []).append(path)
+    return by_date, undated
+
+
+def ocr_local(by_date):
+    """OCRs every image; returns {date: [text]} (failed images left out)."""
+    paths = [path for group in by_date.values() for path in group]
+    texts = attendance_script.extract_texts_parallel(paths)
+    return {
+        meeting_date: [texts[path] for path in group if texts.get(path) is not None]
+        for meeting_date, group in by_date.items()
+    }
+
+
+def ocr_drive(service, folder_id):
+    """Downloads and OCRs every dated image in a Drive folder; returns ({date: [text]}, [undated names])."""
+    files = drive_monitor.list_folder_images(service, folder_id)
+    dated, undated = [], []
+    for file_meta in files:
+        meeting_date = attendance_script._parse_date_from_filename(file_meta['name'])
+        if meeting_date is None:
+            undated.append(file_meta['name'])
+        else:
+            dated.append((meeting_date, file_meta))
+    print(f"Found {len(files)} image(s) in Drive folder, {len(dated)} with a date.")
+
+    texts = drive_monitor.download_and_ocr(service, [file_meta for _, file_meta in dated])
+    by_date = {}
+    for meeting_date, file_meta in dated:
+        text = texts.get(file_meta['id'])
+        if text is not None:
+            by_date.setdefault(meeting_date, []).append(text)
+    return by_date, undated
+
+
+def backfill_texts(client, texts_by_date, dry_run=False):
+    """
+    Matches each meeting's merged OCR text and marks its date column, then
+    recalculates streaks once and commits everything in one batched write.
+    Returns {date: attendee count} for the dates that were written (or would
+    be, with dry_run).
+    """
+    # A dry run leaves members.json and the local sheet mirror untouched too
+    session = SheetSession(client, read_only=dry_run)
+    members = session.members()
+    if not members:
+        print("No members found.")
+        return {}
+    index = attendance_script.get_member_index(members)
+
+    written, missing = {}, []
+    for meeting_date in sorted(texts_by_date):
+        texts = texts_by_date[meeting_date]
+        if not texts:
+            print(f"{meeting_date}: no readable screenshots.")
+            continue
+        present = attendance_script.match_attendance(attendance_script.merge_ocr_texts(texts), index)
+        changed = session.mark_attendance(present, meeting_date)
+        if changed is None:
+            missing.append(meeting_date)
+            continue
+        written[meeting_date] = len(present)
+        print(f"{meeting_date}: {len(texts)} screenshot(s), {len(present)} present, {changed} cell(s) changed.")
+
+    if missing:
+        print(f"Skipped {len(missing)} date(s) with no column in the sheet: "
+              f"{', '.join(d.strftime('%d/%m/%Y') for d in missing)}")
+    if dry_run:
+        print("Dry run: nothing written.")
+        return written
+
+    session.recalculate_streaks()
+    cells = session.commit()
+    print(f"Backfilled {len(written)} meeting(s) ({cells} cells in one batch).")
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("directory", nargs="?", help="local folder of screenshots (searched recursively)")
+    parser.add_argument("--drive-folder", metavar="FOLDER_ID", help="import a Drive folder instead")
+    parser.add_argument("--dry-run", action="store_true", help="match and report, but do not write the sheet")
+    args = parser.parse_args(argv)
+    if bool(args.directory) == bool(args.drive_folder):
+        parser.error("give either a directory or --drive-folder")
+
+    if args.drive_folder:
+        texts_by_date, undated = ocr_drive(drive_monitor.get_drive_service(), args.drive_folder)
+    else:
+        by_date, undated = collect_local(args.directory)
+        print(f"Found {sum(len(g) for g in by_date.values())} dated image(s) "
+              f"for {len(by_date)} meeting(s) in {args.directory}.")
+        texts_by_date = ocr_local(by_date)
+    if undated:
+        print(f"Skipped {len(undated)} image(s) with no date in the filename: {undated}")
+    if not texts_by_date:
+        print("Nothing to backfill.")
+        return 1
+
+    client = attendance_script.get_google_sheet_client()
+    if not client:
+        print("No credentials; cannot update the sheet.")
+        return 1
+    written = backfill_texts(client, texts_by_date, dry_run=args.dry_run)
+    api_client.dump_stats()
+    metrics.flush()
+    return 0 if written else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,54 @@
+"""
+Compares two benchmark result files from benchmarks.run.
+
+    python -m benchmarks.compare old.json new.json [--threshold 0.10]
+
+Prints the change in best time per (benchmark, size) and any precision/recall
+change, and exits with status 1 when something got slower than the threshold.
+"""
+import sys
+import json
+import argparse
+
+
+def load(path):
+    with open(path) as f:
+        report = json.load(f)
+    return report, {(r["name"], r["size"]): r for r in report["results"]}
+
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("old")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="relative slowdown reported as a regression")
+    args = parser.parse_args(argv)
+
+    old_report, old = load(args.old)
+    new_report, new = load(args.new)
+    print(f"old: {old_report['environment'].get('commit')}  new: {new_report['environment'].get('commit')}")
+    print(f"{'benchmark':<32} {'size':>6} {'old s':>10} {'new s':>10} {'change':>8}  quality")
+
+    regressions = 0
+    for key in sorted(old.keys() & new.keys()):
+        o, n = old[key], new[key]
+        change = (n["seconds_min"] - o["seconds_min"]) / o["seconds_min"] if o["seconds_min"] else 0.0
+        quality = []
+        for metric in ("precision", "recall"):
+            if metric in o and metric in n and o[metric] != n[metric]:
+                quality.append(f"{metric} {o[metric]} -> {n[metric]}")
+        flag = ""
+        if change > args.threshold:
+            flag = "  SLOWER"
+            regressions += 1
+        print(f"{key[0]:<32} {key[1]:>6} {o['seconds_min']:>10.4f} {n['seconds_min']:>10.4f} "
+              f"{change:>+8.1%}  {', '.join(quality)}{flag}")
+    for key in sorted(new.keys() - old.keys()):
+        print(f"{key[0]:<32} {key[1]:>6} (new)")
+
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,159 @@
+"""
+Runs the whole monitor pipeline offline against the fake Google backend and
+checks API-call budgets per processed image.
+
+    python -m benchmarks.load_test --files 10000
+    python -m benchmarks.load_test --files 500 --budget sheets.values.get=0.5 --output load.json
+
+Seeds a roster sheet and N screenshots spread over several meeting dates in
+the fake Drive folder, runs pipeline.MonitorPipeline until the folder is
+empty, then reports calls per endpoint, calls per image and throughput.
+With --ocr synthetic (the default) each "screenshot" carries its OCR text, so
+Tesseract is not needed; --ocr real renders PNGs and OCRs them.
+Exits with status 1 if a budget is exceeded or files were left unprocessed.
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+import contextlib
+
+import config
+import main
+import drive_monitor
+import google_clients
+import fake_google
+from benchmarks import synthetic
+
+# Max calls per processed image
+DEFAULT_BUDGET = {
+    "sheets.values.get": 0.1,  # Served from the local mirror unless the sheet was edited
+    "sheets.write": 2,
+    "drive.files.get_media": 1,
+    "drive.files.update": 1,
+    "drive.files.get": 2,  # Spreadsheet revision checks, before a read and after a write
+}
+SOURCE_FOLDER = "load-test-source"
+PROCESSED_FOLDER = "load-test-processed"
+
+
+def configure(workdir, args):
+    """Points every file and service the monitor uses at `workdir` and the fake backend."""
+    os.chdir(workdir)
+    config.GOOGLE_BACKEND = args.backend
+    config.FAKE_GOOGLE_DB = os.path.join(workdir, "fake_google.sqlite3")
+    config.DRIVE_FOLDER_ID = SOURCE_FOLDER
+    config.PROCESSED_FOLDER_ID = PROCESSED_FOLDER
+    config.DRIVE_POLL_MODE = "changes"
+    config.OCR_CACHE_FILE = None
+    # No real quotas offline; measure the app, not the rate limiter
+    config.SHEETS_REQUESTS_PER_MINUTE = config.DRIVE_REQUESTS_PER_MINUTE = 10 ** 9
+    drive_monitor.LOCAL_SCREENSHOTS_DIR = os.path.join(workdir, "screenshots")
+    drive_monitor.LOCAL_PROCESSED_DIR = os.path.join(workdir, "screenshots", "processed")
+    if args.ocr == "synthetic":
+        # Screenshots are the OCR text itself; threads instead of processes share the patch
+        config.OCR_WORKERS = 1
+        main.extract_text_from_image = lambda source, raise_errors=False: bytes(source).decode("utf-8")
+
+
+def seed(backend, args):
+    roster = synthetic.make_roster(args.members, seed=args.seed)
+    grid = synthetic.make_attendance_grid(roster, meetings=args.meetings, seed=args.seed)
+    backend.seed_sheet(config.SHEET_NAME, grid)
+    dates = [h for h in grid[0][2:]]
+    for i in range(args.files):
+        day, month, year = dates[i % len(dates)].split("/")
+        text, _ = synthetic.make_ocr_text(roster, present_fraction=0.3, seed=args.seed + i, max_present=40)
+        if args.ocr == "real":
+            content = synthetic.render_panel_screenshot(text.split("\n"), seed=i)
+        else:
+            content = text.encode("utf-8")
+        backend.add_file(f"{year}-{month}-{day} screenshot {i}.png", content, [SOURCE_FOLDER])
+
+
+def remaining_files(backend):
+    return len(backend.drive_service().files().list(q=f"'{SOURCE_FOLDER}' in parents", pageSize=10 ** 9)._fn()["files"])
+
+
+async def run_until_drained(pipeline, backend, timeout):
+    async def watchdog():
+        deadline = time.monotonic() + timeout
+        while not pipeline.stopping.is_set():
+            await asyncio.sleep(0.5)
+            if (not pipeline.in_flight and remaining_files(backend) == 0) or time.monotonic() > deadline:
+                pipeline.stop()
+
+    await asyncio.gather(pipeline.run(), watchdog())
+
+
+def parse_budget(items):
+    budget = dict(DEFAULT_BUDGET)
+    for item in items or []:
+        key, _, value = item.partition("=")
+        budget[key] = float(value)
+    return budget
+
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=10000)
+    parser.add_argument("--members", type=int, default=200)
+    parser.add_argument("--meetings", type=int, default=8, help="meeting dates the files are spread over")
+    parser.add_argument("--backend", choices=["memory", "sqlite"], default="memory")
+    parser.add_argument("--ocr", choices=["synthetic", "real"], default="synthetic")
+    parser.add_argument("--budget", action="append", metavar="ENDPOINT=MAX",
+                        help="max calls per image, e.g. sheets.values.get=1 (repeatable)")
+    parser.add_argument("--timeout", type=float, default=1800)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the JSON report here as well")
+    args = parser.parse_args(argv)
+    budget = parse_budget(args.budget)
+    output = os.path.abspath(args.output) if args.output else None
+
+    with tempfile.TemporaryDirectory() as workdir:
+        configure(workdir, args)
+        backend = fake_google.get_backend()
+        print(f"Seeding {args.files} files and a roster of {args.members}...", file=sys.stderr)
+        seed(backend, args)
+
+        from pipeline import MonitorPipeline
+        mark = backend.call_mark()
+        log_path = os.path.join(workdir, "monitor.log")
+        start = time.perf_counter()
+        with open(log_path, "w") as log, contextlib.redirect_stdout(log):
+            pipeline = MonitorPipeline(google_clients.get_drive_service(), google_clients.get_sheet_client())
+            asyncio.run(run_until_drained(pipeline, backend, args.timeout))
+        elapsed = time.perf_counter() - start
+
+        left = remaining_files(backend)
+        processed = args.files - left
+        counts = backend.call_counts(since=mark)
+        violations = backend.check_budget(budget, since=mark, units=processed)
+        report = {
+            "files": args.files,
+            "processed": processed,
+            "unprocessed": left,
+            "seconds": round(elapsed, 2),
+            "files_per_second": round(processed / elapsed, 1) if elapsed else None,
+            "calls": dict(sorted(counts.items())),
+            "calls_per_image": {k: round(v / max(processed, 1), 4) for k, v in sorted(counts.items())},
+            "budget": budget,
+            "violations": violations,
+        }
+        if left:
+            with open(log_path) as log:
+                print("".join(log.readlines()[-20:]), file=sys.stderr)
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if output:
+        with open(output, "w") as f:
+            f.write(text + "\n")
+    sys.exit(1 if violations or left else 0)
+
+
+if __name__ == "__main__":
+    main_cli()
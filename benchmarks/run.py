@@ -0,0 +1,207 @@
+"""
+Benchmarks for the attendance pipeline on synthetic data.
+
+    python -m benchmarks.run                       # default sizes, JSON to stdout
+    python -m benchmarks.run --sizes 50,1000 --repeat 5 --output bench.json
+    python -m benchmarks.compare old.json new.json
+
+Times roster indexing, normalize_text, match_attendance (both modes, with
+precision/recall), streak computation, panel detection and, when Tesseract is
+available, extract_text_from_image on rendered screenshots. Library output
+(match logs etc.) is silenced while timing.
+"""
+import io
+import os
+import sys
+import json
+import time
+import random
+import platform
+import argparse
+import datetime
+import statistics
+import subprocess
+import contextlib
+from PIL import Image
+
+import config
+import main
+import streaks
+from panel_detect import find_panel_regions
+from benchmarks import synthetic
+
+DEFAULT_SIZES = [50, 200, 1000, 10000]
+
+
+@contextlib.contextmanager
+def _quiet():
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def timed(fn, repeat):
+    """Runs fn `repeat` times (after one warm-up when repeat > 1); returns (seconds list, last result)."""
+    result = None
+    with _quiet():
+        if repeat > 1:
+            result = fn()
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = fn()
+            times.append(time.perf_counter() - start)
+    return times, result
+
+
+def summarize(name, size, times, items, unit, **extra):
+    best = min(times)
+    return {
+        "name": name,
+        "size": size,
+        "repeat": len(times),
+        "seconds_min": round(best, 6),
+        "seconds_median": round(statistics.median(times), 6),
+        "throughput": round(items / best, 1) if best > 0 else None,
+        "unit": unit,
+        **extra,
+    }
+
+
+def precision_recall(found, expected):
+    found = set(found)
+    true_pos = len(found & expected)
+    return {
+        "precision": round(true_pos / len(found), 4) if found else 1.0,
+        "recall": round(true_pos / len(expected), 4) if expected else 1.0,
+        "false_positives": len(found - expected),
+        "missed": len(expected - found),
+    }
+
+
+def bench_roster(size, args):
+    roster = synthetic.make_roster(size, seed=args.seed)
+    ocr_text, expected = synthetic.make_ocr_text(roster, seed=args.seed, max_present=args.max_present)
+    lines = ocr_text.split("\n")
+    results = []
+
+    times, index = timed(lambda: main.MemberIndex(roster), args.repeat)
+    results.append(summarize("member_index_build", size, times, size, "names/s"))
+
+    times, _ = timed(lambda: [main.normalize_text(line) for line in lines], args.repeat)
+    results.append(summarize("normalize_text", size, times, len(lines), "lines/s"))
+
+    for mode in ("cascade", "assignment"):
+        if size > args.max_cascade_size and mode == "cascade":
+            continue
+        times, present = timed(lambda: main.match_attendance(ocr_text, index, mode=mode), args.repeat)
+        results.append(summarize(
+            f"match_attendance_{mode}", size, times, len(lines), "lines/s",
+            ocr_lines=len(lines), attendees=len(expected), **precision_recall(present, expected),
+        ))
+
+    if size <= args.max_cascade_size:
+        # OCR_MODE = "confidence": exact lookup for high-confidence lines, adaptive fuzzy thresholds
+        scored_text = main.OcrText(ocr_text, synthetic.line_confidences(ocr_text, roster, seed=args.seed))
+        times, present = timed(lambda: main.match_attendance(scored_text, index, mode="cascade"), args.repeat)
+        results.append(summarize(
+            "match_attendance_cascade_confidence", size, times, len(lines), "lines/s",
+            ocr_lines=len(lines), attendees=len(expected), **precision_recall(present, expected),
+        ))
+
+    grid = synthetic.make_attendance_grid(roster, meetings=args.meetings, seed=args.seed)
+    today = datetime.date(2026, 4, 30)
+    times, (_, snapshot) = timed(lambda: streaks.compute_streak_updates(grid, today=today), args.repeat)
+    results.append(summarize("streaks_full", size, times, size, "rows/s", meetings=args.meetings))
+
+    # Same sheet revision, one row changed by this session
+    snapshot["revision"] = "bench"
+    grid[1][-1] = "FALSE" if grid[1][-1] != "FALSE" else "TRUE"
+    times, _ = timed(lambda: streaks.compute_streak_updates(grid, snapshot, today=today, revision="bench",
+                                                           changed_rows={2}), args.repeat)
+    results.append(summarize("streaks_incremental", size, times, size, "rows/s", meetings=args.meetings))
+    return results
+
+
+def bench_screenshots(args):
+    roster = synthetic.make_roster(50, seed=args.seed)
+    # As many attendees as fit in the rendered panel
+    expected = set(random.Random(args.seed).sample(roster, 20))
+    lines = ["Participants (20)"] + sorted(expected)
+    png = synthetic.render_panel_screenshot(lines, seed=args.seed)
+    image = Image.open(io.BytesIO(png))
+    image.load()
+    results = []
+
+    times, regions = timed(lambda: find_panel_regions(image, max_regions=config.PANEL_MAX_REGIONS), args.repeat)
+    results.append(summarize("panel_detection", 1, times, 1, "images/s",
+                             pixels=image.width * image.height, regions=len(regions)))
+
+    if args.skip_ocr:
+        return results
+    try:
+        main.get_ocr_backend()
+        with _quiet():
+            main.ocr_image(Image.new("RGB", (50, 20), "white"))
+    except Exception as e:
+        print(f"Skipping OCR benchmark: {e}", file=sys.stderr)
+        return results
+
+    config.OCR_CACHE_FILE = None  # time Tesseract, not the cache
+    times, text = timed(lambda: main.extract_text_from_image(png), args.repeat)
+    with _quiet():
+        present = main.match_attendance(text, main.MemberIndex(roster))
+    results.append(summarize("extract_text_from_image", 1, times, 1, "images/s",
+                             backend=main.get_ocr_backend().name, **precision_recall(present, expected)))
+    return results
+
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        commit = None
+    return {
+        "commit": commit or None,
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "match_mode": config.MATCH_MODE,
+    }
+
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="comma-separated roster sizes")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--meetings", type=int, default=52, help="date columns in the streak grid")
+    parser.add_argument("--max-present", type=int, default=300,
+                        help="cap on attendees per synthetic meeting")
+    parser.add_argument("--max-cascade-size", type=int, default=10000,
+                        help="skip cascade matching above this roster size")
+    parser.add_argument("--skip-ocr", action="store_true", help="do not run Tesseract")
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    results = []
+    for size in (int(s) for s in args.sizes.split(",") if s):
+        print(f"Benchmarking roster of {size}...", file=sys.stderr)
+        results.extend(bench_roster(size, args))
+    print("Benchmarking screenshots...", file=sys.stderr)
+    results.extend(bench_screenshots(args))
+
+    report = {"environment": environment(), "results": results}
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+        print(f"Wrote {len(results)} results to {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,159 @@
+"""
+Synthetic inputs for the benchmarks: rosters, OCR'd participant lists with
+realistic noise, rendered participant-panel screenshots and attendance grids.
+Everything is generated from a seed, so runs are comparable across versions.
+"""
+import io
+import random
+import datetime
+from PIL import Image, ImageDraw, ImageFont
+
+# Frequent first names are repeated on purpose: shared first names are what
+# makes first-name-only matching ambiguous
+FIRST_NAMES = [
+    "Mehmet", "Ahmet", "Mustafa", "Ayşe", "Fatma", "Emine", "Hüseyin", "Zeynep",
+    "Elif", "İbrahim", "Şule", "Özge", "Çağla", "Gökhan", "Barış", "Ömer",
+    "Onur", "Batuhan", "Emre", "Efe", "Berk", "Deniz", "Ece", "Selin", "Can",
+    "Burak", "Merve", "Gizem", "Tuğba", "Uğur", "Serkan", "Kübra", "Büşra",
+    "İrem", "Cem", "Doğan", "Şeyma", "Göktuğ", "Yağmur", "Ilgın", "Ozan",
+    "Kaan", "Arda", "Eylül", "Nilüfer", "Sinan", "Tolga", "Hakan", "Pınar",
+    "Sıla", "Dilara", "Alper", "Çınar", "Görkem", "Şan", "Fikri", "Rüya",
+    "Eren", "Melis", "Başak",
+]
+MIDDLE_NAMES = ["Fikri", "Berke", "Nur", "Can", "Su", "Ali", "Naz", "Kerem", "Deniz", "Sena"]
+SURNAMES = [
+    "Yılmaz", "Kaya", "Demir", "Şahin", "Çelik", "Yıldız", "Yıldırım", "Öztürk",
+    "Aydın", "Özdemir", "Arslan", "Doğan", "Kılıç", "Aslan", "Çetin", "Kara",
+    "Koç", "Kurt", "Özkan", "Şimşek", "Polat", "Özcan", "Korkmaz", "Çakır",
+    "Erdoğan", "Yavuz", "Can", "Acar", "Güneş", "Aksoy", "Altan", "Kaplaner",
+    "Köktaş", "Tekin", "Bulut", "Ünal", "Güler", "Uçar", "Gündüz", "Sarı",
+    "Işık", "Türkmen", "Akgül", "Bozkurt", "Karaca", "Savaş", "Erdem", "Uysal",
+    "Ateş", "Tuncer", "Ekinci", "Sönmez", "Taş", "Keskin", "Duman", "Gök",
+    "Oral", "Ersoy", "Bayram", "Akın", "Başaran", "Çiftçi", "Ağaoğlu", "Kocaman",
+    "Demirtaş", "Avcı", "Eren", "Kalkan", "Aktaş", "Cömert",
+]
+GUEST_NAMES = ["John Smith", "Maria Garcia", "Wei Zhang", "Priya Patel", "Lukas Müller", "Sofia Rossi"]
+UI_LINES = ["Participants ({n})", "Mute all", "Invite", "In this meeting", "Waiting room", "More", "Q Search"]
+SUFFIXES = [" (Host)", " (me)", " (Co-host)", " (Guest)", "'s iPhone", " (Patientdesk.ai)"]
+ASCII_FOLD = str.maketrans("çğıöşüÇĞİÖŞÜ", "cgiosuCGIOSU")
+TYPO_SWAPS = {"c": "e", "e": "c", "l": "1", "i": "l", "o": "0", "m": "rn", "n": "m", "a": "o"}
+
+
+def make_roster(size, seed=0):
+    """`size` unique member names with Turkish diacritics and shared first names."""
+    rng = random.Random(seed)
+    names = set()
+    while len(names) < size:
+        parts = [rng.choice(FIRST_NAMES)]
+        if rng.random() < 0.15:
+            parts.append(rng.choice(MIDDLE_NAMES))
+        parts.append(rng.choice(SURNAMES))
+        if len(names) > len(FIRST_NAMES) * len(SURNAMES) // 2 or rng.random() < 0.05:
+            # Double surnames keep large rosters unique
+            parts.append(rng.choice(SURNAMES))
+        names.add(" ".join(parts))
+    return sorted(names)
+
+
+def _typo(name, rng):
+    """One OCR-style character confusion."""
+    positions = [i for i, ch in enumerate(name) if ch.lower() in TYPO_SWAPS]
+    if not positions:
+        return name
+    i = rng.choice(positions)
+    return name[:i] + TYPO_SWAPS[name[i].lower()] + name[i + 1:]
+
+
+def noisy_line(name, rng):
+    """How a participant list might show `name` after OCR."""
+    roll = rng.random()
+    if roll < 0.35:
+        line = name
+    elif roll < 0.55:
+        line = name + rng.choice(SUFFIXES)
+    elif roll < 0.65:
+        line = name.replace(" ", "").lower()
+    elif roll < 0.80:
+        line = name.translate(ASCII_FOLD)
+    elif roll < 0.92:
+        line = _typo(name, rng)
+    else:
+        line = _typo(name.translate(ASCII_FOLD), rng) + rng.choice(SUFFIXES)
+    return line
+
+
+def make_ocr_text(roster, present_fraction=0.4, seed=0, max_present=None):
+    """
+    Returns (ocr_text, expected) for a meeting where about `present_fraction`
+    of the roster attended: one noisy line per attendee, mixed with UI text
+    and guests who are not members.
+    """
+    rng = random.Random(seed)
+    count = max(1, int(len(roster) * present_fraction))
+    if max_present:
+        count = min(count, max_present)
+    present = rng.sample(list(roster), count)
+    lines = [noisy_line(name, rng) for name in present]
+    lines += rng.sample(GUEST_NAMES, min(len(GUEST_NAMES), 1 + count // 20))
+    rng.shuffle(lines)
+    header = [UI_LINES[0].format(n=len(lines))] + rng.sample(UI_LINES[1:], 3)
+    return "\n".join(header + lines), set(present)
+
+
+def line_confidences(text, roster, seed=0):
+    """
+    Plausible per-line OCR confidences for `text`: lines that spell a roster
+    name exactly score high (90-99), everything else 40-89.
+    """
+    rng = random.Random(seed)
+    exact = set(roster)
+    return [round(rng.uniform(90, 99) if line in exact else rng.uniform(40, 89), 1)
+            for line in text.split("\n")]
+
+
+def render_panel_screenshot(lines, width=1600, height=1000, seed=0):
+    """
+    Renders a video-call window with a dark participant panel on the right,
+    one line of text per participant. Returns PNG bytes.
+    """
+    rng = random.Random(seed)
+    image = Image.new("RGB", (width, height), (32, 33, 36))
+    draw = ImageDraw.Draw(image)
+    # Video tiles with noisy "camera" content
+    tile_w, tile_h = (width - 420) // 3, height // 3
+    for row in range(3):
+        for col in range(3):
+            x, y = 10 + col * tile_w, 10 + row * tile_h
+            color = tuple(rng.randint(40, 200) for _ in range(3))
+            draw.rectangle([x, y, x + tile_w - 20, y + tile_h - 20], fill=color)
+    # Participant panel
+    panel_left = width - 400
+    draw.rectangle([panel_left, 0, width, height], fill=(255, 255, 255))
+    try:
+        font = ImageFont.load_default(size=22)
+    except TypeError:
+        font = ImageFont.load_default()
+    y = 20
+    for line in lines:
+        if y > height - 40:
+            break
+        draw.ellipse([panel_left + 16, y, panel_left + 44, y + 28], fill=(26, 115, 232))
+        draw.text((panel_left + 60, y), line, fill=(32, 33, 36), font=font)
+        y += 40
+    buf = io.BytesIO()
+    image.save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def make_attendance_grid(roster, meetings=52, seed=0, today=None):
+    """Sheet grid (header + one row per member) with weekly TRUE/FALSE/empty cells."""
+    rng = random.Random(seed)
+    today = today or datetime.date(2026, 4, 30)
+    dates = [today - datetime.timedelta(weeks=w) for w in range(meetings)][::-1]
+    header = ["Name", "# of Meetings Missed in a Row"] + [d.strftime("%d/%m/%Y") for d in dates]
+    grid = [header]
+    for name in roster:
+        rate = rng.uniform(0.2, 0.95)
+        cells = [("TRUE" if rng.random() < rate else "FALSE") if rng.random() < 0.95 else "" for _ in dates]
+        grid.append([name, "0"] + cells)
+    return grid
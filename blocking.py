@@ -0,0 +1,118 @@
+"""
+Trigram indexes over the cleaned OCR lines of one screenshot, so the match
+cascade scores each member only against lines that could possibly match
+instead of every line.
+
+SubstringIndex serves the concatenated strategy: a line can only contain a
+name if it contains every trigram of it. FuzzyIndex serves the
+token_set_ratio strategies: a line sharing a whole token with the name is
+always scored (token_set_ratio can reach 100 on one shared token); any other
+line must be close enough in length and share enough trigrams, by the bound
+in min_shared_grams. Both give exactly the results of checking every line.
+"""
+from collections import Counter
+from thefuzz import utils
+import config
+
+Q = 3
+
+
+def _grams(text):
+    return [text[i:i + Q] for i in range(len(text) - Q + 1)]
+
+
+def scorer_form(text):
+    """The text as token_set_ratio compares it when no token is shared: processed, de-duplicated, sorted tokens."""
+    return " ".join(sorted(set(utils.full_process(text, force_ascii=True).split())))
+
+
+def min_shared_grams(len_a, len_b, threshold):
+    """
+    Fewest trigrams (counted with multiplicity) two scorer forms of these
+    lengths with no token in common must share to score `threshold` or more
+    with thefuzz's token_set_ratio; None when their lengths alone rule it out.
+
+    Without a shared token the score is 200 * LCS / (len_a + len_b), rounded,
+    so LCS >= (threshold - 0.5) * (len_a + len_b) / 200. The characters
+    outside the LCS split it into at most gaps + 1 unbroken runs, and a run of
+    m characters gives m - 2 trigrams found in both strings.
+    """
+    lcs = -(-(2 * threshold - 1) * (len_a + len_b) // 400)
+    if lcs > min(len_a, len_b):
+        return None
+    gaps = len_a + len_b - 2 * lcs
+    return lcs - (Q - 1) * (gaps + 1)
+
+
+class SubstringIndex:
+    """Finds the lines whose concatenated (space-free) form contains a string."""
+
+    def __init__(self, lines):
+        self._nospaces = [line.replace(" ", "") for line in lines]
+        self._postings = {}
+        for j, text in enumerate(self._nospaces):
+            for gram in set(_grams(text)):
+                self._postings.setdefault(gram, set()).add(j)
+
+    def containing(self, text):
+        """Indexes of the lines containing `text` once spaces are removed, ascending."""
+        grams = set(_grams(text))
+        if not grams or not config.MATCH_BLOCKING:
+            candidates = range(len(self._nospaces))
+        else:
+            postings = sorted((self._postings.get(gram, set()) for gram in grams), key=len)
+            candidates = sorted(set.intersection(*postings))
+        return [j for j in candidates if text in self._nospaces[j]]
+
+
+class FuzzyIndex:
+    """
+    Lines with a token_set_ratio threshold each (None leaves a line out);
+    candidates() returns every line that can reach its threshold for a query.
+    """
+
+    def __init__(self, lines, thresholds):
+        self.lines = lines
+        self.thresholds = thresholds
+        self._forms = [scorer_form(line) if t is not None else "" for line, t in zip(lines, thresholds)]
+        self._tokens = {}   # token -> [line]
+        self._grams = {}    # trigram -> [(line, count)]
+        self._buckets = {}  # (form length, threshold) -> [line]
+        for j, form in enumerate(self._forms):
+            if not form:
+                continue
+            for token in form.split():
+                self._tokens.setdefault(token, []).append(j)
+            for gram, count in Counter(_grams(form)).items():
+                self._grams.setdefault(gram, []).append((j, count))
+            self._buckets.setdefault((len(form), thresholds[j]), []).append(j)
+
+    def candidates(self, query):
+        """Indexes of the lines that may score at least their threshold against `query`, ascending."""
+        if not config.MATCH_BLOCKING:
+            return [j for j, form in enumerate(self._forms) if form]
+        form = scorer_form(query)
+        if not form:
+            return []
+        len_a = len(form)
+
+        found = set()
+        for token in form.split():
+            found.update(self._tokens.get(token, ()))
+
+        shared = {}
+        for gram, count in Counter(_grams(form)).items():
+            for j, line_count in self._grams.get(gram, ()):
+                shared[j] = shared.get(j, 0) + min(count, line_count)
+        for j, count in shared.items():
+            if j not in found:
+                need = min_shared_grams(len_a, len(self._forms[j]), self.thresholds[j])
+                if need is not None and count >= need:
+                    found.add(j)
+
+        # Short strings can match without sharing a single trigram
+        for (len_b, threshold), lines in self._buckets.items():
+            need = min_shared_grams(len_a, len_b, threshold)
+            if need is not None and need <= 0:
+                found.update(lines)
+        return sorted(found)
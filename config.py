@@ -18,12 +18,113 @@ SCOPES = [
 # Drive Configuration - REPLACE WITH YOUR FOLDER IDs
 DRIVE_FOLDER_ID = os.getenv("DRIVE_FOLDER_ID")
 PROCESSED_FOLDER_ID = os.getenv("PROCESSED_FOLDER_ID")
+# "changes" follows the Drive Changes feed (one cheap call when idle); "list" lists the folder every poll
+DRIVE_POLL_MODE = os.getenv("DRIVE_POLL_MODE", "changes")
+DRIVE_STATE_FILE = "drive_state.json"  # Changes feed token + files awaiting retry
+DRIVE_FULL_RESCAN_HOURS = 24  # Safety net: full folder listing at least this often
+DRIVE_RETRY_MIN_SECONDS = 60  # A failed file waits this long before its next attempt,
+DRIVE_RETRY_MAX_SECONDS = 6 * 3600  # doubling after each failure up to this
+DRIVE_DOWNLOAD_WORKERS = 4  # Concurrent in-memory downloads
+DRIVE_DOWNLOAD_CHUNK_SIZE = 4 * 1024 * 1024  # Bytes per download request
+# Max items waiting between monitor pipeline stages (download -> OCR -> match -> write)
+PIPELINE_QUEUE_SIZE = 16
+# Per-file processing stages, so a restart resumes where it stopped instead of redoing work
+LEDGER_FILE = "processing_ledger.sqlite3"
+LEDGER_MAX_AGE_DAYS = 90
+
+# "live" talks to Google; "memory" / "sqlite" use the offline stand-in in
+# fake_google.py (sqlite keeps its state in FAKE_GOOGLE_DB, shared between processes)
+GOOGLE_BACKEND = os.getenv("GOOGLE_BACKEND", "live")
+FAKE_GOOGLE_DB = os.getenv("FAKE_GOOGLE_DB", "fake_google.sqlite3")
+
+# Google API quotas: calls wait for the per-service rate limit; 429/5xx and
+# rate-limit 403s are retried with jittered exponential backoff
+SHEETS_REQUESTS_PER_MINUTE = 60
+DRIVE_REQUESTS_PER_MINUTE = 600
+API_MAX_RETRIES = 5
+API_BACKOFF_BASE_SECONDS = 1
+API_BACKOFF_MAX_SECONDS = 32
+
+# Monitor Scheduling
+# Meetings are weekly (see drive_monitor.get_latest_thursday); Drive is polled
+# every POLL_FAST_SECONDS from shortly before the meeting until a few hours after
+# it, and for a while after any new file. Otherwise the interval doubles on each
+# empty poll, from POLL_IDLE_MIN_SECONDS up to POLL_IDLE_MAX_SECONDS.
+MEETING_WEEKDAY = 3  # Mon=0 ... Thu=3
+MEETING_START = "19:00"  # Local time, HH:MM
+MEETING_MINUTES = 120
+POLL_WINDOW_BEFORE_MINUTES = 30
+POLL_WINDOW_AFTER_MINUTES = 180
+POLL_FAST_SECONDS = 15
+POLL_IDLE_MIN_SECONDS = 60
+POLL_IDLE_MAX_SECONDS = 3600
+POLL_ACTIVITY_HOLD_MINUTES = 30
+# Streak re-sync (picks up manual sheet edits) runs on its own, slower cadence
+SHEET_SYNC_SECONDS = 900
+
+# Local screenshots/ folder watcher (inotify on Linux, polling elsewhere)
+LOCAL_SETTLE_SECONDS = 2  # A file must be unchanged this long before it is processed
+LOCAL_POLL_SECONDS = 2  # Folder scan interval when inotify is unavailable
+
+# Streak Configuration
+# Streaks from the last pass and the sheet revision they match; while the sheet is
+# unchanged, only rows this app wrote to are recounted
+STREAK_SNAPSHOT_FILE = "streak_snapshot.json"
+
+# Local mirror of the attendance sheet; the sheet is only re-read when its
+# revision changes (manual edits). Set ATTENDANCE_STORE_FILE = None to always read the sheet.
+ATTENDANCE_STORE_FILE = "attendance_store.sqlite3"
+ATTENDANCE_FULL_SYNC_MINUTES = 60  # Re-read the whole sheet at least this often
 
 
 # OCR Configuration
+# "tesserocr" keeps one Tesseract engine loaded in-process; "pytesseract" runs the
+# tesseract binary per image; "auto" uses tesserocr when installed
+OCR_BACKEND = os.getenv("OCR_BACKEND", "auto")
+TESSERACT_CMD = os.getenv("TESSERACT_CMD", "/opt/homebrew/bin/tesseract")  # pytesseract only
+TESSDATA_PATH = os.getenv("TESSDATA_PREFIX")  # tesserocr only; None = library default
+OCR_LANG = None  # Tesseract language (None = eng)
+# Results are cached by image content hash; set OCR_CACHE_FILE = None to disable
+OCR_CACHE_FILE = "ocr_cache.sqlite3"
+OCR_CACHE_MAX_ENTRIES = 2000
+OCR_CACHE_MAX_AGE_DAYS = 90
+# Crop to the detected participant-list panel before OCR (falls back to full frame)
+PANEL_DETECTION = True
+PANEL_MAX_REGIONS = 1
+# Processes used to OCR a batch of screenshots (None = CPU count)
+OCR_WORKERS = None
+# "text" reads plain text; "confidence" reads line-level data with confidences,
+# re-OCRs only low-confidence lines (cropped, grayscale, upscaled, binarized)
+# and passes the confidences on to matching
+OCR_MODE = os.getenv("OCR_MODE", "text")
+OCR_HIGH_CONFIDENCE = 90  # At or above: exact roster lookup before the match cascade
+OCR_LOW_CONFIDENCE = 60  # Below: second OCR pass on the line alone
+OCR_REOCR_MAX_LINES = 20  # Second-pass lines per image, lowest confidence first
+OCR_REOCR_SCALE = 2  # Upscale factor for second-pass crops
 
-import pytesseract
-pytesseract.pytesseract.tesseract_cmd = '/opt/homebrew/bin/tesseract'
+# Matching Configuration
+# "cascade" checks each member against the lines one strategy at a time;
+# "assignment" scores all members x lines at once and gives each line to one member.
+# Assignment is slower (1 CPU, no scipy: 0.13s vs 0.06s at 500 members, 0.32s vs
+# 0.15s at 1000) but stops one line matching several members: at 1000 members it
+# reported 8 false positives where the cascade reported 55. Up to ~100 members both
+# are exact; see `python -m benchmarks.run`.
+MATCH_MODE = os.getenv("MATCH_MODE", "cascade")
+MATCH_WORKERS = -1  # rapidfuzz threads for the score matrix (-1 = all cores)
+# Score each member only against OCR lines sharing enough trigrams with it
+# (blocking.py); results are identical to scanning every line
+MATCH_BLOCKING = True
+# With OCR confidences: fuzzy thresholds are this much stricter for high-confidence
+# lines and this much looser for low-confidence ones
+MATCH_CONFIDENCE_ADJUST = 5
 
 # Attendance Rules
 # (No cap on consecutive misses - we show the actual count)
+
+# Metrics
+# Per-stage spans (download, decode, OCR, match, sheet read/write, streaks) as
+# JSON lines, aggregated into a Prometheus textfile. Off by default.
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "0").lower() in ("1", "true", "yes")
+METRICS_LOG_FILE = "metrics.jsonl"
+METRICS_TEXTFILE = "attendance_metrics.prom"
+METRICS_FLUSH_SECONDS = 30
@@ -2,15 +2,13 @@ import time
 import os
 import io
 import datetime
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaIoBaseDownload
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
-from google.auth.exceptions import RefreshError
+import asyncio
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import json
 import re
 import config
+import api_client
+import metrics
 import main as attendance_script  # Import existing logic
 
 def parse_date_from_filename(filename):
@@ -42,38 +40,9 @@ def parse_date_from_filename(filename):
     return None
 
 def get_drive_service():
-    """Authenticates and returns the Drive API service."""
-    creds = None
-    if os.path.exists(config.TOKEN_FILE):
-        try:
-            creds = Credentials.from_authorized_user_file(config.TOKEN_FILE, config.SCOPES)
-        except (ValueError, json.JSONDecodeError):
-            print("Token file corrupted. Re-authenticating...")
-            creds = None
-    
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
-            try:
-                creds.refresh(Request())
-            except RefreshError:
-                print("Token expired and refresh failed. Re-authenticating...")
-                creds = None
-        else:
-             # This should be handled by main.py first run usually, but good to have
-            flow = InstalledAppFlow.from_client_config(
-                {"installed": {
-                    "client_id": config.CLIENT_ID, 
-                    "client_secret": config.CLIENT_SECRET,
-                    "auth_uri": "https://accounts.google.com/o/oauth2/auth",
-                    "token_uri": "https://oauth2.googleapis.com/token",
-                    "redirect_uris": ["http://localhost:8080/"]
-                }}, config.SCOPES)
-            creds = flow.run_local_server(port=8080)
-            
-        with open(config.TOKEN_FILE, 'w') as token:
-            token.write(creds.to_json())
-
-    return build('drive', 'v3', credentials=creds)
+    """Returns the shared, already-authenticated Drive API service (see google_clients)."""
+    import google_clients
+    return google_clients.get_drive_service()
 
 def get_latest_thursday(date_obj):
     """
@@ -94,161 +63,305 @@ def get_latest_thursday(date_obj):
     target_date = date_obj - datetime.timedelta(days=days_to_subtract)
     return target_date
 
-def check_for_files(service):
-    """Checks for image files in the specific folder."""
-    if config.DRIVE_FOLDER_ID == "REPLACE_WITH_SOURCE_FOLDER_ID":
-        print("Error: Please set DRIVE_FOLDER_ID in config.py")
-        return
+IMAGE_QUERY = "mimeType contains 'image/' and trashed = false"
+FILE_FIELDS = "id, name, mimeType, md5Checksum, createdTime, parents, trashed"
 
-    # Query: In folder, not trashed, is image
-    query = f"'{config.DRIVE_FOLDER_ID}' in parents and mimeType contains 'image/' and trashed = false"
-    
-    results = service.files().list(q=query, fields="files(id, name, createdTime)").execute()
-    files = results.get('files', [])
-
-    if not files:
-        print("No new files found.")
+def list_folder_images(service, folder_id=None):
+    """Lists every image in the source folder (or `folder_id`), following nextPageToken."""
+    query = f"'{folder_id or config.DRIVE_FOLDER_ID}' in parents and {IMAGE_QUERY}"
+    files = []
+    page_token = None
+    while True:
+        results = api_client.execute(service.files().list(
+            q=query,
+            fields=f"nextPageToken, files({FILE_FIELDS})",
+            pageSize=1000,
+            pageToken=page_token,
+        ))
+        files.extend(results.get('files', []))
+        page_token = results.get('nextPageToken')
+        if not page_token:
+            return files
+
+def _is_pending_image(file_meta):
+    return (
+        not file_meta.get('trashed')
+        and file_meta.get('mimeType', '').startswith('image/')
+        and config.DRIVE_FOLDER_ID in file_meta.get('parents', [])
+    )
+
+def poll_drive_changes(service, page_token):
+    """
+    Reads the Drive Changes feed from `page_token`.
+    Returns (images now in the source folder, ids of files removed, trashed or
+    moved out of it, token to resume from next time).
+    With nothing new this is a single changes().list call.
+    """
+    changed = {}
+    gone = set()
+    while True:
+        results = api_client.execute(service.changes().list(
+            pageToken=page_token,
+            spaces='drive',
+            pageSize=1000,
+            fields=f"nextPageToken, newStartPageToken, changes(fileId, removed, file({FILE_FIELDS}))",
+        ))
+        for change in results.get('changes', []):
+            file_meta = change.get('file')
+            if not change.get('removed') and file_meta and _is_pending_image(file_meta):
+                changed[change['fileId']] = file_meta
+                gone.discard(change['fileId'])
+            else:
+                changed.pop(change['fileId'], None)
+                gone.add(change['fileId'])
+        if 'newStartPageToken' in results:
+            return list(changed.values()), gone, results['newStartPageToken']
+        page_token = results['nextPageToken']
+
+def load_drive_state():
+    """Persisted Changes feed position and files awaiting retry."""
+    if os.path.exists(config.DRIVE_STATE_FILE):
+        try:
+            with open(config.DRIVE_STATE_FILE, 'r') as f:
+                return json.load(f)
+        except (ValueError, OSError) as e:
+            print(f"Drive state file unreadable ({e}). Doing a full rescan.")
+    return {}
+
+def save_drive_state(state):
+    tmp_path = config.DRIVE_STATE_FILE + ".tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f)
+    os.replace(tmp_path, config.DRIVE_STATE_FILE)
+
+def find_pending_drive_files(service, state, full_rescan=False):
+    """
+    Returns the source-folder images that still need processing, leaving out
+    files that failed recently (see mark_drive_files_failed).
+    In "changes" mode only the Drive Changes feed is read, except on the first
+    run, when `full_rescan` is set, or every DRIVE_FULL_RESCAN_HOURS. The feed
+    position and the pending list are saved in `state` (and on disk) before
+    returning, so a crash does not replay the feed or lose pending files.
+    """
+    if config.DRIVE_POLL_MODE != "changes":
+        return [f for f in list_folder_images(service) if retry_due(state, f['id'])]
+
+    rescan_due = time.time() - state.get('last_full_rescan', 0) > config.DRIVE_FULL_RESCAN_HOURS * 3600
+    if full_rescan or rescan_due or not state.get('page_token'):
+        # Take the token first so changes made during the listing are not lost
+        page_token = api_client.execute(service.changes().getStartPageToken())['startPageToken']
+        files = list_folder_images(service)
+        state['last_full_rescan'] = time.time()
+        print(f"Full rescan: {len(files)} image(s) in source folder.")
     else:
-        print(f"Found {len(files)} new files.")
-        for file in files:
-            process_drive_file(service, file)
+        changed, gone, page_token = poll_drive_changes(service, state['page_token'])
+        # A pending file deleted or moved away since would otherwise fail forever
+        pending = {f['id']: f for f in state.get('retry', []) if f['id'] not in gone}
+        pending.update({f['id']: f for f in changed})
+        files = list(pending.values())
+
+    state['page_token'] = page_token
+    state['retry'] = files
+    ids = {f['id'] for f in files}
+    state['failures'] = {i: v for i, v in state.get('failures', {}).items() if i in ids}
+    save_drive_state(state)
+    return [f for f in files if retry_due(state, f['id'])]
+
+def retry_due(state, file_id, now=None):
+    """False while a file that failed is still backing off."""
+    failure = state.get('failures', {}).get(file_id)
+    return failure is None or (now or time.time()) >= failure[1]
+
+def mark_drive_files_failed(state, file_ids, now=None):
+    """
+    Backs off files that failed: each waits DRIVE_RETRY_MIN_SECONDS before its
+    next attempt, doubling per failure up to DRIVE_RETRY_MAX_SECONDS.
+    """
+    failures = state.setdefault('failures', {})
+    now = now or time.time()
+    for file_id in file_ids:
+        count = failures.get(file_id, [0, 0])[0] + 1
+        delay = min(config.DRIVE_RETRY_MIN_SECONDS * 2 ** (count - 1), config.DRIVE_RETRY_MAX_SECONDS)
+        failures[file_id] = [count, now + delay]
+    if config.DRIVE_POLL_MODE == "changes":
+        save_drive_state(state)
+
+def mark_drive_files_done(state, file_ids):
+    """Drops processed files from the pending list in `state` and saves it."""
+    state['retry'] = [f for f in state.get('retry', []) if f['id'] not in file_ids]
+    failures = state.get('failures', {})
+    for file_id in file_ids:
+        failures.pop(file_id, None)
+    if config.DRIVE_POLL_MODE == "changes":
+        save_drive_state(state)
+
+def download_drive_file(service, file_meta, http=None):
+    """Downloads a Drive file into memory and returns its bytes as a memoryview."""
+    from googleapiclient.http import MediaIoBaseDownload
+    with metrics.span("download", file=file_meta['name']) as s:
+        request = service.files().get_media(fileId=file_meta['id'])
+        if http is not None:
+            request.http = http
+        fh = io.BytesIO()
+        downloader = MediaIoBaseDownload(fh, request, chunksize=config.DRIVE_DOWNLOAD_CHUNK_SIZE)
+        done = False
+        while not done:
+            _, done = api_client.call("drive.files.get_media", downloader.next_chunk)
+        data = fh.getbuffer()
+        s.set(bytes=len(data))
+    metrics.inc("attendance_download_bytes_total", len(data))
+    return data
+
+def download_and_ocr(service, files):
+    """
+    Downloads files concurrently into memory and OCRs each one as soon as it
+    arrives, so network time overlaps with OCR. Returns {file_id: text}, with
+    None for failed OCR; files that failed to download are left out.
+    """
+    import google_clients
+    texts = {}
+    pool = attendance_script.make_ocr_pool(len(files))
+    ocr_futures = {}
+    try:
+        with ThreadPoolExecutor(max_workers=config.DRIVE_DOWNLOAD_WORKERS) as downloads:
+            futures = {
+                downloads.submit(lambda f: download_drive_file(service, f, http=google_clients.thread_drive_http()), f): f
+                for f in files
+            }
+            for future in as_completed(futures):
+                file_meta = futures[future]
+                try:
+                    data = future.result()
+                except Exception as e:
+                    print(f"Error downloading {file_meta['name']}: {e}. Left in source folder for retry.")
+                    continue
+                print(f"Downloaded {file_meta['name']} ({len(data)} bytes).")
+                if pool:
+                    # memoryviews cannot be pickled; the worker gets a bytes copy
+                    ocr_futures[pool.submit(
+                        attendance_script.extract_text_from_image, bytes(data), raise_errors=True)] = file_meta
+                else:
+                    try:
+                        texts[file_meta['id']] = attendance_script.extract_text_from_image(data, raise_errors=True)
+                    except Exception as e:
+                        print(f"Error OCR'ing {file_meta['name']}: {e}")
+                        texts[file_meta['id']] = None
+
+        for future in as_completed(ocr_futures):
+            file_meta = ocr_futures[future]
+            try:
+                texts[file_meta['id']] = future.result()
+            except Exception as e:
+                print(f"Error OCR'ing {file_meta['name']}: {e}")
+                texts[file_meta['id']] = None
+    finally:
+        if pool:
+            pool.shutdown()
+    return texts
 
-def process_drive_file(service, file_meta):
-    file_id = file_meta['id']
+def resolve_drive_meeting_date(file_meta):
+    """Meeting date from the filename, else the Thursday of the upload week."""
     file_name = file_meta['name']
-    created_time_str = file_meta['createdTime']
-
-    print(f"Processing {file_name}...")
-
-    # 1. Download file
-    request = service.files().get_media(fileId=file_id)
-    fh = io.BytesIO()
-    downloader = MediaIoBaseDownload(fh, request)
-    done = False
-    while not done:
-        _, done = downloader.next_chunk()
-
-    local_path = f"temp_{file_name}"
-    with open(local_path, "wb") as f:
-        f.write(fh.getbuffer())
-
-    # 2. Determine attendance date
     parsed_date = parse_date_from_filename(file_name)
     if parsed_date:
-        meeting_date = parsed_date
-        print(f"Parsed date from filename: {meeting_date}")
-    else:
-        upload_dt = datetime.datetime.fromisoformat(created_time_str.replace('Z', '+00:00'))
-        upload_date = upload_dt.date()
-        meeting_date = get_latest_thursday(upload_date)
-        print(f"File uploaded on {upload_date}. Assigning to Thursday {meeting_date}.")
-
-    # 3. Process attendance — always clean up temp file regardless of outcome
-    success = False
-    try:
-        success = attendance_script.process_single_image(local_path, target_date=meeting_date)
-    finally:
-        if os.path.exists(local_path):
-            os.remove(local_path)
-
-    # 4. Move to Processed only if sheet was actually updated
+        print(f"Parsed date from filename: {parsed_date}")
+        return parsed_date
+    upload_dt = datetime.datetime.fromisoformat(file_meta['createdTime'].replace('Z', '+00:00'))
+    upload_date = upload_dt.date()
+    meeting_date = get_latest_thursday(upload_date)
+    print(f"File uploaded on {upload_date}. Assigning to Thursday {meeting_date}.")
+    return meeting_date
+
+def finish_drive_file(service, file_meta, success):
+    """Moves a processed file to the Processed folder, or leaves it for retry."""
+    file_id = file_meta['id']
+    file_name = file_meta['name']
+    # Move to Processed only if sheet was actually updated
     if success:
         if config.PROCESSED_FOLDER_ID and config.PROCESSED_FOLDER_ID != "REPLACE_WITH_PROCESSED_FOLDER_ID":
-            file = service.files().get(fileId=file_id, fields='parents').execute()
-            previous_parents = ",".join(file.get('parents'))
-            service.files().update(
+            # Parents come with the listing; only fetch them for metadata that lacks them
+            parents = file_meta.get('parents')
+            if not parents:
+                parents = api_client.execute(service.files().get(fileId=file_id, fields='parents')).get('parents')
+            previous_parents = ",".join(parents)
+            api_client.execute(service.files().update(
                 fileId=file_id,
                 addParents=config.PROCESSED_FOLDER_ID,
                 removeParents=previous_parents,
                 fields='id, parents'
-            ).execute()
+            ))
             print(f"Moved {file_name} to Processed folder.")
         else:
             print("Warning: PROCESSED_FOLDER_ID not set. File remains in source folder.")
     else:
         print(f"Failed to process {file_name}. Left in source folder for retry.")
 
+def group_by_meeting_date(jobs):
+    """
+    Groups (meeting_date, item, source) jobs into [(meeting_date, [(item, source)])],
+    ordered by date, so all screenshots of one meeting are processed together.
+    """
+    groups = {}
+    for meeting_date, item, path in jobs:
+        groups.setdefault(meeting_date, []).append((item, path))
+    return sorted(groups.items(), key=lambda g: g[0])
+
 LOCAL_SCREENSHOTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "screenshots")
 LOCAL_PROCESSED_DIR = os.path.join(LOCAL_SCREENSHOTS_DIR, "processed")
 
 IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".webp", ".bmp"}
 
-def check_local_screenshots_folder():
-    """Processes any new images in the local screenshots/ folder."""
+def list_local_screenshots():
+    """
+    Images waiting in screenshots/. Files modified in the last
+    LOCAL_SETTLE_SECONDS are skipped, since they may still be being copied.
+    """
     if not os.path.isdir(LOCAL_SCREENSHOTS_DIR):
-        return
-
-    os.makedirs(LOCAL_PROCESSED_DIR, exist_ok=True)
-
+        return []
+    settled_before = time.time() - config.LOCAL_SETTLE_SECONDS
+    paths = []
     for fname in sorted(os.listdir(LOCAL_SCREENSHOTS_DIR)):
         fpath = os.path.join(LOCAL_SCREENSHOTS_DIR, fname)
-        if not os.path.isfile(fpath):
-            continue
-        if os.path.splitext(fname)[1].lower() not in IMAGE_EXTENSIONS:
-            continue
-
-        print(f"[Local] Processing {fname}...", flush=True)
-        try:
-            parsed_date = parse_date_from_filename(fname)
-            if parsed_date:
-                meeting_date = parsed_date
-                print(f"[Local] Parsed date from filename: {meeting_date}", flush=True)
-            else:
-                meeting_date = get_latest_thursday(datetime.date.today())
-                print(f"[Local] No date in filename. Using {meeting_date}.", flush=True)
-
-            success = attendance_script.process_single_image(fpath, target_date=meeting_date)
-
-            if success:
-                dest = os.path.join(LOCAL_PROCESSED_DIR, fname)
-                os.rename(fpath, dest)
-                print(f"[Local] Moved {fname} to processed/", flush=True)
-            else:
-                print(f"[Local] Failed to process {fname}. Left in screenshots/ for retry.", flush=True)
-        except Exception as e:
-            print(f"[Local] Error processing {fname}: {e}. Skipping.", flush=True)
-
-
-def cleanup_stale_temp_files():
-    """Remove any leftover temp_* files from previous crashes."""
-    work_dir = os.path.dirname(os.path.abspath(__file__))
-    for fname in os.listdir(work_dir):
-        if fname.startswith("temp_") and os.path.splitext(fname)[1].lower() in IMAGE_EXTENSIONS:
-            fpath = os.path.join(work_dir, fname)
-            try:
-                os.remove(fpath)
-                print(f"Cleaned up stale temp file: {fname}", flush=True)
-            except Exception as e:
-                print(f"Could not remove stale temp file {fname}: {e}", flush=True)
-
+        if (os.path.splitext(fname)[1].lower() in IMAGE_EXTENSIONS
+                and os.path.isfile(fpath) and os.path.getmtime(fpath) <= settled_before):
+            paths.append(fpath)
+    return paths
+
+def resolve_local_meeting_date(fname):
+    """Meeting date from the filename, else this week's Thursday."""
+    parsed_date = parse_date_from_filename(fname)
+    if parsed_date:
+        print(f"[Local] Parsed date from filename for {fname}: {parsed_date}", flush=True)
+        return parsed_date
+    meeting_date = get_latest_thursday(datetime.date.today())
+    print(f"[Local] No date in {fname}. Using {meeting_date}.", flush=True)
+    return meeting_date
+
+def finish_local_file(fpath, success):
+    """Moves a processed screenshot to processed/, or leaves it for retry. Returns True if moved."""
+    fname = os.path.basename(fpath)
+    if not success:
+        print(f"[Local] Failed to process {fname}. Left in screenshots/ for retry.", flush=True)
+        return False
+    try:
+        os.makedirs(LOCAL_PROCESSED_DIR, exist_ok=True)
+        os.rename(fpath, os.path.join(LOCAL_PROCESSED_DIR, fname))
+        print(f"[Local] Moved {fname} to processed/", flush=True)
+        return True
+    except OSError as e:
+        print(f"[Local] Could not move {fname}: {e}", flush=True)
+        return False
 
 def start_monitoring():
+    """Runs the monitor as an asyncio pipeline (see pipeline.MonitorPipeline) until stopped."""
     print("Starting Drive Monitor...", flush=True)
     print("Press Ctrl+C to stop.", flush=True)
-    cleanup_stale_temp_files()
     service = get_drive_service()
 
     sheet_client = attendance_script.get_google_sheet_client()
 
-    while True:
-        try:
-            check_for_files(service)
-            check_local_screenshots_folder()
-
-            # Also sync sheet streaks (handle manual updates)
-            if sheet_client:
-                 attendance_script.recalculate_missed_streaks(sheet_client)
-            else:
-                 sheet_client = attendance_script.get_google_sheet_client()
-
-            # Sleep for 1 minute (60 seconds)
-            time.sleep(60)
-        except KeyboardInterrupt:
-            print("Stopping...", flush=True)
-            break
-        except Exception as e:
-            print(f"Error in monitoring loop: {e}", flush=True)
-            time.sleep(60)
+    from pipeline import MonitorPipeline
+    asyncio.run(MonitorPipeline(service, sheet_client).run())
 
 if __name__ == "__main__":
     # Force unbuffered stdout just in case
@@ -0,0 +1,450 @@
+"""
+Offline stand-in for the parts of gspread and the Drive v3 API this app uses,
+selected with config.GOOGLE_BACKEND ("memory" or "sqlite").
+
+State lives in SQLite (":memory:" or config.FAKE_GOOGLE_DB), so a monitor in
+one process and a load generator in another can share it. Every API call the
+app makes is recorded under the endpoint names api_client uses (e.g.
+"sheets.values.batchUpdate", "drive.files.list"), which lets tests and load
+runs assert call budgets per image.
+"""
+import re
+import json
+import time
+import uuid
+import hashlib
+import sqlite3
+import datetime
+import threading
+from collections import Counter
+import httplib2
+import gspread
+from gspread.utils import a1_to_rowcol
+import config
+
+WRITE_ENDPOINTS = {
+    "sheets.values.batchUpdate", "sheets.values.update", "sheets.values.append",
+    "sheets.spreadsheets.batchUpdate", "drive.files.update", "drive.files.create",
+}
+
+
+def call_category(endpoint):
+    """"sheets.read", "sheets.write", "drive.read" or "drive.write"."""
+    service = endpoint.split(".", 1)[0]
+    return f"{service}.{'write' if endpoint in WRITE_ENDPOINTS else 'read'}"
+
+
+def _display_value(value):
+    """A written value the way get_all_values() returns it."""
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    return "" if value is None else str(value)
+
+
+class FakeGoogle:
+    """Shared state plus the call log; hands out the fake Sheets client and Drive service."""
+
+    def __init__(self, path=":memory:"):
+        self.path = path
+        self._lock = threading.RLock()
+        self._sheets_client = None
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS cells ("
+            " sheet TEXT, row INTEGER, col INTEGER, value TEXT, PRIMARY KEY (sheet, row, col));"
+            "CREATE TABLE IF NOT EXISTS spreadsheets (title TEXT PRIMARY KEY, modified REAL);"
+            "CREATE TABLE IF NOT EXISTS files ("
+            " id TEXT PRIMARY KEY, name TEXT, mime_type TEXT, md5 TEXT, created_time TEXT,"
+            " parents TEXT, trashed INTEGER DEFAULT 0, content BLOB);"
+            "CREATE TABLE IF NOT EXISTS changes (seq INTEGER PRIMARY KEY AUTOINCREMENT, file_id TEXT);"
+            "CREATE TABLE IF NOT EXISTS calls (seq INTEGER PRIMARY KEY AUTOINCREMENT, endpoint TEXT, at REAL);"
+        )
+        self._conn.commit()
+
+    def _execute(self, sql, params=(), commit=False):
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+            if commit:
+                self._conn.commit()
+            return rows
+
+    # --- Call log ---
+
+    def record(self, endpoint):
+        self._execute("INSERT INTO calls (endpoint, at) VALUES (?, ?)", (endpoint, time.time()), commit=True)
+
+    def call_mark(self):
+        """Position in the call log; pass to call_counts(since=...) to count later calls only."""
+        return self._execute("SELECT COALESCE(MAX(seq), 0) FROM calls")[0][0]
+
+    def call_counts(self, since=0):
+        """Counter of calls per endpoint and per category ("sheets.read" etc.) after `since`."""
+        counts = Counter()
+        for endpoint, n in self._execute(
+                "SELECT endpoint, COUNT(*) FROM calls WHERE seq > ? GROUP BY endpoint", (since,)):
+            counts[endpoint] += n
+            counts[call_category(endpoint)] += n
+        return counts
+
+    def check_budget(self, budget, since=0, units=1):
+        """
+        Compares calls after `since`, divided by `units` (e.g. images processed),
+        with `budget` ({endpoint or category: max calls per unit}).
+        Returns a list of human-readable violations (empty when within budget).
+        """
+        counts = self.call_counts(since)
+        violations = []
+        for key, limit in budget.items():
+            used = counts.get(key, 0) / max(units, 1)
+            if used > limit:
+                violations.append(f"{key}: {used:.2f} per unit > budget {limit}")
+        return violations
+
+    def assert_budget(self, budget, since=0, units=1):
+        violations = self.check_budget(budget, since, units)
+        assert not violations, "API budget exceeded: " + "; ".join(violations)
+
+    # --- Seeding (not recorded as API calls) ---
+
+    def seed_sheet(self, title, grid):
+        """Creates (or replaces) spreadsheet `title` whose first worksheet holds `grid`."""
+        with self._lock:
+            self._conn.execute("INSERT OR IGNORE INTO spreadsheets (title) VALUES (?)", (title,))
+            self._touch(title)
+            self._conn.execute("DELETE FROM cells WHERE sheet = ?", (title,))
+            self._conn.executemany(
+                "INSERT INTO cells (sheet, row, col, value) VALUES (?, ?, ?, ?)",
+                [(title, r, c, _display_value(v))
+                 for r, row in enumerate(grid, 1) for c, v in enumerate(row, 1) if v != ""],
+            )
+            self._conn.commit()
+
+    def add_file(self, name, content, parents, mime_type="image/png", created_time=None, file_id=None):
+        """Uploads a file into the fake Drive; shows up in files.list and the Changes feed."""
+        file_id = file_id or uuid.uuid4().hex
+        created_time = created_time or datetime.datetime.now(datetime.timezone.utc).isoformat().replace("+00:00", "Z")
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO files (id, name, mime_type, md5, created_time, parents, trashed, content)"
+                " VALUES (?, ?, ?, ?, ?, ?, 0, ?)",
+                (file_id, name, mime_type, hashlib.md5(content).hexdigest(), created_time,
+                 json.dumps(list(parents)), sqlite3.Binary(content)),
+            )
+            self._conn.execute("INSERT INTO changes (file_id) VALUES (?)", (file_id,))
+            self._conn.commit()
+        return file_id
+
+    def remove_file(self, file_id, trash=False):
+        """Deletes a file (or moves it to the trash), as a user would in the Drive UI."""
+        with self._lock:
+            if trash:
+                self._conn.execute("UPDATE files SET trashed = 1 WHERE id = ?", (file_id,))
+            else:
+                self._conn.execute("DELETE FROM files WHERE id = ?", (file_id,))
+            self._conn.execute("INSERT INTO changes (file_id) VALUES (?)", (file_id,))
+            self._conn.commit()
+
+    # --- Clients ---
+
+    def sheets_client(self):
+        """One client per backend, like google_clients' process-wide gspread client."""
+        with self._lock:
+            if self._sheets_client is None:
+                self._sheets_client = FakeSheetsClient(self)
+            return self._sheets_client
+
+    def drive_service(self):
+        return FakeDriveService(self)
+
+    # --- Storage helpers used by the fakes ---
+
+    def grid(self, title):
+        rows = self._execute("SELECT row, col, value FROM cells WHERE sheet = ?", (title,))
+        if not rows:
+            return []
+        height = max(r for r, _, _ in rows)
+        width = max(c for _, c, _ in rows)
+        grid = [[""] * width for _ in range(height)]
+        for r, c, value in rows:
+            grid[r - 1][c - 1] = value
+        return grid
+
+    def write_cells(self, title, cells):
+        """Sets cells (also usable to simulate a manual edit); bumps the spreadsheet revision."""
+        with self._lock:
+            self._touch(title)
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO cells (sheet, row, col, value) VALUES (?, ?, ?, ?)",
+                [(title, r, c, _display_value(v)) for r, c, v in cells],
+            )
+            self._conn.commit()
+
+    def _touch(self, title):
+        # Strictly increasing, like Drive's modifiedTime across edits
+        previous = self._conn.execute("SELECT modified FROM spreadsheets WHERE title = ?", (title,)).fetchone()
+        modified = max(time.time(), ((previous and previous[0]) or 0) + 0.001)
+        self._conn.execute("UPDATE spreadsheets SET modified = ? WHERE title = ?", (modified, title))
+
+    def modified_time(self, title):
+        """The spreadsheet's Drive modifiedTime (RFC 3339, millisecond precision)."""
+        rows = self._execute("SELECT modified FROM spreadsheets WHERE title = ?", (title,))
+        stamp = datetime.datetime.fromtimestamp(rows[0][0], datetime.timezone.utc)
+        return stamp.strftime("%Y-%m-%dT%H:%M:%S.") + f"{stamp.microsecond // 1000:03d}Z"
+
+    def file_meta(self, file_id):
+        rows = self._execute(
+            "SELECT id, name, mime_type, md5, created_time, parents, trashed FROM files WHERE id = ?", (file_id,))
+        return _meta(rows[0]) if rows else None
+
+
+def _meta(row):
+    file_id, name, mime_type, md5, created_time, parents, trashed = row
+    return {
+        "id": file_id, "name": name, "mimeType": mime_type, "md5Checksum": md5,
+        "createdTime": created_time, "parents": json.loads(parents), "trashed": bool(trashed),
+    }
+
+
+# --- gspread subset ---
+
+class FakeWorksheet:
+    def __init__(self, backend, title):
+        self._backend = backend
+        self.spreadsheet_title = title
+        self.title = "Sheet1"
+
+    def get_all_values(self):
+        self._backend.record("sheets.values.get")
+        return self._backend.grid(self.spreadsheet_title)
+
+    def col_values(self, col):
+        self._backend.record("sheets.values.get")
+        values = [row[col - 1] if len(row) >= col else "" for row in self._backend.grid(self.spreadsheet_title)]
+        while values and values[-1] == "":
+            values.pop()
+        return values
+
+    def update_cell(self, row, col, value):
+        self._backend.record("sheets.values.update")
+        self._backend.write_cells(self.spreadsheet_title, [(row, col, value)])
+
+    def batch_update(self, data, **kwargs):
+        self._backend.record("sheets.values.batchUpdate")
+        cells = []
+        for item in data:
+            start = item["range"].split("!")[-1].split(":")[0]
+            row0, col0 = a1_to_rowcol(start)
+            for dr, values in enumerate(item["values"]):
+                for dc, value in enumerate(values):
+                    cells.append((row0 + dr, col0 + dc, value))
+        self._backend.write_cells(self.spreadsheet_title, cells)
+        return {"totalUpdatedCells": len(cells)}
+
+
+class FakeSpreadsheet:
+    def __init__(self, backend, title):
+        self._backend = backend
+        self.title = title
+
+    @property
+    def sheet1(self):
+        return FakeWorksheet(self._backend, self.title)
+
+    def get_worksheet(self, index):
+        return FakeWorksheet(self._backend, self.title) if index == 0 else None
+
+    def get_lastUpdateTime(self):
+        # gspread asks Drive for the file's metadata
+        self._backend.record("drive.files.get")
+        return self._backend.modified_time(self.title)
+
+    def worksheets(self):
+        return [self.sheet1]
+
+
+class FakeSheetsClient:
+    def __init__(self, backend):
+        self._backend = backend
+
+    def open(self, title):
+        # gspread looks the title up through Drive, then fetches the spreadsheet metadata
+        self._backend.record("drive.files.list")
+        self._backend.record("sheets.spreadsheets.get")
+        if not self._backend._execute("SELECT 1 FROM spreadsheets WHERE title = ?", (title,)):
+            raise gspread.SpreadsheetNotFound(title)
+        return FakeSpreadsheet(self._backend, title)
+
+
+# --- Drive v3 subset ---
+
+class FakeRequest:
+    """Stands in for googleapiclient's HttpRequest: methodId + execute()."""
+
+    def __init__(self, backend, method_id, fn):
+        self._backend = backend
+        self.methodId = method_id
+        self._fn = fn
+
+    def execute(self, num_retries=0):
+        self._backend.record(self.methodId)
+        return self._fn()
+
+
+class FakeMediaRequest:
+    """What MediaIoBaseDownload needs from a get_media request."""
+
+    def __init__(self, backend, file_id):
+        self.methodId = "drive.files.get_media"
+        self.uri = f"fake://drive/files/{file_id}?alt=media"
+        self.headers = {}
+        self.http = FakeHttp(backend)
+
+
+class FakeHttp:
+    """Serves ranged media downloads the way the Drive API does."""
+
+    def __init__(self, backend):
+        self._backend = backend
+
+    def request(self, uri, method="GET", body=None, headers=None, **kwargs):
+        self._backend.record("drive.files.get_media")
+        file_id = uri.split("/files/", 1)[1].split("?", 1)[0]
+        rows = self._backend._execute("SELECT content FROM files WHERE id = ?", (file_id,))
+        if not rows:
+            return httplib2.Response({"status": 404}), b"File not found"
+        content = bytes(rows[0][0])
+        match = re.match(r"bytes=(\d+)-(\d+)", (headers or {}).get("range", ""))
+        if not match:
+            return httplib2.Response({"status": 200, "content-length": str(len(content))}), content
+        start, end = int(match.group(1)), int(match.group(2))
+        if start >= len(content):
+            return httplib2.Response({"status": 416, "content-range": f"bytes */{len(content)}"}), b""
+        chunk = content[start:end + 1]
+        return httplib2.Response({
+            "status": 206,
+            "content-range": f"bytes {start}-{start + len(chunk) - 1}/{len(content)}",
+        }), chunk
+
+
+_QUERY_TERMS = [
+    (re.compile(r"^'([^']+)' in parents$"), lambda m, f: m.group(1) in f["parents"]),
+    (re.compile(r"^mimeType contains '([^']+)'$"), lambda m, f: m.group(1) in f["mimeType"]),
+    (re.compile(r"^mimeType = '([^']+)'$"), lambda m, f: f["mimeType"] == m.group(1)),
+    (re.compile(r"^name = '([^']+)'$"), lambda m, f: f["name"] == m.group(1)),
+    (re.compile(r"^trashed = (true|false)$"), lambda m, f: f["trashed"] == (m.group(1) == "true")),
+]
+
+
+def _query_filter(q):
+    """Predicate for the Drive query subset we use: terms joined with "and"."""
+    tests = []
+    for term in (t.strip() for t in (q or "").split(" and ") if t.strip()):
+        for pattern, test in _QUERY_TERMS:
+            match = pattern.match(term)
+            if match:
+                tests.append((match, test))
+                break
+        else:
+            raise ValueError(f"Unsupported Drive query term: {term}")
+    return lambda f: all(test(match, f) for match, test in tests)
+
+
+class FakeFiles:
+    def __init__(self, backend):
+        self._backend = backend
+
+    def list(self, q=None, fields=None, pageSize=100, pageToken=None, orderBy=None, **kwargs):
+        def run():
+            rows = self._backend._execute(
+                "SELECT id, name, mime_type, md5, created_time, parents, trashed FROM files ORDER BY rowid")
+            files = [f for f in map(_meta, rows) if _query_filter(q)(f)]
+            if orderBy:
+                key, _, direction = orderBy.partition(" ")
+                files.sort(key=lambda f: f.get(key) or "", reverse=direction == "desc")
+            offset = int(pageToken or 0)
+            page = files[offset:offset + pageSize]
+            result = {"files": page}
+            if offset + pageSize < len(files):
+                result["nextPageToken"] = str(offset + pageSize)
+            return result
+        return FakeRequest(self._backend, "drive.files.list", run)
+
+    def get(self, fileId, fields=None, **kwargs):
+        def run():
+            meta = self._backend.file_meta(fileId)
+            if meta is None:
+                raise KeyError(f"File not found: {fileId}")
+            return meta
+        return FakeRequest(self._backend, "drive.files.get", run)
+
+    def get_media(self, fileId, **kwargs):
+        return FakeMediaRequest(self._backend, fileId)
+
+    def update(self, fileId, addParents=None, removeParents=None, body=None, fields=None, **kwargs):
+        def run():
+            meta = self._backend.file_meta(fileId)
+            if meta is None:
+                raise KeyError(f"File not found: {fileId}")
+            parents = [p for p in meta["parents"] if p not in (removeParents or "").split(",")]
+            parents += [p for p in (addParents or "").split(",") if p and p not in parents]
+            with self._backend._lock:
+                self._backend._conn.execute(
+                    "UPDATE files SET parents = ?, name = COALESCE(?, name) WHERE id = ?",
+                    (json.dumps(parents), (body or {}).get("name"), fileId))
+                self._backend._conn.execute("INSERT INTO changes (file_id) VALUES (?)", (fileId,))
+                self._backend._conn.commit()
+            return self._backend.file_meta(fileId)
+        return FakeRequest(self._backend, "drive.files.update", run)
+
+
+class FakeChanges:
+    def __init__(self, backend):
+        self._backend = backend
+
+    def _next_token(self):
+        return str(self._backend._execute("SELECT COALESCE(MAX(seq), 0) FROM changes")[0][0] + 1)
+
+    def getStartPageToken(self, **kwargs):
+        return FakeRequest(self._backend, "drive.changes.getStartPageToken",
+                           lambda: {"startPageToken": self._next_token()})
+
+    def list(self, pageToken, spaces=None, pageSize=100, fields=None, **kwargs):
+        def run():
+            rows = self._backend._execute(
+                "SELECT seq, file_id FROM changes WHERE seq >= ? ORDER BY seq LIMIT ?",
+                (int(pageToken), pageSize + 1))
+            changes = []
+            for _, file_id in rows[:pageSize]:
+                meta = self._backend.file_meta(file_id)
+                changes.append({"fileId": file_id, "removed": meta is None, "file": meta})
+            result = {"changes": changes}
+            if len(rows) > pageSize:
+                result["nextPageToken"] = str(rows[pageSize][0])
+            else:
+                result["newStartPageToken"] = self._next_token()
+            return result
+        return FakeRequest(self._backend, "drive.changes.list", run)
+
+
+class FakeDriveService:
+    def __init__(self, backend):
+        self._backend = backend
+
+    def files(self):
+        return FakeFiles(self._backend)
+
+    def changes(self):
+        return FakeChanges(self._backend)
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    """The process-wide fake backend for config.GOOGLE_BACKEND ("memory" or "sqlite")."""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = FakeGoogle(config.FAKE_GOOGLE_DB if config.GOOGLE_BACKEND == "sqlite" else ":memory:")
+        return _backend
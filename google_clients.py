@@ -0,0 +1,152 @@
+import os
+import json
+import threading
+import gspread
+from gspread.http_client import HTTPClient
+from requests.adapters import HTTPAdapter
+from google.oauth2.credentials import Credentials
+from google.auth.transport.requests import Request, AuthorizedSession
+from google.auth.exceptions import RefreshError
+import config
+import api_client
+
+# The Drive client (googleapiclient, httplib2), the OAuth consent flow and the
+# offline fake are imported only by the functions that need them
+
+# Connections kept open per host by the shared Sheets session
+HTTP_POOL_SIZE = 10
+
+_lock = threading.RLock()
+_creds = None
+_sheet_client = None
+_drive_service = None
+_thread_local = threading.local()
+
+
+class QuotaHTTPClient(HTTPClient):
+    """gspread HTTP client whose requests go through api_client.call()."""
+
+    def request(self, method, endpoint, *args, **kwargs):
+        return api_client.call(api_client.sheets_endpoint(method, endpoint), super().request,
+                               method, endpoint, *args, **kwargs)
+
+
+def _run_consent_flow():
+    from google_auth_oauthlib.flow import InstalledAppFlow
+    client_config = {
+        "installed": {
+            "client_id": config.CLIENT_ID,
+            "client_secret": config.CLIENT_SECRET,
+            "auth_uri": "https://accounts.google.com/o/oauth2/auth",
+            "token_uri": "https://oauth2.googleapis.com/token",
+            "redirect_uris": ["http://localhost"]
+        }
+    }
+    flow = InstalledAppFlow.from_client_config(client_config, config.SCOPES)
+    # Use fixed port 8080 to match the GCP Console "Authorized redirect URI"
+    return flow.run_local_server(port=8080, prompt='consent')
+
+
+def get_credentials():
+    """
+    Returns the OAuth credentials shared by every Google client in this process.
+    token.json is read once; an expired token is refreshed (or the consent flow
+    run) and only then saved back. Returns None when no token exists and
+    CLIENT_ID / CLIENT_SECRET are missing.
+    """
+    global _creds
+    with _lock:
+        if _creds is not None and _creds.valid:
+            return _creds
+
+        creds = _creds
+        if creds is None and os.path.exists(config.TOKEN_FILE):
+            try:
+                creds = Credentials.from_authorized_user_file(config.TOKEN_FILE, config.SCOPES)
+            except (ValueError, json.JSONDecodeError):
+                print("Token file corrupted. Re-authenticating...")
+                creds = None
+
+        renewed = False
+        if creds and creds.expired and creds.refresh_token:
+            try:
+                creds.refresh(Request())
+                renewed = True
+            except RefreshError:
+                print("Token expired and refresh failed. Re-authenticating...")
+                creds = None
+
+        if not creds or not creds.valid:
+            if not config.CLIENT_ID or not config.CLIENT_SECRET:
+                print("Error: Missing client_id or client_secret in .env")
+                return None
+            creds = _run_consent_flow()
+            renewed = True
+
+        if renewed:
+            # Save the credentials for the next run
+            with open(config.TOKEN_FILE, 'w') as token:
+                token.write(creds.to_json())
+        _creds = creds
+        return creds
+
+
+def get_sheet_client():
+    """
+    Returns the process-wide gspread client, created on first use. It keeps a
+    pooled keep-alive requests session, refreshes its token on its own and
+    sends every request through api_client (rate limit, retries, stats).
+    With config.GOOGLE_BACKEND set to "memory" or "sqlite", returns the offline fake.
+    """
+    global _sheet_client
+    if config.GOOGLE_BACKEND != "live":
+        import fake_google
+        return fake_google.get_backend().sheets_client()
+    with _lock:
+        if _sheet_client is None:
+            creds = get_credentials()
+            if creds is None:
+                return None
+            session = AuthorizedSession(creds)
+            adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+            session.mount("https://", adapter)
+            _sheet_client = gspread.authorize(creds, http_client=QuotaHTTPClient, session=session)
+        return _sheet_client
+
+
+def get_drive_service():
+    """Returns the process-wide Drive v3 service, created on first use (or the offline fake)."""
+    global _drive_service
+    if config.GOOGLE_BACKEND != "live":
+        import fake_google
+        return fake_google.get_backend().drive_service()
+    with _lock:
+        if _drive_service is None:
+            creds = get_credentials()
+            if creds is None:
+                return None
+            import httplib2
+            from google_auth_httplib2 import AuthorizedHttp
+            from googleapiclient.discovery import build
+            _drive_service = build('drive', 'v3', http=AuthorizedHttp(creds, http=httplib2.Http()))
+        return _drive_service
+
+
+def thread_drive_http():
+    """
+    httplib2 connections are not thread-safe, so each worker thread gets its own
+    keep-alive AuthorizedHttp for Drive requests (pass it as request.http).
+    Raises RuntimeError when there are no credentials to build it from.
+    """
+    if config.GOOGLE_BACKEND != "live":
+        return None  # fake requests bring their own
+    http = getattr(_thread_local, 'http', None)
+    if http is None:
+        creds = get_credentials()
+        if creds is None:
+            raise RuntimeError("No Google credentials: add token.json or client_id/client_secret to .env")
+        import httplib2
+        from google_auth_httplib2 import AuthorizedHttp
+        http = AuthorizedHttp(creds, http=httplib2.Http())
+        _thread_local.http = http
+    return http
@@ -0,0 +1,132 @@
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+# Stages in the order they complete; a file resumes after its last recorded stage
+STAGES = ("downloaded", "ocr", "written", "moved")
+
+
+class ProcessingLedger:
+    """
+    On-disk record of how far each screenshot got through processing, keyed by
+    Drive file id ("drive:<id>") or local path ("local:<path>") plus content hash.
+
+    After a crash the monitor resumes a file from its last completed stage: an
+    OCR'd file is not OCR'd again, and a written file is only moved. An entry
+    whose content hash no longer matches (a new file under the same name) starts
+    over. Safe to use from several threads.
+    """
+
+    def __init__(self, path, max_age_days=90):
+        self.path = path
+        self.max_age_seconds = max_age_days * 86400
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            " key TEXT PRIMARY KEY,"
+            " name TEXT,"
+            " content_hash TEXT,"
+            " stage TEXT NOT NULL,"
+            " meeting_date TEXT,"
+            " text TEXT,"
+            " confidences TEXT,"
+            " parents TEXT,"
+            " updated_at REAL NOT NULL)"
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(files)")}
+        if "confidences" not in columns:  # Ledger written before line confidences were kept
+            self._conn.execute("ALTER TABLE files ADD COLUMN confidences TEXT")
+        self._conn.commit()
+        self.prune()
+
+    @staticmethod
+    def drive_key(file_id):
+        return f"drive:{file_id}"
+
+    @staticmethod
+    def local_key(path):
+        return f"local:{path}"
+
+    @staticmethod
+    def hash_file(path):
+        """sha256 of a local file's contents."""
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def lookup(self, key, content_hash=None):
+        """
+        Returns {"stage", "name", "meeting_date", "text", "confidences", "parents"}
+        for a file still in progress, or None when it should be processed from
+        scratch (unknown, already moved, or its content changed).
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT name, content_hash, stage, meeting_date, text, confidences, parents FROM files WHERE key = ?",
+                (key,),
+            ).fetchone()
+        if row is None:
+            return None
+        name, stored_hash, stage, meeting_date, text, confidences, parents = row
+        if stage == "moved" or (content_hash and stored_hash and content_hash != stored_hash):
+            return None
+        return {
+            "stage": stage,
+            "name": name,
+            "meeting_date": meeting_date,
+            "text": text,
+            "confidences": json.loads(confidences) if confidences else None,
+            "parents": json.loads(parents) if parents else None,
+        }
+
+    def record(self, key, stage, name=None, content_hash=None, meeting_date=None, text=None,
+               confidences=None, parents=None):
+        """
+        Marks `key` as having completed `stage`. Fields left as None keep their
+        stored value, except that recording "downloaded" starts a fresh entry
+        and new `text` replaces the confidences stored with the old one.
+        """
+        if stage not in STAGES:
+            raise ValueError(f"Unknown stage: {stage}")
+        if meeting_date is not None:
+            meeting_date = meeting_date.isoformat() if hasattr(meeting_date, "isoformat") else str(meeting_date)
+        confidences = json.dumps(confidences) if confidences is not None else None
+        parents = json.dumps(parents) if parents is not None else None
+        with self._lock:
+            if stage == "downloaded":
+                self._conn.execute("DELETE FROM files WHERE key = ?", (key,))
+            self._conn.execute(
+                "INSERT INTO files (key, name, content_hash, stage, meeting_date, text, confidences, parents, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT(key) DO UPDATE SET"
+                "  name = COALESCE(excluded.name, name),"
+                "  content_hash = COALESCE(excluded.content_hash, content_hash),"
+                "  stage = excluded.stage,"
+                "  meeting_date = COALESCE(excluded.meeting_date, meeting_date),"
+                "  text = COALESCE(excluded.text, text),"
+                "  confidences = CASE WHEN excluded.text IS NULL THEN confidences ELSE excluded.confidences END,"
+                "  parents = COALESCE(excluded.parents, parents),"
+                "  updated_at = excluded.updated_at",
+                (key, name, content_hash, stage, meeting_date, text, confidences, parents, time.time()),
+            )
+            self._conn.commit()
+
+    def prune(self):
+        """Drops entries untouched for longer than max_age_days."""
+        cutoff = time.time() - self.max_age_seconds
+        with self._lock:
+            self._conn.execute("DELETE FROM files WHERE updated_at < ?", (cutoff,))
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+
+    def close(self):
+        self._conn.close()
@@ -0,0 +1,180 @@
+import os
+import time
+import queue
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+import threading
+
+# inotify(7) constants
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_DELETE = 0x00000200
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+def _load_inotify():
+    """Returns libc with inotify functions, or None when not on Linux."""
+    name = ctypes.util.find_library("c")
+    if not name:
+        return None
+    try:
+        libc = ctypes.CDLL(name, use_errno=True)
+        libc.inotify_init1
+        libc.inotify_add_watch
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+class LocalFolderWatcher:
+    """
+    Watches a folder for new image files and puts their paths on `queue` once
+    they are complete: closed by the writer (or moved in) and unchanged in size
+    for `settle_seconds`. Uses Linux inotify when available, otherwise polls
+    the folder every `poll_interval` seconds.
+
+    Files already in the folder at start() are queued too. A queued path is
+    queued again once it is deleted or moved out and a file appears under its
+    name, or once its size or mtime changes.
+    """
+
+    def __init__(self, directory, extensions, settle_seconds=2.0, poll_interval=2.0):
+        self.directory = directory
+        self.extensions = {e.lower() for e in extensions}
+        self.settle_seconds = settle_seconds
+        self.poll_interval = poll_interval
+        self.queue = queue.Queue()
+        self.mode = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._pending = {}  # path -> ((size, mtime_ns), unchanged_since) or None if not yet stat'ed
+        self._queued = {}  # path -> (size, mtime_ns) when queued
+
+    def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+        fd = self._open_inotify()
+        self.mode = "inotify" if fd is not None else "polling"
+        self._thread = threading.Thread(target=self._run, args=(fd,), name="local-watcher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def mark_done(self, path):
+        """Forgets a handled path, so a new file with the same name is picked up again."""
+        self._queued.pop(path, None)
+
+    def _open_inotify(self):
+        libc = _load_inotify()
+        if libc is None:
+            return None
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            return None
+        wd = libc.inotify_add_watch(fd, os.fsencode(self.directory), IN_CLOSE_WRITE | IN_MOVED_TO | IN_DELETE | IN_MOVED_FROM)
+        if wd < 0:
+            os.close(fd)
+            return None
+        return fd
+
+    def _is_image(self, fname):
+        return os.path.splitext(fname)[1].lower() in self.extensions
+
+    def _track(self, path):
+        # Already-pending files keep their timer; _settle restarts it if they change
+        if path in self._pending:
+            return
+        queued = self._queued.get(path)
+        if queued is not None:
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                self._queued.pop(path, None)
+                return
+            if (st.st_size, st.st_mtime_ns) == queued:
+                return
+            self._queued.pop(path, None)  # a different file under the same name
+        self._pending[path] = None
+
+    def _forget(self, path):
+        self._pending.pop(path, None)
+        self._queued.pop(path, None)
+
+    def _scan(self):
+        names = os.listdir(self.directory)
+        present = {os.path.join(self.directory, fname) for fname in names}
+        for path in list(self._queued):  # mark_done() runs on another thread
+            if path not in present:
+                self._forget(path)  # deleted or moved out since the last scan
+        for fname in names:
+            path = os.path.join(self.directory, fname)
+            if self._is_image(fname) and os.path.isfile(path):
+                self._track(path)
+
+    def _settle(self):
+        """Queues pending files whose size and mtime have been stable long enough."""
+        now = time.monotonic()
+        for path, seen in list(self._pending.items()):
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                del self._pending[path]
+                continue
+            signature = (st.st_size, st.st_mtime_ns)
+            if seen is None or seen[0] != signature:
+                self._pending[path] = (signature, now)
+            elif now - seen[1] >= self.settle_seconds:
+                del self._pending[path]
+                self._queued[path] = signature
+                self.queue.put(path)
+
+    def _read_events(self, fd):
+        try:
+            data = os.read(fd, 64 * 1024)
+        except OSError as e:
+            if e.errno == errno.EAGAIN:
+                return
+            raise
+        offset = 0
+        while offset < len(data):
+            _, mask, _, name_len = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            fname = os.fsdecode(data[offset:offset + name_len].rstrip(b"\0"))
+            offset += name_len
+            if fname and self._is_image(fname):
+                path = os.path.join(self.directory, fname)
+                if mask & (IN_DELETE | IN_MOVED_FROM):
+                    self._forget(path)
+                else:
+                    self._track(path)
+
+    def _run(self, fd):
+        try:
+            self._scan()
+            tick = min(self.poll_interval, self.settle_seconds / 2) or 0.5
+            last_scan = time.monotonic()
+            while not self._stop.is_set():
+                if fd is not None:
+                    # Only wake on events, or to settle files already seen
+                    timeout = tick if self._pending else 1.0
+                    ready, _, _ = select.select([fd], [], [], timeout)
+                    if ready:
+                        self._read_events(fd)
+                else:
+                    self._stop.wait(tick)
+                    if time.monotonic() - last_scan >= self.poll_interval:
+                        self._scan()
+                        last_scan = time.monotonic()
+                self._settle()
+        finally:
+            if fd is not None:
+                os.close(fd)
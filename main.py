@@ -1,56 +1,27 @@
 import sys
 import os
+import io
+import time
 import json
 import datetime
-from PIL import Image
-import pytesseract
-from thefuzz import process, fuzz
-import gspread
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import unicodedata
 import config
+import api_client
+import metrics
+from ocr_backends import get_ocr_backend
+from ocr_cache import OcrCache
+from sheet_session import SheetSession
+
+# PIL, numpy, thefuzz and the Google libraries are imported where they are
+# used, so `--recalculate` and the monitor's restart do not load the OCR and
+# matching stack (see scripts/check_import_time.py)
 
 def get_google_sheet_client():
-    """Authenticates and returns the Google Sheets client using OAuth2."""
-    creds = None
-    
-    # The file token.json stores the user's access and refresh tokens, and is
-    # created automatically when the authorization flow completes for the first time.
-    if os.path.exists(config.TOKEN_FILE):
-        creds = Credentials.from_authorized_user_file(config.TOKEN_FILE, config.SCOPES)
-        
-    # If there are no (valid) credentials available, let the user log in.
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
-            creds.refresh(Request())
-        else:
-            # Create client config from env vars
-            if not config.CLIENT_ID or not config.CLIENT_SECRET:
-                print("Error: Missing client_id or client_secret in .env")
-                return None
-                
-            client_config = {
-                "installed": {
-                    "client_id": config.CLIENT_ID,
-                    "client_secret": config.CLIENT_SECRET,
-                    "auth_uri": "https://accounts.google.com/o/oauth2/auth",
-                    "token_uri": "https://oauth2.googleapis.com/token",
-                    "redirect_uris": ["http://localhost"]
-                }
-            }
-            
-            flow = InstalledAppFlow.from_client_config(client_config, config.SCOPES)
-            # Use fixed port 8080 to match the GCP Console "Authorized redirect URI"
-            creds = flow.run_local_server(port=8080, prompt='consent')
-            
-        # Save the credentials for the next run
-        with open(config.TOKEN_FILE, 'w') as token:
-            token.write(creds.to_json())
-
-    client = gspread.authorize(creds)
-    return client
+    """Returns the shared, already-authenticated gspread client (see google_clients)."""
+    import google_clients
+    return google_clients.get_sheet_client()
 
 def get_members(sheet=None):
     """Retrieves members from the local JSON or Google Sheet."""
@@ -72,16 +43,221 @@ def get_members(sheet=None):
             return json.load(f)
     return []
 
-def extract_text_from_image(image_path):
-    """Extracts text from the given image using Tesseract OCR."""
+class OcrText(str):
+    """
+    OCR output that also carries Tesseract's confidence (0-100) for each line
+    of the text, in order (OCR_MODE = "confidence"). Behaves as a plain string
+    everywhere else; `confidences` is None when unknown.
+    """
+
+    def __new__(cls, text, confidences=None):
+        obj = super().__new__(cls, text)
+        obj.confidences = confidences
+        return obj
+
+_ocr_cache = None
+_ocr_cache_lock = threading.Lock()
+
+def get_ocr_cache():
+    """Returns the process-wide OCR cache, or None if caching is disabled."""
+    global _ocr_cache
+    with _ocr_cache_lock:
+        if _ocr_cache is None and config.OCR_CACHE_FILE:
+            _ocr_cache = OcrCache(
+                config.OCR_CACHE_FILE,
+                max_entries=config.OCR_CACHE_MAX_ENTRIES,
+                max_age_days=config.OCR_CACHE_MAX_AGE_DAYS,
+            )
+        return _ocr_cache
+
+def ocr_settings():
+    """Settings that change OCR output; part of the OCR cache key."""
+    settings = {
+        **get_ocr_backend().settings(),
+        "panel_detection": config.PANEL_DETECTION,
+        "panel_max_regions": config.PANEL_MAX_REGIONS,
+    }
+    if config.OCR_MODE == "confidence":
+        settings.update(mode=config.OCR_MODE, low_confidence=config.OCR_LOW_CONFIDENCE,
+                        reocr_max_lines=config.OCR_REOCR_MAX_LINES, reocr_scale=config.OCR_REOCR_SCALE)
+    return settings
+
+def _otsu_threshold(pixels):
+    """Gray level that best separates text from background (Otsu's method)."""
+    import numpy as np
+    hist = np.bincount(pixels.ravel(), minlength=256).astype(float)
+    below = np.cumsum(hist)[:-1]
+    above = hist.sum() - below
+    level_sums = np.cumsum(hist * np.arange(256))
+    valid = (below > 0) & (above > 0)
+    mean_below = level_sums[:-1] / np.where(valid, below, 1)
+    mean_above = (level_sums[-1] - level_sums[:-1]) / np.where(valid, above, 1)
+    spread = np.where(valid, below * above * (mean_below - mean_above) ** 2, 0)
+    return int(np.argmax(spread))
+
+def preprocess_for_reocr(image, scale=None):
+    """Grayscale, upscale and binarize a line crop for a second OCR pass."""
+    import numpy as np
+    from PIL import Image, ImageOps
+    scale = scale or config.OCR_REOCR_SCALE
+    gray = ImageOps.grayscale(image)
+    gray = gray.resize((gray.width * scale, gray.height * scale), Image.LANCZOS)
+    pixels = np.asarray(gray)
+    binary = np.where(pixels > _otsu_threshold(pixels), 255, 0).astype(np.uint8)
+    # Tesseract reads dark text on a light background best
+    if binary.mean() < 128:
+        binary = 255 - binary
+    return Image.fromarray(binary)
+
+def _ocr_with_confidences(backend, image, regions):
+    """
+    Reads each region line by line with confidences, then gives only the
+    low-confidence lines a second pass on a preprocessed crop of the line,
+    keeping whichever reading Tesseract is more confident about.
+    """
+    lines = []  # [text, confidence, region image, line box]
+    for box in regions:
+        region = image.crop(box) if box else image
+        lines.extend([text, conf, region, line_box] for text, conf, line_box in backend.image_to_lines(region))
+
+    low = sorted((line for line in lines if line[1] < config.OCR_LOW_CONFIDENCE), key=lambda line: line[1])
+    low = low[:config.OCR_REOCR_MAX_LINES]
+    if low:
+        improved = 0
+        with metrics.span("reocr", lines=len(low)) as s:
+            for line in low:
+                _, conf, region, (left, top, right, bottom) = line
+                crop = region.crop((max(left - 4, 0), max(top - 4, 0),
+                                    min(right + 4, region.width), min(bottom + 4, region.height)))
+                second = backend.image_to_lines(preprocess_for_reocr(crop), single_line=True)
+                if not second:
+                    continue
+                second_conf = sum(c for _, c, _ in second) / len(second)
+                if second_conf > conf:
+                    line[0], line[1] = " ".join(t for t, _, _ in second), second_conf
+                    improved += 1
+            s.set(improved=improved)
+        print(f"Re-OCR'd {len(low)} low-confidence line(s); {improved} improved.")
+
+    return OcrText("\n".join(line[0] for line in lines), [round(line[1], 1) for line in lines])
+
+def ocr_image(image):
+    """
+    Runs OCR on the participant-list panel(s) of a decoded image,
+    or on the full frame when no panel is detected.
+    """
+    regions = []
+    if config.PANEL_DETECTION:
+        from panel_detect import find_panel_regions
+        start = time.perf_counter()
+        with metrics.span("panel_detect") as s:
+            regions = find_panel_regions(image, max_regions=config.PANEL_MAX_REGIONS)
+            s.set(regions=len(regions))
+        detect_ms = (time.perf_counter() - start) * 1000
+        if regions:
+            area = sum((r - l) * (b - t) for l, t, r, b in regions) / (image.width * image.height)
+            print(f"Panel detection: {len(regions)} region(s), {area:.0%} of frame, {detect_ms:.0f} ms.")
+        else:
+            print(f"Panel detection: no panel found, using full frame ({detect_ms:.0f} ms).")
+
+    backend = get_ocr_backend()
+    start = time.perf_counter()
+    with metrics.span("ocr", engine=backend.name, mode=config.OCR_MODE) as s:
+        if config.OCR_MODE == "confidence":
+            text = _ocr_with_confidences(backend, image, regions or [None])
+        elif regions:
+            text = "\n".join(backend.image_to_string(image.crop(box)) for box in regions)
+        else:
+            text = backend.image_to_string(image)
+        s.set(chars=len(text))
+    print(f"OCR took {(time.perf_counter() - start) * 1000:.0f} ms.")
+    return text
+
+def extract_text_from_image(image_source, raise_errors=False):
+    """
+    Extracts text from the given image using Tesseract OCR.
+    `image_source` is a file path or the encoded image as bytes / memoryview,
+    so downloaded images never need to touch the disk.
+    Results are cached by image content, so retries of the same image skip Tesseract.
+    An unreadable image gives "" unless `raise_errors` is set (batch callers,
+    which leave failed images for retry).
+    """
     try:
-        image = Image.open(image_path)
-        text = pytesseract.image_to_string(image)
+        if isinstance(image_source, (bytes, bytearray, memoryview)):
+            image_bytes = image_source
+        else:
+            with open(image_source, 'rb') as f:
+                image_bytes = f.read()
+
+        cache = get_ocr_cache()
+        key = OcrCache.make_key(image_bytes, ocr_settings()) if cache is not None else None
+        if cache is not None:
+            cached = cache.get(key)
+            metrics.inc("attendance_ocr_cache_total", result="hit" if cached is not None else "miss")
+            if cached is not None:
+                print("Using cached OCR result.")
+                return OcrText(cached["text"], cached["confidences"])
+
+        from PIL import Image
+        with metrics.span("decode", bytes=len(image_bytes)) as s:
+            image = Image.open(io.BytesIO(image_bytes))
+            image.load()
+            s.set(width=image.width, height=image.height)
+        text = ocr_image(image)
+        if cache is not None:
+            cache.put(key, text, getattr(text, "confidences", None))
         return text
     except Exception as e:
+        if raise_errors:
+            raise
         print(f"Error reading image: {e}")
         return ""
 
+def make_ocr_pool(job_count, max_workers=None):
+    """
+    Returns a ProcessPoolExecutor sized to the CPU count (capped at job_count)
+    for OCR'ing images, or None when a single worker would do.
+    """
+    max_workers = min(job_count, max_workers or config.OCR_WORKERS or os.cpu_count() or 1)
+    if max_workers <= 1:
+        return None
+    print(f"OCR'ing {job_count} images with {max_workers} workers...")
+    return ProcessPoolExecutor(max_workers=max_workers)
+
+def extract_texts_parallel(image_sources, max_workers=None):
+    """
+    OCRs a batch of images in a process pool sized to the CPU count.
+    `image_sources` is a list of paths or a {key: path or image bytes} dict.
+    Returns {path or key: text}, with None for images whose OCR failed; one bad
+    image does not affect the others.
+    """
+    if not isinstance(image_sources, dict):
+        image_sources = {path: path for path in image_sources}
+    results = {}
+    if not image_sources:
+        return results
+
+    pool = make_ocr_pool(len(image_sources), max_workers)
+    if pool is None:
+        for key, source in image_sources.items():
+            try:
+                results[key] = extract_text_from_image(source, raise_errors=True)
+            except Exception as e:
+                print(f"Error OCR'ing {key}: {e}")
+                results[key] = None
+        return results
+
+    with pool:
+        futures = {pool.submit(extract_text_from_image, source, raise_errors=True): key for key, source in image_sources.items()}
+        for future in as_completed(futures):
+            key = futures[future]
+            try:
+                results[key] = future.result()
+            except Exception as e:
+                print(f"Error OCR'ing {key}: {e}")
+                results[key] = None
+    return results
+
 def normalize_text(text):
     """
     Normalizes text by removing diacritics and converting to lowercase.
@@ -111,239 +287,415 @@ def clean_line(text):
     # Or just return the cleaned text
     return text.strip()
 
-def match_attendance(ocr_text, members):
-    """Matches OCR text against member list using improved matching."""
+class MemberEntry:
+    """Precomputed matching forms of a single member name."""
+    __slots__ = ("name", "normalized", "nospaces", "tokens", "first_name", "first_name_unique")
+
+    def __init__(self, name, normalized, first_name, first_name_unique):
+        self.name = name
+        self.normalized = normalized
+        self.nospaces = normalized.replace(" ", "")
+        self.tokens = frozenset(normalized.split())
+        self.first_name = first_name
+        self.first_name_unique = first_name_unique
+
+
+class MemberIndex:
+    """
+    Roster compiled for match_attendance: normalized names, token sets,
+    concatenated forms and first-name uniqueness, built once per roster.
+    """
+
+    def __init__(self, members):
+        self.roster = tuple(members)
+
+        # Pre-compute first name counts to check for uniqueness
+        # usage: 'Emre' -> 1
+        first_name_counts = {}
+        for m in self.roster:
+            first_name = m.strip().split(" ")[0].lower()
+            # Normalize first name
+            first_name = normalize_text(first_name)
+            first_name_counts[first_name] = first_name_counts.get(first_name, 0) + 1
+
+        self.entries = []
+        for member in self.roster:
+            if not member.strip():
+                continue
+            normalized = normalize_text(member)
+            parts = normalized.split()
+            first_name = parts[0] if parts else ""
+            self.entries.append(MemberEntry(
+                member, normalized, first_name,
+                bool(first_name) and first_name_counts.get(first_name) == 1,
+            ))
+
+        # Exact lookup of a cleaned OCR line, spaced or concatenated
+        self.by_form = {}
+        for entry in self.entries:
+            for form in {entry.normalized, entry.nospaces}:
+                self.by_form.setdefault(form, []).append(entry)
+
+    def matches(self, members):
+        """True if this index was built from exactly this roster."""
+        return self.roster == tuple(members)
+
+    def __len__(self):
+        return len(self.entries)
+
+
+_member_index = None
+
+def get_member_index(members):
+    """Returns the cached MemberIndex, rebuilding it only when the roster changed."""
+    global _member_index
+    if _member_index is None or not _member_index.matches(members):
+        _member_index = MemberIndex(members)
+    return _member_index
+
+def match_attendance(ocr_text, members, mode=None):
+    """
+    Matches OCR text against member list using improved matching.
+    `members` may be a list of names or a prebuilt MemberIndex.
+    `mode` is "cascade" (per-member strategies) or "assignment" (score matrix
+    with one-to-one line assignment); defaults to config.MATCH_MODE.
+    """
+    index = members if isinstance(members, MemberIndex) else MemberIndex(members)
+    mode = mode or config.MATCH_MODE
+    with metrics.span("match", mode=mode, members=len(index)) as s:
+        if mode == "assignment":
+            present_members = match_attendance_assignment(ocr_text, index)
+        else:
+            present_members = _match_cascade(ocr_text, index)
+        s.set(matched=len(present_members))
+    return present_members
+
+def fuzzy_threshold(base, confidence):
+    """Fuzzy score a line must reach: stricter when OCR is sure of the line, looser when not."""
+    if confidence is None:
+        return base
+    if confidence >= config.OCR_HIGH_CONFIDENCE:
+        return base + config.MATCH_CONFIDENCE_ADJUST
+    if confidence < config.OCR_LOW_CONFIDENCE:
+        return base - config.MATCH_CONFIDENCE_ADJUST
+    return base
+
+def _ocr_lines(ocr_text):
+    """[(cleaned line, confidence or None)] for the non-empty lines of an OCR result."""
+    confidences = getattr(ocr_text, "confidences", None) or []
+    lines = []
+    for i, line in enumerate(ocr_text.split('\n')):
+        line = normalize_text(clean_line(line))
+        if line:
+            lines.append((line, confidences[i] if i < len(confidences) else None))
+    return lines
+
+def _best_fuzzy(query, line_index):
+    """
+    Best (line, score) among lines scoring at least their own threshold, or
+    None. Only the lines the FuzzyIndex cannot rule out are scored.
+    """
+    from thefuzz import process, fuzz
+    groups = {}
+    for j in line_index.candidates(query):
+        groups.setdefault(line_index.thresholds[j], []).append(line_index.lines[j])
+    best = None
+    for threshold, group in sorted(groups.items()):
+        match = process.extractOne(query, group, scorer=fuzz.token_set_ratio)
+        if match and match[1] >= threshold and (best is None or match[1] > best[1]):
+            best = match
+    return best
+
+def _match_cascade(ocr_text, index):
+    """Tries each member against the OCR lines, one strategy after another."""
+    from blocking import SubstringIndex, FuzzyIndex
     present_members = []
-    
-    # Pre-compute first name counts to check for uniqueness
-    # usage: 'Emre' -> 1
-    first_name_counts = {}
-    for m in members:
-        first_name = m.strip().split(" ")[0].lower()
-        # Normalize first name
-        first_name = normalize_text(first_name)
-        first_name_counts[first_name] = first_name_counts.get(first_name, 0) + 1
 
     # 1. Clean up OCR text
     normalized_ocr = normalize_text(ocr_text)
-    
-    # Prepare cleaned lines
-    raw_lines = ocr_text.split('\n')
-    cleaned_lines = []
-    for line in raw_lines:
-        line = clean_line(line)
-        line = normalize_text(line)
-        if line:
-            cleaned_lines.append(line)
-    
-    for member in members:
-        if not member.strip():
+    lines = _ocr_lines(ocr_text)
+    cleaned_lines = [line for line, _ in lines]
+    concatenated_index = SubstringIndex(cleaned_lines)
+
+    # --- Fast path: high-confidence lines that spell a member's name exactly ---
+    # Those members skip the cascade, and their lines are left out of fuzzy matching
+    exact = {}
+    fuzzy_thresholds, first_name_thresholds = [], []
+    for line, conf in lines:
+        entries = None
+        if conf is not None and conf >= config.OCR_HIGH_CONFIDENCE:
+            entries = index.by_form.get(line) or index.by_form.get(line.replace(" ", ""))
+        for entry in entries or ():
+            exact.setdefault(entry.name, line)
+        fuzzy_thresholds.append(None if entries else fuzzy_threshold(85, conf))
+        first_name_thresholds.append(None if entries else fuzzy_threshold(90, conf))
+    fuzzy_index = FuzzyIndex(cleaned_lines, fuzzy_thresholds)
+    first_name_index = FuzzyIndex(cleaned_lines, first_name_thresholds)
+
+    for entry in index.entries:
+        member = entry.name
+        normalized_member = entry.normalized
+
+        if member in exact:
+            present_members.append(member)
+            print(f"Matched (Exact Line): {member} (Line: '{exact[member]}')")
+            metrics.inc("attendance_match_total", strategy="exact_line")
             continue
-            
-        # Normalize member name
-        normalized_member = normalize_text(member)
         
         # --- Strategy 1: Exact substring match (normalized) ---
         if normalized_member in normalized_ocr:
              present_members.append(member)
              print(f"Matched (Substring): {member}")
+             metrics.inc("attendance_match_total", strategy="substring")
              continue
              
         # --- Strategy 2: Concatenated Match (e.g. batuhanaltan) ---
         # Good for "batuhanaltan" vs "Batuhan Altan"
-        nospaces_member = normalized_member.replace(" ", "")
-        found_concat = False
-        for line in cleaned_lines:
-            if nospaces_member in line.replace(" ", ""):
-                present_members.append(member)
-                print(f"Matched (Concatenated): {member} (Line: '{line}')")
-                found_concat = True
-                break
-        if found_concat:
+        hits = concatenated_index.containing(entry.nospaces)
+        if hits:
+            present_members.append(member)
+            print(f"Matched (Concatenated): {member} (Line: '{cleaned_lines[hits[0]]}')")
+            metrics.inc("attendance_match_total", strategy="concatenated")
             continue
 
         # --- Strategy 3: Fuzzy Match using token_set_ratio ---
-        best_match = process.extractOne(
-            normalized_member, 
-            cleaned_lines, 
-            scorer=fuzz.token_set_ratio
-        )
-        
-        if best_match and best_match[1] >= 85: 
+        # Threshold 85, shifted by line confidence when known (see fuzzy_threshold)
+        best_match = _best_fuzzy(normalized_member, fuzzy_index)
+        if best_match:
              present_members.append(member)
              print(f"Matched (Fuzzy Token): {member} (Found: '{best_match[0]}', Score: {best_match[1]})")
+             metrics.inc("attendance_match_total", strategy="fuzzy_token")
              continue
              
         # --- Strategy 4: Unique First Name Fallback ---
         # If "Emre" is unique in the group, and we find "Emre" in the text, match it.
         # This solves "Emre (Patientdesk.ai)" matching "Emre Kaplaner"
-        parts = normalized_member.split()
-        if len(parts) > 0:
-            first_name = parts[0]
-            if first_name_counts.get(first_name) == 1:
-                # Check if this first name exists in lines (fuzzy or exact)
-                # Fuzzy match for just the first name against lines
-                best_fn_match = process.extractOne(
-                    first_name,
-                    cleaned_lines,
-                    scorer=fuzz.token_set_ratio # or partial_ratio?
-                )
-                # Use a slightly stricter threshold for single name to avoid "Ali" matching "Salih" too easily?
-                # "Emre" vs "Emre (Patient...)" -> token_set_ratio should be 100
-                if best_fn_match and best_fn_match[1] >= 90:
-                    present_members.append(member)
-                    print(f"Matched (Unique First Name): {member} (Found: '{best_fn_match[0]}', Score: {best_fn_match[1]})")
-                    continue
+        if entry.first_name_unique:
+            # Fuzzy match for just the first name against lines, with a stricter
+            # threshold (90) for a single name so "Ali" does not match "Salih" too easily
+            # "Emre" vs "Emre (Patient...)" -> token_set_ratio should be 100
+            best_fn_match = _best_fuzzy(entry.first_name, first_name_index)
+            if best_fn_match:
+                present_members.append(member)
+                print(f"Matched (Unique First Name): {member} (Found: '{best_fn_match[0]}', Score: {best_fn_match[1]})")
+                metrics.inc("attendance_match_total", strategy="unique_first_name")
+                continue
     
     return present_members
 
-def update_sheet_attendance(client, present_members, target_date=None):
-    """Updates the Google Sheet with attendance. Returns True on success, False on failure."""
-    if not client:
-        return False
-
-    try:
-        sheet = client.open(config.SHEET_NAME).sheet1
-
-        # Get all values to map headers and rows
-        all_records = sheet.get_all_values()
-        headers = all_records[0]
+# Assignment weights: exact matches beat fuzzy full-name matches, which beat first-name matches
+EXACT_MATCH_WEIGHT = 1000.0
+FUZZY_MATCH_WEIGHT = 500.0
 
-        # Use provided date or today
-        if target_date:
-            date_str = target_date.strftime("%d/%m/%Y")
-        else:
-            date_str = datetime.date.today().strftime("%d/%m/%Y")
+def match_attendance_assignment(ocr_text, members):
+    """
+    Matches OCR text against members with a members x lines score matrix
+    computed in one batched rapidfuzz call, then assigns each OCR line to at
+    most one member. Uses the same strategies and thresholds as the cascade.
+    """
+    import numpy as np
+    from rapidfuzz import process as rf_process, fuzz as rf_fuzz, utils as rf_utils
+    from assignment import solve_assignment
 
-        try:
-            col_index = headers.index(date_str) + 1
-        except ValueError:
-            print(f"Error: Column for date ({date_str}) not found. Existing headers: {headers}")
-            return False
+    index = members if isinstance(members, MemberIndex) else MemberIndex(members)
+    entries = index.entries
+    if not entries:
+        return []
 
-        member_name_col_index = 0
-        cells_to_update = []
+    normalized_ocr = normalize_text(ocr_text)
+    lines = _ocr_lines(ocr_text)
+    cleaned_lines = [line for line, _ in lines]
+    nospaces_lines = [line.replace(" ", "") for line in cleaned_lines]
+    nospaces_ocr = "\n".join(nospaces_lines)
+    # Per-line thresholds, shifted by OCR confidence when known
+    fuzzy_thresholds = np.array([fuzzy_threshold(85, conf) for _, conf in lines])
+    first_name_thresholds = np.array([fuzzy_threshold(90, conf) for _, conf in lines])
+
+    labels = {}
+    if cleaned_lines:
+        # --- Strategy 3: Fuzzy token_set_ratio, all members x all lines in one call ---
+        scores = rf_process.cdist(
+            [e.normalized for e in entries], cleaned_lines,
+            scorer=rf_fuzz.token_set_ratio, processor=rf_utils.default_process,
+            workers=config.MATCH_WORKERS,
+        )
+        weights = np.where(scores >= fuzzy_thresholds, scores + FUZZY_MATCH_WEIGHT, 0.0)
+
+        # --- Strategy 4: Unique first names, scored only where no better edge exists ---
+        unique_rows = [i for i, e in enumerate(entries) if e.first_name_unique]
+        if unique_rows:
+            fn_scores = rf_process.cdist(
+                [entries[i].first_name for i in unique_rows], cleaned_lines,
+                scorer=rf_fuzz.token_set_ratio, processor=rf_utils.default_process,
+                workers=config.MATCH_WORKERS,
+            )
+            fn_weights = np.where(fn_scores >= first_name_thresholds, fn_scores, 0.0)
+            weights[unique_rows] = np.maximum(weights[unique_rows], fn_weights)
+    else:
+        scores = weights = np.zeros((len(entries), 0))
 
-        print(f"Updating attendance for {date_str} in column {col_index}...")
+    # --- Strategies 1 & 2: Exact substring / concatenated, checked per line only on a text hit ---
+    for i, e in enumerate(entries):
+        in_text = e.normalized in normalized_ocr
+        if not in_text and e.nospaces not in nospaces_ocr:
+            continue
+        exact_cols = [
+            j for j, (line, nospaces_line) in enumerate(zip(cleaned_lines, nospaces_lines))
+            if e.normalized in line or e.nospaces in nospaces_line
+        ]
+        if exact_cols:
+            weights[i, exact_cols] = EXACT_MATCH_WEIGHT
+        elif in_text:
+            # Substring spans text removed by line cleaning; no single line to claim
+            labels[i] = ("Substring", "")
+
+    for i, j in solve_assignment(weights):
+        weight = weights[i, j]
+        if weight >= EXACT_MATCH_WEIGHT:
+            labels[i] = ("Exact Line", f" (Line: '{cleaned_lines[j]}')")
+        elif weight >= FUZZY_MATCH_WEIGHT:
+            labels[i] = ("Fuzzy Token", f" (Found: '{cleaned_lines[j]}', Score: {scores[i, j]:.0f})")
+        else:
+            labels[i] = ("Unique First Name", f" (Found: '{cleaned_lines[j]}', Score: {weight:.0f})")
 
-        for i, row in enumerate(all_records[1:]):
-            member_name = row[member_name_col_index]
-            row_num = i + 2
+    present_members = []
+    for i in sorted(labels):
+        member = entries[i].name
+        present_members.append(member)
+        strategy, detail = labels[i]
+        print(f"Matched ({strategy}): {member}{detail}")
+        metrics.inc("attendance_match_total", strategy=strategy.lower().replace(" ", "_"))
+    return present_members
 
-            is_present_from_screenshot = member_name in present_members
-            current_val = str(row[col_index - 1]).strip().upper()
-            is_already_present = current_val in ["TRUE", "1", "YES"]
+def update_sheet_attendance(client, present_members, target_date=None, session=None):
+    """
+    Updates the Google Sheet with attendance. Returns True on success, False on failure.
+    Pass an open SheetSession to reuse its grid instead of reading the sheet again.
+    """
+    if not client and not session:
+        return False
 
-            # Preserve existing TRUE values (manual edits); only OCR can add TRUE, never remove it
-            status_val = True if is_already_present else is_present_from_screenshot
-            cells_to_update.append(gspread.Cell(row_num, col_index, status_val))
+    try:
+        if session is None:
+            session = SheetSession(client)
 
-        if cells_to_update:
-            sheet.update_cells(cells_to_update)
-            print(f"Attendance for {date_str} updated successfully ({len(cells_to_update)} cells).")
+        queued = session.mark_attendance(present_members, target_date)
+        if queued is None:
+            return False
 
-        recalculate_missed_streaks(client)
+        session.recalculate_streaks()
+        written = session.commit()
+        print(f"Attendance updated successfully ({written} cells in one batch).")
         return True
 
     except Exception as e:
         print(f"Error updating sheet: {e}")
         return False
 
-def recalculate_missed_streaks(client):
+def recalculate_missed_streaks(client, session=None):
     """
     Count consecutive missed meetings going backwards from the latest marked event.
     - Empty cells = skip (no meeting data)
     - FALSE = missed (increment counter)
     - TRUE = attended (stop counting)
+
+    Only rows whose date cells changed since the last run are recounted, and
+    all changed counters are sent in a single batched write.
     """
-    if not client:
+    if not client and not session:
         return
 
     try:
-        sheet = client.open(config.SHEET_NAME).sheet1
-        all_records = sheet.get_all_values()
-        headers = all_records[0]
-        
-        # Find the missed column
-        missed_col_name = "# of Meetings Missed in a Row"
-        missed_col_index = -1
-        for idx, h in enumerate(headers):
-            if missed_col_name in h:
-                missed_col_index = idx + 1
-                break
-        
-        if missed_col_index == -1:
-            print(f"Warning: Column '{missed_col_name}' not found.")
-            return
-        
-        print(f"Updating '{missed_col_name}' column...")
-        
-        # Find all date columns and filter out future dates
-        date_indices = []
-        today = datetime.date.today()
-        for idx, header in enumerate(headers):
-            try:
-                dt = datetime.datetime.strptime(header, "%d/%m/%Y")
-                if dt.date() <= today:  # Only include past/current dates
-                    date_indices.append((idx, dt))
-            except ValueError:
-                continue
-        
-        # Sort by date descending (latest first)
-        date_indices.sort(key=lambda x: x[1], reverse=True)
-        
-        # Process each member
-        for i, row in enumerate(all_records[1:]):
-            row_num = i + 2
-            consecutive_misses = 0
-            
-            # Count backwards from latest date
-            for col_idx, _ in date_indices:
-                val = str(row[col_idx]).strip().upper()
-                
-                if val == "":
-                    # Empty = no data, skip
-                    continue
-                elif val == "FALSE":
-                    # Missed this meeting
-                    consecutive_misses += 1
-                elif val in ["TRUE", "1", "YES"]:
-                    # Attended - stop counting
-                    break
-            
-            # Update if changed (no cap - show actual count)
-            current_val = str(row[missed_col_index - 1]).strip()
-            if current_val != str(consecutive_misses):
-                sheet.update_cell(row_num, missed_col_index, consecutive_misses)
-                print(f"Updated '{row[0]}': {consecutive_misses} consecutive misses")
+        if session is None:
+            session = SheetSession(client)
+        if session.recalculate_streaks():
+            session.commit()
 
     except Exception as e:
         print(f"Error recalculating streaks: {e}")
 
-def process_single_image(image_path, target_date=None):
-    """Main processing logic callable from other scripts."""
+def merge_ocr_texts(texts):
+    """
+    Merges the OCR text of several (overlapping) screenshots of the same list.
+    Lines that normalize to the same cleaned text are kept once, in first-seen
+    order. Line confidences (see OcrText) are carried over, keeping the highest
+    one seen for a repeated line.
+    """
+    positions = {}
+    merged = []
+    confidences = []
+    for text in texts:
+        line_confidences = getattr(text, "confidences", None) or []
+        for i, line in enumerate((text or "").split('\n')):
+            key = normalize_text(clean_line(line))
+            if not key:
+                continue
+            conf = line_confidences[i] if i < len(line_confidences) else None
+            if key in positions:
+                j = positions[key]
+                if conf is not None and (confidences[j] is None or conf > confidences[j]):
+                    confidences[j] = conf
+                continue
+            positions[key] = len(merged)
+            merged.append(line.strip())
+            confidences.append(conf)
+    if all(conf is None for conf in confidences):
+        return "\n".join(merged)
+    return OcrText("\n".join(merged), confidences)
+
+def process_single_image(image_path, target_date=None, text=None):
+    """
+    Main processing logic callable from other scripts.
+    Pass `text` when the image was already OCR'd (e.g. by extract_texts_parallel).
+    """
+    return process_image_group([image_path], target_date, texts=None if text is None else [text])
+
+def process_image_group(image_paths, target_date=None, texts=None):
+    """
+    Processes several screenshots of the same meeting as one: their OCR lines
+    are de-duplicated and matched once, followed by one sheet write and one
+    streak pass. Images may be paths or in-memory bytes (see
+    extract_text_from_image). Pass `texts` (one per image) when already OCR'd.
+    """
+    with metrics.span("process_image_group", images=len(image_paths)):
+        return _process_image_group(image_paths, target_date, texts)
+
+def _process_image_group(image_paths, target_date, texts):
     print("Initializing...")
     client = get_google_sheet_client()
-    
+
+    # One read of the sheet serves the roster, the attendance write and the streaks
+    session = None
+    if client:
+        try:
+            session = SheetSession(client)
+        except Exception as e:
+            print(f"Warning: Could not open sheet ({e}). Using local cache.")
+
     # Get members
-    members = get_members(client.open(config.SHEET_NAME) if client else None)
+    members = session.members() if session else get_members()
     
     if not members:
         print("No members found.")
         return False
 
     print(f"Found {len(members)} members.")
-    print("Processing image...")
-    text = extract_text_from_image(image_path)
+    if texts is None:
+        print("Processing image..." if len(image_paths) == 1 else f"Processing {len(image_paths)} images...")
+        texts = [extract_text_from_image(path) for path in image_paths]
+    text = texts[0] if len(texts) == 1 else merge_ocr_texts(texts)
     
     print("Matching names...")
-    present_members = match_attendance(text, members)
+    present_members = match_attendance(text, get_member_index(members))
     
     print(f"Identified {len(present_members)} attendees: {present_members}")
     
-    if client:
+    if session:
         print("Updating Google Sheet...")
-        return update_sheet_attendance(client, present_members, target_date)
+        return update_sheet_attendance(client, present_members, target_date, session=session)
+    elif client:
+        print("Skipping Sheet update (Sheet unavailable).")
+        return False
     else:
         print("Skipping Sheet update (No credentials).")
         return False
@@ -407,6 +759,8 @@ def main():
             print("Warning: Could not detect date from filename. Using today's date.")
 
     process_single_image(image_path, target_date=target_date)
+    api_client.dump_stats()
+    metrics.flush()
 
 if __name__ == "__main__":
     main()
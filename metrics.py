@@ -0,0 +1,196 @@
+"""
+Per-stage timing for the processing pipeline.
+
+    with metrics.span("download", file=name) as s:
+        data = ...
+        s.set(bytes=len(data))
+    metrics.inc("attendance_match_total", strategy="fuzzy_token")
+
+Each finished span is written as one JSON line to config.METRICS_LOG_FILE and
+observed in the `attendance_stage_seconds{stage=...}` histogram. Counters and
+histograms are exported in Prometheus text format to config.METRICS_TEXTFILE
+(e.g. for node_exporter's textfile collector) every METRICS_FLUSH_SECONDS and
+on flush(). With config.METRICS_ENABLED off, span() returns a shared no-op
+object and inc()/observe() return immediately.
+
+Aggregates are per process: spans recorded inside OCR worker processes reach
+the JSON log but not the textfile; the parent records their round trip. Only
+the process that imported this module writes the textfile: forked workers
+inherit a stale copy of its counters.
+"""
+import os
+import json
+import time
+import threading
+import config
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+STAGE_HISTOGRAM = "attendance_stage_seconds"
+STAGE_COUNTER = "attendance_stage_total"
+
+HELP = {
+    STAGE_HISTOGRAM: "Time spent in each processing stage.",
+    STAGE_COUNTER: "Completed processing stages by outcome.",
+    "attendance_image_seconds": "Time from discovering a screenshot to finishing it.",
+    "attendance_download_bytes_total": "Bytes downloaded from Drive.",
+    "attendance_match_total": "Members matched, by matching strategy.",
+    "attendance_ocr_cache_total": "OCR cache lookups by result.",
+    "attendance_sheet_cells_written_total": "Cells sent to the sheet.",
+    "attendance_images_total": "Screenshots finished, by outcome.",
+}
+
+_lock = threading.Lock()
+_counters = {}    # (name, labels) -> value
+_histograms = {}  # (name, labels) -> [bucket counts..., sum, count]
+_log_file = None
+_last_flush = 0.0
+_pid = os.getpid()  # forked workers must not overwrite the parent's textfile
+
+
+def enabled():
+    return config.METRICS_ENABLED
+
+
+class _NoopSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+class Span:
+    __slots__ = ("name", "attrs", "start")
+
+    def __init__(self, name, attrs):
+        self.name = name
+        self.attrs = attrs
+        self.start = None
+
+    def set(self, **attrs):
+        """Adds attributes (sizes, counts...) to the span's log line."""
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        seconds = time.perf_counter() - self.start
+        status = "ok" if exc_type is None else "error"
+        observe(STAGE_HISTOGRAM, seconds, stage=self.name)
+        inc(STAGE_COUNTER, stage=self.name, status=status)
+        record = {"ts": round(time.time(), 3), "span": self.name, "ms": round(seconds * 1000, 2),
+                  "status": status, "pid": os.getpid(), **self.attrs}
+        if exc_type is not None:
+            record["error"] = f"{exc_type.__name__}: {exc}"
+        _emit(record)
+        return False
+
+
+def span(name, **attrs):
+    """Times a stage; use as a context manager. No-op when metrics are disabled."""
+    if not config.METRICS_ENABLED:
+        return _NOOP
+    return Span(name, attrs)
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def inc(name, value=1, **labels):
+    """Adds `value` to a counter."""
+    if not config.METRICS_ENABLED:
+        return
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def observe(name, value, **labels):
+    """Records `value` (seconds) in a latency histogram."""
+    if not config.METRICS_ENABLED:
+        return
+    key = _key(name, labels)
+    with _lock:
+        hist = _histograms.get(key)
+        if hist is None:
+            hist = _histograms[key] = [0] * (len(LATENCY_BUCKETS) + 2)
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if value <= bound:
+                hist[i] += 1
+        hist[-2] += value
+        hist[-1] += 1
+
+
+def _emit(record):
+    global _log_file
+    line = json.dumps(record, ensure_ascii=False, default=str) + "\n"
+    with _lock:
+        if config.METRICS_LOG_FILE:
+            if _log_file is None:
+                _log_file = open(config.METRICS_LOG_FILE, "a", buffering=1)
+            _log_file.write(line)
+        due = time.monotonic() - _last_flush >= config.METRICS_FLUSH_SECONDS
+    if due:
+        flush()
+
+
+def _labels_text(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{str(v)}"' for k, v in pairs) + "}"
+
+
+def render():
+    """All counters and histograms in Prometheus text exposition format."""
+    with _lock:
+        counters = sorted(_counters.items())
+        histograms = sorted((k, list(v)) for k, v in _histograms.items())
+    lines = []
+    seen = set()
+    for (name, labels), value in counters:
+        if name not in seen:
+            seen.add(name)
+            lines.append(f"# HELP {name} {HELP.get(name, name)}")
+            lines.append(f"# TYPE {name} counter")
+        lines.append(f"{name}{_labels_text(labels)} {value}")
+    for (name, labels), hist in histograms:
+        if name not in seen:
+            seen.add(name)
+            lines.append(f"# HELP {name} {HELP.get(name, name)}")
+            lines.append(f"# TYPE {name} histogram")
+        for bound, count in zip(LATENCY_BUCKETS, hist):
+            lines.append(f"{name}_bucket{_labels_text(labels, [('le', bound)])} {count}")
+        lines.append(f"{name}_bucket{_labels_text(labels, [('le', '+Inf')])} {hist[-1]}")
+        lines.append(f"{name}_sum{_labels_text(labels)} {round(hist[-2], 6)}")
+        lines.append(f"{name}_count{_labels_text(labels)} {hist[-1]}")
+    return "\n".join(lines) + "\n"
+
+
+def flush():
+    """Writes the textfile now (atomically, so a scraper never sees half a file)."""
+    global _last_flush
+    if not config.METRICS_ENABLED or os.getpid() != _pid:
+        return
+    _last_flush = time.monotonic()
+    if not config.METRICS_TEXTFILE:
+        return
+    tmp_path = config.METRICS_TEXTFILE + ".tmp"
+    with open(tmp_path, "w") as f:
+        f.write(render())
+    os.replace(tmp_path, config.METRICS_TEXTFILE)
+
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
@@ -0,0 +1,125 @@
+import threading
+import config
+
+
+def lines_from_tesseract_data(data):
+    """
+    Groups Tesseract's word-level output (image_to_data as a dict) into text
+    lines. Returns [(text, confidence, (left, top, right, bottom))] in reading
+    order; a line's confidence is the mean of its words' confidences (0-100).
+    """
+    lines = {}
+    for i, word in enumerate(data["text"]):
+        conf = float(data["conf"][i])
+        if conf < 0 or not str(word).strip():
+            continue
+        key = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+        left, top = data["left"][i], data["top"][i]
+        box = (left, top, left + data["width"][i], top + data["height"][i])
+        if key not in lines:
+            lines[key] = ([], [], list(box))
+        words, confs, line_box = lines[key]
+        words.append(str(word).strip())
+        confs.append(conf)
+        line_box[:] = [min(line_box[0], box[0]), min(line_box[1], box[1]),
+                       max(line_box[2], box[2]), max(line_box[3], box[3])]
+    return [(" ".join(words), sum(confs) / len(confs), tuple(box)) for words, confs, box in lines.values()]
+
+
+class PytesseractBackend:
+    """Runs the tesseract binary once per image through pytesseract."""
+    name = "pytesseract"
+
+    def __init__(self, tesseract_cmd=None, lang=None):
+        import pytesseract
+        self._pytesseract = pytesseract
+        if tesseract_cmd:
+            pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+        self.tesseract_cmd = pytesseract.pytesseract.tesseract_cmd
+        self.lang = lang
+
+    def image_to_string(self, image):
+        return self._pytesseract.image_to_string(image, lang=self.lang)
+
+    def image_to_lines(self, image, single_line=False):
+        """[(text, confidence, box)] per text line; see lines_from_tesseract_data."""
+        data = self._pytesseract.image_to_data(
+            image, lang=self.lang, config="--psm 7" if single_line else "",
+            output_type=self._pytesseract.Output.DICT,
+        )
+        return lines_from_tesseract_data(data)
+
+    def settings(self):
+        return {"engine": self.name, "cmd": self.tesseract_cmd, "lang": self.lang}
+
+
+class TesserocrBackend:
+    """Keeps one in-process Tesseract engine (C API) loaded and reuses it for every image."""
+    name = "tesserocr"
+
+    def __init__(self, tessdata_path=None, lang=None):
+        import tesserocr
+        kwargs = {"lang": lang or "eng"}
+        if tessdata_path:
+            kwargs["path"] = tessdata_path
+        self._api = tesserocr.PyTessBaseAPI(**kwargs)
+        self._lock = threading.Lock()
+        self.lang = kwargs["lang"]
+        self.version = tesserocr.tesseract_version().splitlines()[0]
+
+    def image_to_string(self, image):
+        with self._lock:
+            self._api.SetImage(image)
+            return self._api.GetUTF8Text()
+
+    def image_to_lines(self, image, single_line=False):
+        """[(text, confidence, box)] per text line, read with the result iterator."""
+        import tesserocr
+        level = tesserocr.RIL.TEXTLINE
+        lines = []
+        with self._lock:
+            if single_line:
+                self._api.SetPageSegMode(tesserocr.PSM.SINGLE_LINE)
+            try:
+                self._api.SetImage(image)
+                self._api.Recognize()
+                for item in tesserocr.iterate_level(self._api.GetIterator(), level):
+                    text = (item.GetUTF8Text(level) or "").strip()
+                    box = item.BoundingBox(level)
+                    if text and box:
+                        lines.append((text, item.Confidence(level), tuple(box)))
+            finally:
+                if single_line:
+                    self._api.SetPageSegMode(tesserocr.PSM.AUTO)
+        return lines
+
+    def settings(self):
+        return {"engine": self.name, "version": self.version, "lang": self.lang}
+
+    def close(self):
+        self._api.End()
+
+
+_backend = None
+
+def get_ocr_backend():
+    """
+    Returns this process's OCR backend, created on first use.
+    config.OCR_BACKEND: "tesserocr", "pytesseract", or "auto" (tesserocr when
+    installed, otherwise pytesseract).
+    """
+    global _backend
+    if _backend is not None:
+        return _backend
+
+    choice = config.OCR_BACKEND
+    if choice in ("auto", "tesserocr"):
+        try:
+            _backend = TesserocrBackend(config.TESSDATA_PATH, config.OCR_LANG)
+            return _backend
+        except (ImportError, RuntimeError) as e:
+            if choice == "tesserocr":
+                print(f"Warning: tesserocr backend unavailable ({e}). Falling back to pytesseract.")
+
+    _backend = PytesseractBackend(config.TESSERACT_CMD, config.OCR_LANG)
+    return _backend
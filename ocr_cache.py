@@ -0,0 +1,90 @@
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+
+class OcrCache:
+    """
+    On-disk OCR result cache keyed by image content hash plus OCR settings.
+
+    Entries expire after `max_age_days` and the least recently used entries
+    are dropped once the cache holds more than `max_entries`. Safe to use
+    from several threads.
+    """
+
+    def __init__(self, path, max_entries=2000, max_age_days=90):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age_seconds = max_age_days * 86400
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS ocr_results ("
+            " key TEXT PRIMARY KEY,"
+            " text TEXT NOT NULL,"
+            " confidences TEXT,"
+            " created_at REAL NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        self._conn.commit()
+        self.evict()
+
+    @staticmethod
+    def make_key(image_bytes, settings):
+        """Cache key: sha256 of the image bytes + hash of the OCR settings dict."""
+        content_hash = hashlib.sha256(image_bytes).hexdigest()
+        settings_hash = hashlib.sha1(
+            json.dumps(settings, sort_keys=True).encode("utf-8")
+        ).hexdigest()[:16]
+        return f"{content_hash}:{settings_hash}"
+
+    def get(self, key):
+        """Returns {"text", "confidences"} for a cached result, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT text, confidences, created_at FROM ocr_results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            text, confidences, created_at = row
+            now = time.time()
+            if now - created_at > self.max_age_seconds:
+                self._conn.execute("DELETE FROM ocr_results WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE ocr_results SET last_used = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+        return {"text": text, "confidences": json.loads(confidences) if confidences else None}
+
+    def put(self, key, text, confidences=None):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO ocr_results (key, text, confidences, created_at, last_used)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (key, text, json.dumps(confidences) if confidences is not None else None, now, now),
+            )
+            self._conn.commit()
+        self.evict()
+
+    def evict(self):
+        """Drops expired entries, then the least recently used beyond max_entries."""
+        cutoff = time.time() - self.max_age_seconds
+        with self._lock:
+            self._conn.execute("DELETE FROM ocr_results WHERE created_at < ?", (cutoff,))
+            self._conn.execute(
+                "DELETE FROM ocr_results WHERE key NOT IN ("
+                " SELECT key FROM ocr_results ORDER BY last_used DESC LIMIT ?)",
+                (self.max_entries,),
+            )
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM ocr_results").fetchone()[0]
+
+    def close(self):
+        self._conn.close()
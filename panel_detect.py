@@ -0,0 +1,106 @@
+"""
+Finds the participant-list panel in a meeting screenshot so only that part is OCR'd.
+
+The frame is split into vertical bands at panel borders on a downscaled
+grayscale copy; bands that are mostly flat background with several text-line
+runs in their row projection profile are returned as crop boxes.
+"""
+import numpy as np
+from PIL import Image
+
+DETECT_WIDTH = 480          # Width of the downscaled analysis copy
+EDGE_DIFF = 25              # Gray-level step that counts as an edge pixel
+CUT_EDGE_FRACTION = 0.5     # Column is a border if this fraction of rows has an edge
+CUT_BG_JUMP = 20            # ...or if the column background level jumps by this much
+MIN_BAND_FRACTION = 0.10    # Narrowest band considered, relative to frame width
+MAX_BAND_FRACTION = 0.85    # Wider bands mean "whole frame is the list": use full frame
+BG_TOLERANCE = 12           # Gray-level distance still counted as background
+MIN_BG_FRACTION = 0.6       # Panel must be mostly flat background
+INK_DIFF = 40               # Gray-level distance that counts as text ink
+MIN_TEXT_LINES = 3          # Fewer text runs than this is not a participant list
+MARGIN = 6                  # Padding (downscaled px) around the returned box
+
+
+def _cut_columns(a):
+    width = a.shape[1]
+    edge = (np.abs(np.diff(a, axis=1)) > EDGE_DIFF).mean(axis=0)
+    # Column medians follow the background, not the text drawn on it
+    jump = np.abs(np.diff(np.median(a, axis=0))) > CUT_BG_JUMP
+    cuts = [0]
+    min_gap = max(2, int(width * 0.02))
+    for x in np.flatnonzero((edge >= CUT_EDGE_FRACTION) | jump) + 1:
+        if x - cuts[-1] >= min_gap:
+            cuts.append(int(x))
+    if width - cuts[-1] < min_gap:
+        cuts.pop()
+    cuts.append(width)
+    return cuts
+
+
+def _text_runs(text_rows, max_height):
+    """Returns [(start, end)] runs of text rows with plausible line heights."""
+    runs = []
+    start = None
+    for y, is_text in enumerate(np.append(text_rows, False)):
+        if is_text and start is None:
+            start = y
+        elif not is_text and start is not None:
+            if 1 <= y - start <= max_height:
+                runs.append((start, y))
+            start = None
+    return runs
+
+
+def _score_band(region):
+    """Returns (score, first_row, last_row) for a band; score 0 means not a panel."""
+    values = region.astype(np.int32)
+    bg = np.bincount(values.ravel(), minlength=256).argmax()
+    distance = np.abs(values - bg)
+    bg_fraction = (distance < BG_TOLERANCE).mean()
+    if bg_fraction < MIN_BG_FRACTION:
+        return 0.0, 0, 0
+
+    ink_per_row = (distance >= INK_DIFF).mean(axis=1)
+    runs = _text_runs(ink_per_row > 0.02, max_height=max(2, int(region.shape[0] * 0.08)))
+    if len(runs) < MIN_TEXT_LINES:
+        return 0.0, 0, 0
+    return len(runs) * bg_fraction, runs[0][0], runs[-1][1]
+
+
+def find_panel_regions(image, max_regions=1):
+    """
+    Returns up to `max_regions` (left, top, right, bottom) boxes in full-res
+    pixel coordinates, best first, or [] to signal full-frame OCR.
+    """
+    gray = image.convert("L")
+    scale = DETECT_WIDTH / gray.width
+    if scale < 1:
+        gray = gray.resize((DETECT_WIDTH, max(1, round(gray.height * scale))), Image.BOX)
+    else:
+        scale = 1.0
+    a = np.asarray(gray, dtype=np.float32)
+    height, width = a.shape
+
+    scored = []
+    cuts = _cut_columns(a)
+    for x0, x1 in zip(cuts, cuts[1:]):
+        band_fraction = (x1 - x0) / width
+        if band_fraction < MIN_BAND_FRACTION:
+            continue
+        score, y0, y1 = _score_band(a[:, x0:x1])
+        if score <= 0:
+            continue
+        if band_fraction > MAX_BAND_FRACTION:
+            return []
+        scored.append((score, x0, y0, x1, y1))
+
+    scored.sort(reverse=True)
+    boxes = []
+    for _, x0, y0, x1, y1 in scored[:max_regions]:
+        boxes.append((
+            int(max(0, x0 - MARGIN) / scale),
+            int(max(0, y0 - MARGIN) / scale),
+            int(min(width, x1 + MARGIN) / scale),
+            int(min(height, y1 + MARGIN) / scale),
+        ))
+    return boxes
@@ -0,0 +1,403 @@
+import os
+import time
+import queue
+import signal
+import asyncio
+import datetime
+import config
+import api_client
+import metrics
+import main as attendance_script
+import drive_monitor as monitor
+from local_watcher import LocalFolderWatcher
+from scheduler import AdaptivePollScheduler
+from sheet_session import SheetSession
+from ledger import ProcessingLedger
+
+
+class WorkItem:
+    """One screenshot moving through the pipeline."""
+    __slots__ = ("key", "name", "source", "file_meta", "path", "data", "content_hash",
+                 "meeting_date", "text", "present", "member_index", "written", "discovered")
+
+    def __init__(self, key, name, source, file_meta=None, path=None):
+        self.key = key
+        self.name = name
+        self.source = source  # "drive" or "local"
+        self.file_meta = file_meta
+        self.path = path
+        self.data = None
+        self.content_hash = file_meta.get('md5Checksum') if file_meta else None
+        self.meeting_date = None
+        self.text = None
+        self.present = None
+        self.member_index = None
+        self.written = False  # Attendance already in the sheet; only the move is left
+        self.discovered = time.perf_counter()
+
+    @property
+    def ledger_key(self):
+        if self.source == "drive":
+            return ProcessingLedger.drive_key(self.key)
+        return ProcessingLedger.local_key(self.key)
+
+
+# Writer-queue marker asking for a streak re-sync (handles manual sheet edits)
+SYNC_STREAKS = object()
+
+
+class MonitorPipeline:
+    """
+    The Drive monitor as an asyncio pipeline with bounded queues between stages:
+
+        Drive lister ─> downloaders ─┐
+        local watcher ───────────────┴─> OCR (process pool) ─> matcher ─> sheet writer
+
+    Blocking Drive/Sheets calls run in threads and OCR in a process pool, so a
+    slow sheet write no longer stalls listing, downloads or the local folder.
+    Full queues apply backpressure to the stages feeding them. On SIGINT/SIGTERM
+    the producers stop and every item already in flight is drained through the
+    remaining stages before exit.
+    """
+
+    def __init__(self, service, sheet_client):
+        self.service = service
+        self.sheet_client = sheet_client
+        size = config.PIPELINE_QUEUE_SIZE
+        self.download_q = asyncio.Queue(size)
+        self.ocr_q = asyncio.Queue(size)
+        self.match_q = asyncio.Queue(size)
+        self.write_q = asyncio.Queue(size)
+        self.stopping = asyncio.Event()
+        self.in_flight = set()
+        self.drive_state = monitor.load_drive_state()
+        self.drive_state_lock = asyncio.Lock()
+        self.ledger = ProcessingLedger(config.LEDGER_FILE, config.LEDGER_MAX_AGE_DAYS) if config.LEDGER_FILE else None
+        self.scheduler = AdaptivePollScheduler.from_config()
+        self.watcher = LocalFolderWatcher(
+            monitor.LOCAL_SCREENSHOTS_DIR, monitor.IMAGE_EXTENSIONS,
+            settle_seconds=config.LOCAL_SETTLE_SECONDS,
+            poll_interval=config.LOCAL_POLL_SECONDS,
+        )
+        self.ocr_workers = config.OCR_WORKERS or os.cpu_count() or 1
+        self.ocr_pool = attendance_script.make_ocr_pool(self.ocr_workers)
+        cached_members = attendance_script.get_members()
+        self.member_index = attendance_script.get_member_index(cached_members) if cached_members else None
+
+    def stop(self):
+        if not self.stopping.is_set():
+            print("Stopping: draining in-flight items...", flush=True)
+            self.stopping.set()
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, self.stop)
+            except NotImplementedError:
+                pass
+        if hasattr(signal, "SIGUSR1"):
+            # `kill -USR1 <pid>` prints API call counts and latencies
+            loop.add_signal_handler(signal.SIGUSR1, api_client.dump_stats)
+
+        self.watcher.start()
+        print(f"[Local] Watching {monitor.LOCAL_SCREENSHOTS_DIR} ({self.watcher.mode}).", flush=True)
+
+        producers = [
+            asyncio.create_task(self.drive_lister()),
+            asyncio.create_task(self.local_feeder()),
+            asyncio.create_task(self.streak_syncer()),
+        ]
+        downloaders = [asyncio.create_task(self.downloader()) for _ in range(config.DRIVE_DOWNLOAD_WORKERS)]
+        ocr_tasks = [asyncio.create_task(self.ocr_worker()) for _ in range(self.ocr_workers)]
+        matcher = asyncio.create_task(self.matcher())
+        writer = asyncio.create_task(self.writer())
+
+        try:
+            await self.stopping.wait()
+            await asyncio.gather(*producers)
+            # Sentinels queue up behind in-flight items, so each stage drains before it exits
+            await self._close_stage(self.download_q, downloaders)
+            await self._close_stage(self.ocr_q, ocr_tasks)
+            await self._close_stage(self.match_q, [matcher])
+            await self._close_stage(self.write_q, [writer])
+        finally:
+            self.watcher.stop()
+            if self.ocr_pool:
+                self.ocr_pool.shutdown()
+            if self.ledger is not None:
+                self.ledger.close()
+        api_client.dump_stats()
+        metrics.flush()
+        print("Stopped.", flush=True)
+
+    async def _close_stage(self, stage_queue, tasks):
+        for _ in tasks:
+            await stage_queue.put(None)
+        await asyncio.gather(*tasks)
+
+    async def _sleep(self, seconds):
+        """Sleeps up to `seconds`; returns early when stopping."""
+        try:
+            await asyncio.wait_for(self.stopping.wait(), timeout=seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    def _record(self, item, stage, **fields):
+        if self.ledger is not None:
+            self.ledger.record(item.ledger_key, stage, **fields)
+
+    async def _enqueue(self, item, fresh_queue):
+        """
+        Sends a new item to `fresh_queue`, or, when the ledger shows an earlier
+        run got further, to the stage after the last one it completed.
+        """
+        entry = None
+        if self.ledger is not None:
+            entry = await asyncio.to_thread(self.ledger.lookup, item.ledger_key, item.content_hash)
+        if entry and item.file_meta is not None and not item.file_meta.get('parents') and entry["parents"]:
+            # Saves finish_drive_file a files.get when the listing left parents out
+            item.file_meta['parents'] = entry["parents"]
+        if entry and entry["stage"] in ("ocr", "written") and entry["meeting_date"]:
+            item.meeting_date = datetime.date.fromisoformat(entry["meeting_date"])
+            item.text = entry["text"]
+            if entry["confidences"] is not None:
+                item.text = attendance_script.OcrText(entry["text"], entry["confidences"])
+            if entry["stage"] == "written":
+                print(f"Resuming {item.name}: attendance already written, moving it.", flush=True)
+                item.written = True
+                await self.write_q.put(item)
+            else:
+                print(f"Resuming {item.name} from its saved OCR text.", flush=True)
+                await self.match_q.put(item)
+            return
+        await fresh_queue.put(item)
+
+    # --- Producers ---
+
+    async def drive_lister(self):
+        if config.DRIVE_FOLDER_ID == "REPLACE_WITH_SOURCE_FOLDER_ID":
+            print("Error: Please set DRIVE_FOLDER_ID in config.py")
+            return
+        while not self.stopping.is_set():
+            found = retried = 0
+            try:
+                async with self.drive_state_lock:
+                    known = {f['id'] for f in self.drive_state.get('retry', [])}
+                    files = await asyncio.to_thread(
+                        monitor.find_pending_drive_files, self.service, self.drive_state
+                    )
+                for file_meta in files:
+                    if file_meta['id'] in self.in_flight:
+                        continue
+                    self.in_flight.add(file_meta['id'])
+                    if file_meta['id'] in known:
+                        retried += 1
+                    else:
+                        found += 1
+                    await self._enqueue(WorkItem(file_meta['id'], file_meta['name'], "drive", file_meta=file_meta), self.download_q)
+                print(f"Found {found} new files." if found else "No new files found.", flush=True)
+                if retried:
+                    print(f"Retrying {retried} file(s).", flush=True)
+            except Exception as e:
+                print(f"Error listing Drive files: {e}", flush=True)
+
+            # Only new uploads keep the fast schedule; retries back off on their own
+            self.scheduler.record_poll(found > 0)
+            interval = self.scheduler.next_interval()
+            print(f"Next Drive poll in {interval:.0f}s.", flush=True)
+            await self._sleep(interval)
+
+    async def local_feeder(self):
+        next_scan = 0
+        while not self.stopping.is_set():
+            paths = []
+            try:
+                paths.append(await asyncio.to_thread(self.watcher.queue.get, True, 1.0))
+            except queue.Empty:
+                pass
+            if time.monotonic() >= next_scan:
+                # Retries files left behind by a failed attempt
+                paths.extend(await asyncio.to_thread(monitor.list_local_screenshots))
+                next_scan = time.monotonic() + config.POLL_IDLE_MIN_SECONDS
+
+            new_items = 0
+            for path in paths:
+                if path in self.in_flight or not os.path.isfile(path):
+                    continue
+                self.in_flight.add(path)
+                item = WorkItem(path, os.path.basename(path), "local", path=path)
+                item.meeting_date = monitor.resolve_local_meeting_date(item.name)
+                try:
+                    item.content_hash = await asyncio.to_thread(ProcessingLedger.hash_file, path)
+                except OSError:
+                    self.in_flight.discard(path)
+                    continue
+                await self._enqueue(item, self.ocr_q)
+                new_items += 1
+            if new_items:
+                print(f"[Local] {new_items} new file(s) queued.", flush=True)
+                self.scheduler.record_poll(True)
+
+    async def streak_syncer(self):
+        while not self.stopping.is_set():
+            await self.write_q.put(SYNC_STREAKS)
+            await self._sleep(config.SHEET_SYNC_SECONDS)
+
+    # --- Stages ---
+
+    async def downloader(self):
+        while (item := await self.download_q.get()) is not None:
+            try:
+                item.data = await asyncio.to_thread(self._download, item.file_meta)
+                print(f"Downloaded {item.name} ({len(item.data)} bytes).", flush=True)
+                item.meeting_date = monitor.resolve_drive_meeting_date(item.file_meta)
+                await asyncio.to_thread(
+                    self._record, item, "downloaded", name=item.name, content_hash=item.content_hash,
+                    meeting_date=item.meeting_date, parents=item.file_meta.get('parents'),
+                )
+            except Exception as e:
+                print(f"Error downloading {item.name}: {e}. Left in source folder for retry.", flush=True)
+                self.in_flight.discard(item.key)
+                async with self.drive_state_lock:
+                    monitor.mark_drive_files_failed(self.drive_state, {item.key})
+                continue
+            await self.ocr_q.put(item)
+
+    def _download(self, file_meta):
+        import google_clients
+        return monitor.download_drive_file(self.service, file_meta, http=google_clients.thread_drive_http())
+
+    async def ocr_worker(self):
+        loop = asyncio.get_running_loop()
+        while (item := await self.ocr_q.get()) is not None:
+            # memoryviews cannot be sent to a worker process; local files are read there
+            source = bytes(item.data) if item.data is not None else item.path
+            item.data = None
+            try:
+                # Round trip through the pool; the worker's own spans only reach the JSON log.
+                # raise_errors=True: an unreadable image is left for retry instead of matched as ""
+                with metrics.span("ocr_job", file=item.name):
+                    item.text = await loop.run_in_executor(
+                        self.ocr_pool, attendance_script.extract_text_from_image, source, True
+                    )
+            except Exception as e:
+                print(f"Error OCR'ing {item.name}: {e}", flush=True)
+            if item.text is not None:
+                await asyncio.to_thread(
+                    self._record, item, "ocr", name=item.name, content_hash=item.content_hash,
+                    meeting_date=item.meeting_date, text=item.text,
+                    confidences=getattr(item.text, "confidences", None),
+                )
+            await self.match_q.put(item)
+
+    async def matcher(self):
+        while (item := await self.match_q.get()) is not None:
+            if not item.written and item.text is not None and self.member_index is not None:
+                item.member_index = self.member_index
+                item.present = await asyncio.to_thread(
+                    attendance_script.match_attendance, item.text, item.member_index
+                )
+            await self.write_q.put(item)
+
+    async def writer(self):
+        """Writes everything waiting at once, so a burst of screenshots costs one write per date."""
+        closing = False
+        while not closing:
+            first = await self.write_q.get()
+            if first is None:
+                break
+            batch = [first]
+            while not self.write_q.empty():
+                nxt = self.write_q.get_nowait()
+                if nxt is None:
+                    closing = True
+                    break
+                batch.append(nxt)
+
+            results = await asyncio.to_thread(self._write_batch, batch)
+
+            done_drive_ids, failed_drive_ids = set(), set()
+            for item, success in results:
+                self.in_flight.discard(item.key)
+                metrics.observe("attendance_image_seconds", time.perf_counter() - item.discovered, source=item.source)
+                metrics.inc("attendance_images_total", source=item.source, outcome="done" if success else "retry")
+                if item.source == "drive":
+                    (done_drive_ids if success else failed_drive_ids).add(item.key)
+                elif success:
+                    self.watcher.mark_done(item.path)
+            if done_drive_ids or failed_drive_ids:
+                async with self.drive_state_lock:
+                    if done_drive_ids:
+                        monitor.mark_drive_files_done(self.drive_state, done_drive_ids)
+                    if failed_drive_ids:
+                        monitor.mark_drive_files_failed(self.drive_state, failed_drive_ids)
+
+    def _write_batch(self, batch):
+        """Runs in a worker thread: one sheet read + one batched write per meeting date."""
+        items = [i for i in batch if i is not SYNC_STREAKS]
+        results = []
+
+        if self.sheet_client is None:
+            self.sheet_client = attendance_script.get_google_sheet_client()
+
+        ready = []
+        for item in items:
+            if item.written:
+                results.append((item, self._finish(item, True)))
+            elif item.text is None:
+                print(f"OCR failed for {item.name}.", flush=True)
+                results.append((item, self._finish(item, False)))
+            else:
+                ready.append((item.meeting_date, item, item.key))
+
+        for meeting_date, group in monitor.group_by_meeting_date(ready):
+            group_items = [item for item, _ in group]
+            print(f"Writing {len(group_items)} file(s) for {meeting_date}: {[i.name for i in group_items]}", flush=True)
+            success = False
+            try:
+                session = SheetSession(self.sheet_client)
+                index = attendance_script.get_member_index(session.members())
+                self.member_index = index
+                present = self._match_group(group_items, index)
+                print(f"Identified {len(present)} attendees: {sorted(present)}", flush=True)
+                success = attendance_script.update_sheet_attendance(
+                    self.sheet_client, sorted(present), meeting_date, session=session
+                )
+            except Exception as e:
+                print(f"Error writing attendance for {meeting_date}: {e}", flush=True)
+            for item in group_items:
+                if success:
+                    self._record(item, "written")
+                results.append((item, self._finish(item, success)))
+
+        if any(i is SYNC_STREAKS for i in batch) and self.sheet_client:
+            attendance_script.recalculate_missed_streaks(self.sheet_client)
+        return results
+
+    def _match_group(self, group_items, index):
+        """
+        Attendees for one meeting date. Several screenshots are merged first
+        (overlapping lines kept once, with their best confidence) and matched
+        once, as in main.process_image_group; assignment mode then gives each
+        line to one member across all of them.
+        """
+        if len(group_items) == 1 and group_items[0].member_index is index:
+            return group_items[0].present  # matched by the matcher stage against this roster
+        texts = [item.text for item in group_items]
+        text = texts[0] if len(texts) == 1 else attendance_script.merge_ocr_texts(texts)
+        return attendance_script.match_attendance(text, index)
+
+    def _finish(self, item, success):
+        try:
+            if item.source == "drive":
+                monitor.finish_drive_file(self.service, item.file_meta, success)
+                moved = success
+            else:
+                moved = monitor.finish_local_file(item.path, success)
+        except Exception as e:
+            print(f"Error finishing {item.name}: {e}", flush=True)
+            return False
+        if moved:
+            self._record(item, "moved")
+        return moved
@@ -0,0 +1,85 @@
+import datetime
+import config
+
+
+class AdaptivePollScheduler:
+    """
+    Decides how long the monitor sleeps between Drive polls.
+
+    - Around the weekly meeting (and for a while after any new file) it polls
+      every `fast_seconds`.
+    - Otherwise each empty poll doubles the interval, from `idle_min_seconds`
+      up to `idle_max_seconds`, but never sleeps past the start of the next
+      meeting window.
+    """
+
+    def __init__(self, meeting_weekday, meeting_start, meeting_minutes,
+                 window_before_minutes, window_after_minutes,
+                 fast_seconds, idle_min_seconds, idle_max_seconds,
+                 activity_hold_minutes, backoff_factor=2.0):
+        self.meeting_weekday = meeting_weekday
+        self.meeting_start = datetime.datetime.strptime(meeting_start, "%H:%M").time()
+        self.meeting_minutes = meeting_minutes
+        self.window_before = datetime.timedelta(minutes=window_before_minutes)
+        self.window_after = datetime.timedelta(minutes=window_after_minutes)
+        self.fast_seconds = fast_seconds
+        self.idle_min_seconds = idle_min_seconds
+        self.idle_max_seconds = idle_max_seconds
+        self.activity_hold = datetime.timedelta(minutes=activity_hold_minutes)
+        self.backoff_factor = backoff_factor
+        self.last_activity = None
+        self.idle_polls = 0
+
+    @classmethod
+    def from_config(cls):
+        return cls(
+            meeting_weekday=config.MEETING_WEEKDAY,
+            meeting_start=config.MEETING_START,
+            meeting_minutes=config.MEETING_MINUTES,
+            window_before_minutes=config.POLL_WINDOW_BEFORE_MINUTES,
+            window_after_minutes=config.POLL_WINDOW_AFTER_MINUTES,
+            fast_seconds=config.POLL_FAST_SECONDS,
+            idle_min_seconds=config.POLL_IDLE_MIN_SECONDS,
+            idle_max_seconds=config.POLL_IDLE_MAX_SECONDS,
+            activity_hold_minutes=config.POLL_ACTIVITY_HOLD_MINUTES,
+        )
+
+    def _window_for(self, day):
+        start = datetime.datetime.combine(day, self.meeting_start)
+        end = start + datetime.timedelta(minutes=self.meeting_minutes)
+        return start - self.window_before, end + self.window_after
+
+    def _windows_around(self, now):
+        """Fast-poll windows of the previous, current and next meeting week."""
+        days_ahead = (self.meeting_weekday - now.weekday()) % 7
+        meeting_day = now.date() + datetime.timedelta(days=days_ahead)
+        return [self._window_for(meeting_day + datetime.timedelta(weeks=w)) for w in (-1, 0, 1)]
+
+    def in_meeting_window(self, now=None):
+        now = now or datetime.datetime.now()
+        return any(start <= now <= end for start, end in self._windows_around(now))
+
+    def seconds_until_next_window(self, now=None):
+        now = now or datetime.datetime.now()
+        return min((start - now).total_seconds() for start, _ in self._windows_around(now) if start > now)
+
+    def record_poll(self, found_work, now=None):
+        """Call after every poll; `found_work` resets the idle backoff."""
+        if found_work:
+            self.last_activity = now or datetime.datetime.now()
+            self.idle_polls = 0
+        else:
+            self.idle_polls += 1
+
+    def next_interval(self, now=None):
+        """Seconds to wait before the next Drive poll."""
+        now = now or datetime.datetime.now()
+        if self.in_meeting_window(now):
+            return self.fast_seconds
+        if self.last_activity and now - self.last_activity <= self.activity_hold:
+            return self.fast_seconds
+
+        backoff = self.idle_min_seconds * self.backoff_factor ** min(max(0, self.idle_polls - 1), 32)
+        interval = min(backoff, self.idle_max_seconds)
+        # Wake up in time for the next meeting window
+        return max(self.fast_seconds, min(interval, self.seconds_until_next_window(now)))
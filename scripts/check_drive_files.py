@@ -1,33 +1,5 @@
 import config
-import os
-from google.oauth2.credentials import Credentials
-from google.auth.transport.requests import Request
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
-
-def get_drive_service():
-    creds = None
-    if os.path.exists(config.TOKEN_FILE):
-        creds = Credentials.from_authorized_user_file(config.TOKEN_FILE, config.SCOPES)
-    
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
-            creds.refresh(Request())
-        else:
-            flow = InstalledAppFlow.from_client_config(
-                {"installed": {
-                    "client_id": config.CLIENT_ID, 
-                    "client_secret": config.CLIENT_SECRET,
-                    "auth_uri": "https://accounts.google.com/o/oauth2/auth",
-                    "token_uri": "https://oauth2.googleapis.com/token",
-                    "redirect_uris": ["http://localhost:8080/"]
-                }}, config.SCOPES)
-            creds = flow.run_local_server(port=8080)
-            
-        with open(config.TOKEN_FILE, 'w') as token:
-            token.write(creds.to_json())
-
-    return build('drive', 'v3', credentials=creds)
+from google_clients import get_drive_service
 
 def list_files():
     service = get_drive_service()
@@ -0,0 +1,139 @@
+"""
+Cold-start check for the command-line entry points.
+
+Each entry point is imported in a fresh interpreter under `python -X importtime`.
+The check fails (exit 1) if an entry point imports a heavy dependency it should
+load only when needed (PIL, numpy, thefuzz, the Google libraries), or if its
+imports take longer than the budget.
+
+    python scripts/check_import_time.py
+    python scripts/check_import_time.py --runs 5 --scale 2   # slower machine
+"""
+import os
+import sys
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Loaded only once an image is OCR'd or matched
+OCR_STACK = ["PIL", "numpy", "thefuzz", "rapidfuzz", "pytesseract", "tesserocr"]
+# Loaded only once a Google client is built
+GOOGLE_STACK = ["gspread", "googleapiclient", "google_auth_oauthlib", "httplib2", "requests", "google.auth"]
+
+# name: (statement, import budget in ms, packages it must not load)
+ENTRY_POINTS = {
+    # `python main.py ...` up to the point it starts working
+    "main": ("import main", 150, OCR_STACK + GOOGLE_STACK),
+    # `python main.py --recalculate` once it has the Sheets client (gspread
+    # itself imports google_auth_oauthlib, so only the Drive client is excluded)
+    "recalculate": ("import main, google_clients", 450, OCR_STACK + ["googleapiclient", "httplib2"]),
+    # `python drive_monitor.py` (launchd restart) up to starting the pipeline
+    "monitor": ("import drive_monitor, pipeline", 200, OCR_STACK + GOOGLE_STACK),
+    "backfill": ("import backfill", 200, OCR_STACK + GOOGLE_STACK),
+}
+
+
+def parse_importtime(stderr):
+    """[(module, depth, cumulative us)] from `-X importtime` output, in print order."""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not cumulative.strip().isdigit():
+            continue  # header
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        entries.append((name.strip(), depth, int(cumulative)))
+    return entries
+
+
+def _importtime(statement):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=ROOT, capture_output=True, text=True,
+        env={**os.environ, "PYTHONPATH": ROOT, "PYTHONDONTWRITEBYTECODE": "1"},
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"{statement!r} failed:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr)
+
+
+def import_cost(statement, startup=()):
+    """
+    (milliseconds, [(module, depth, us)]) for running `statement` in a fresh
+    interpreter; modules in `startup` (the interpreter's own, e.g. site) are
+    not counted.
+    """
+    entries = _importtime(statement)
+    total = sum(us for name, depth, us in entries if depth == 0 and name not in startup)
+    return total / 1000, entries
+
+
+def startup_modules():
+    """Top-level modules the interpreter imports before running any code."""
+    return {name for name, depth, _ in _importtime("pass") if depth == 0}
+
+
+def forbidden_imports(entries, packages):
+    """{package: import chain} for each of `packages` that was imported."""
+    first = {}  # package -> index of its outermost entry
+    for i, (name, depth, _) in enumerate(entries):
+        package = next((p for p in packages if name == p or name.startswith(p + ".")), None)
+        if package is not None and (package not in first or depth < entries[first[package]][1]):
+            first[package] = i
+
+    found = {}
+    for package, i in first.items():
+        name, depth, _ = entries[i]
+        # Entries are printed after their own imports, so the importers follow, one level up each
+        chain = [name]
+        for parent, parent_depth, _ in entries[i + 1:]:
+            if depth == 0:
+                break
+            if parent_depth < depth:
+                chain.append(parent)
+                depth = parent_depth
+        found[package] = " <- ".join(chain)
+    return found
+
+
+def check(runs=3, scale=1.0, only=None):
+    """Checks every entry point; returns a list of failure messages (empty when all pass)."""
+    startup = startup_modules()
+    failures = []
+    for name, (statement, budget_ms, forbidden) in ENTRY_POINTS.items():
+        if only and name not in only:
+            continue
+        timings = []
+        for _ in range(runs):
+            ms, entries = import_cost(statement, startup)
+            timings.append(ms)
+        ms = statistics.median(timings)
+        budget = budget_ms * scale
+        loaded = forbidden_imports(entries, forbidden)
+        status = "ok" if ms <= budget and not loaded else "FAIL"
+        print(f"{name:<12} {ms:7.1f} ms  (budget {budget:.0f} ms)  {status}")
+        if ms > budget:
+            failures.append(f"{name}: took {ms:.0f} ms, over its {budget:.0f} ms budget")
+        for package, chain in loaded.items():
+            failures.append(f"{name}: imports {package} at startup ({chain})")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3, help="imports per entry point; the median is used")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply every budget (slow machines, CI)")
+    parser.add_argument("entry_points", nargs="*", help=f"subset of {', '.join(ENTRY_POINTS)}")
+    args = parser.parse_args(argv)
+
+    failures = check(args.runs, args.scale, args.entry_points)
+    for failure in failures:
+        print(f"  {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
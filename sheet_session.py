@@ -0,0 +1,219 @@
+import os
+import json
+import time
+import datetime
+import config
+import metrics
+import streaks
+import attendance_store
+
+# (id(client), sheet name) -> (client, spreadsheet); opening costs a Drive lookup plus a metadata read
+_spreadsheets = {}
+
+
+def _cell_text(value):
+    """Renders a written value the way get_all_values() would return it."""
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    return str(value)
+
+
+def _open_spreadsheet(client, sheet_name):
+    key = (id(client), sheet_name)
+    cached = _spreadsheets.get(key)
+    if cached is None:
+        cached = _spreadsheets[key] = (client, client.open(sheet_name))
+    return cached[1]
+
+
+class SheetSession:
+    """
+    Opens the attendance worksheet once and loads its grid once.
+
+    The grid comes from the local mirror (attendance_store) when the sheet's
+    revision has not changed since the last sync, and from the sheet
+    otherwise. Roster, header lookups, attendance marks and streak
+    recalculation are all served from the in-memory grid. Writes are applied
+    to the grid immediately (so later steps see them) and queued until
+    commit(), which sends the cells that actually changed in a single batched
+    update.
+
+    A read_only session (dry runs) saves nothing locally, neither the mirror
+    nor members.json, and cannot commit.
+    """
+
+    def __init__(self, client, sheet_name=None, store=None, read_only=False):
+        self.sheet_name = sheet_name or config.SHEET_NAME
+        self.store = store if store is not None else attendance_store.get_store()
+        self.read_only = read_only
+        with metrics.span("sheet_read") as s:
+            try:
+                self.spreadsheet = _open_spreadsheet(client, self.sheet_name)
+                self.worksheet = self.spreadsheet.sheet1
+                self.grid, source = self._load_grid()
+            except Exception:
+                # The cached handle may be stale (sheet deleted, access revoked)
+                _spreadsheets.pop((id(client), self.sheet_name), None)
+                raise
+            s.set(rows=len(self.grid), source=source)
+        self._pending = {}
+        self._streak_snapshot = None
+
+    def _load_grid(self):
+        """Returns (grid, "mirror" or "sheet") and records the revision the grid reflects."""
+        self.revision = None
+        if self.store is None:
+            return self.worksheet.get_all_values(), "sheet"
+
+        revision = self.revision = self.spreadsheet.get_lastUpdateTime()
+        mirror = self.store.load(self.sheet_name)
+        if (mirror is not None and mirror.revision == revision
+                and time.time() - mirror.full_sync_at < config.ATTENDANCE_FULL_SYNC_MINUTES * 60):
+            return mirror.grid, "mirror"
+
+        grid = self.worksheet.get_all_values()
+        if mirror is not None:
+            edits = attendance_store.changed_cells(mirror.grid, grid)
+            if edits:
+                print(f"Picked up {len(edits)} cell(s) changed in the sheet since the last sync.")
+        if not self.read_only:
+            self.store.save(self.sheet_name, grid, revision)
+        return grid, "sheet"
+
+    @property
+    def headers(self):
+        return self.grid[0] if self.grid else []
+
+    def members(self):
+        """Returns member names (first column, header skipped) and refreshes members.json."""
+        names = [row[0] if row else "" for row in self.grid[1:]]
+        # Trailing blank rows are not part of the roster (matches col_values)
+        while names and not names[-1].strip():
+            names.pop()
+        if not self.read_only:
+            with open('members.json', 'w') as f:
+                json.dump(names, f, indent=4)
+        return names
+
+    def date_column(self, target_date):
+        """Returns the 1-based column index for a date header, or None if missing."""
+        date_str = target_date.strftime("%d/%m/%Y")
+        try:
+            return self.headers.index(date_str) + 1
+        except ValueError:
+            return None
+
+    def set_cell(self, row_num, col_num, value):
+        """Queues a write and mirrors it into the local grid. Unchanged cells are not queued."""
+        row = self.grid[row_num - 1]
+        if len(row) < col_num:
+            row.extend([""] * (col_num - len(row)))
+        text = _cell_text(value)
+        if row[col_num - 1] == text and (row_num, col_num) not in self._pending:
+            return False
+        row[col_num - 1] = text
+        self._pending[(row_num, col_num)] = value
+        return True
+
+    def mark_attendance(self, present_members, target_date=None):
+        """
+        Queues attendance values for the given date column.
+        Returns the number of cells that change, or None if the date column is missing.
+        """
+        target_date = target_date or datetime.date.today()
+        date_str = target_date.strftime("%d/%m/%Y")
+        col_index = self.date_column(target_date)
+        if col_index is None:
+            print(f"Error: Column for date ({date_str}) not found. Existing headers: {self.headers}")
+            return None
+
+        print(f"Updating attendance for {date_str} in column {col_index}...")
+
+        present = set(present_members)
+        queued = 0
+        for i, row in enumerate(self.grid[1:]):
+            row_num = i + 2
+            member_name = row[0] if row else ""
+            current_val = row[col_index - 1].strip().upper() if len(row) >= col_index else ""
+            is_already_present = current_val in streaks.ATTENDED_VALUES
+
+            # Preserve existing TRUE values (manual edits); only OCR can add TRUE, never remove it
+            if is_already_present:
+                continue
+            if self.set_cell(row_num, col_index, member_name in present):
+                queued += 1
+        return queued
+
+    def recalculate_streaks(self):
+        """Queues missed-streak counters computed from the local grid. Returns False if the column is missing."""
+        with metrics.span("streak_recalc") as s:
+            snapshot = streaks.load_snapshot(config.STREAK_SNAPSHOT_FILE)
+            updates, new_snapshot = streaks.compute_streak_updates(
+                self.grid, snapshot, revision=self.revision, changed_rows={r for r, _ in self._pending},
+            )
+            if new_snapshot:
+                s.set(recomputed=new_snapshot["recomputed"], changed=len(updates))
+        if updates is None:
+            print(f"Warning: Column '{streaks.MISSED_COL_NAME}' not found.")
+            return False
+
+        print(f"Updating '{streaks.MISSED_COL_NAME}' column "
+              f"({new_snapshot['recomputed']} rows recomputed)...")
+        for row_num, col_num, consecutive_misses, name in updates:
+            self.set_cell(row_num, col_num, consecutive_misses)
+            print(f"Updated '{name}': {consecutive_misses} consecutive misses")
+
+        self._streak_snapshot = new_snapshot
+        return True
+
+    def commit(self):
+        """Sends all queued writes in one batched update. Returns the number of cells written."""
+        if self.read_only:
+            raise RuntimeError("Cannot commit a read-only SheetSession")
+        written = len(self._pending)
+        if self._pending:
+            in_sync = self.store is not None and self._revision_unchanged()
+            updates = [(r, c, v) for (r, c), v in sorted(self._pending.items())]
+            with metrics.span("sheet_write", cells=written):
+                self.worksheet.batch_update(streaks.build_batch_data(updates))
+            metrics.inc("attendance_sheet_cells_written_total", written)
+            columns = {c for _, c in self._pending}
+            self._pending = {}
+            if self.store is not None:
+                self._save_mirror(columns, in_sync)
+
+        # Only persist once the sheet reflects the computed values, stamped with
+        # the revision it matches (None after a concurrent edit: full recount next time)
+        if self._streak_snapshot is not None:
+            self._streak_snapshot["revision"] = self.revision
+            streaks.save_snapshot(config.STREAK_SNAPSHOT_FILE, self._streak_snapshot)
+            self._streak_snapshot = None
+        return written
+
+    def _revision_unchanged(self):
+        """True if the sheet has not been edited since the grid was loaded."""
+        try:
+            return self.spreadsheet.get_lastUpdateTime() == self.revision
+        except Exception as e:
+            print(f"Warning: Could not read the sheet revision ({e}).")
+            return False
+
+    def _save_mirror(self, columns, in_sync):
+        """
+        Moves the mirror to the revision our write created. If the sheet was
+        edited after the grid was loaded, that revision would also cover an
+        edit the grid lacks, so the mirror is invalidated instead.
+        """
+        if not in_sync:
+            print("The sheet changed while this session was open; it will be re-read next time.")
+            self.revision = None
+            self.store.invalidate(self.sheet_name)
+            return
+        try:
+            self.revision = self.spreadsheet.get_lastUpdateTime()
+            self.store.save(self.sheet_name, self.grid, self.revision, columns)
+        except Exception as e:
+            # A stale revision only means the next session re-reads the sheet
+            print(f"Warning: Could not update the local attendance mirror ({e}).")
+            self.revision = None
+            self.store.invalidate(self.sheet_name)
@@ -0,0 +1,158 @@
+import os
+import json
+import datetime
+
+MISSED_COL_NAME = "# of Meetings Missed in a Row"
+ATTENDED_VALUES = ["TRUE", "1", "YES"]
+
+
+def find_missed_column(headers):
+    """Returns the 0-based index of the missed-streak column, or -1 if missing."""
+    for idx, h in enumerate(headers):
+        if MISSED_COL_NAME in h:
+            return idx
+    return -1
+
+
+def eligible_date_columns(headers, today=None):
+    """
+    Returns [(col_idx, date)] for every date header up to today,
+    sorted latest first. Future dates are ignored.
+    """
+    today = today or datetime.date.today()
+    date_indices = []
+    for idx, header in enumerate(headers):
+        try:
+            dt = datetime.datetime.strptime(header, "%d/%m/%Y").date()
+        except ValueError:
+            continue
+        if dt <= today:
+            date_indices.append((idx, dt))
+    date_indices.sort(key=lambda x: x[1], reverse=True)
+    return date_indices
+
+
+def _cell(row, idx):
+    return str(row[idx]).strip() if idx < len(row) else ""
+
+
+def count_consecutive_misses(row, date_indices):
+    """
+    Count consecutive missed meetings going backwards from the latest marked event.
+    - Empty cells = skip (no meeting data)
+    - FALSE = missed (increment counter)
+    - TRUE = attended (stop counting)
+    """
+    consecutive_misses = 0
+    for col_idx, _ in date_indices:
+        val = _cell(row, col_idx).upper()
+        if val == "":
+            continue
+        elif val == "FALSE":
+            consecutive_misses += 1
+        elif val in ATTENDED_VALUES:
+            break
+    return consecutive_misses
+
+
+def compute_streak_updates(all_records, snapshot=None, today=None, revision=None, changed_rows=()):
+    """
+    Computes the missed-streak value for every member row.
+
+    When `snapshot` was taken at sheet revision `revision` (nobody has edited
+    the sheet since), only the rows in `changed_rows` (changed by us since
+    then) are recounted; every other row reuses its stored streak. Otherwise
+    all rows are recounted. Returns (updates, new_snapshot) where updates is a
+    list of (row_num, col_num, value, member_name) for cells whose current
+    sheet value differs from the computed one. Returns (None, None) when the
+    sheet has no missed-streak column. The caller stamps new_snapshot's
+    "revision" once the sheet reflects it.
+    """
+    headers = all_records[0]
+    missed_idx = find_missed_column(headers)
+    if missed_idx == -1:
+        return None, None
+
+    date_indices = eligible_date_columns(headers, today)
+    columns_key = [headers[col_idx] + "@" + str(col_idx) for col_idx, _ in date_indices]
+
+    # Another revision (manual edits) or set of date columns invalidates every stored row
+    previous_rows = {}
+    if (snapshot and revision is not None and snapshot.get("revision") == revision
+            and snapshot.get("columns") == columns_key):
+        previous_rows = snapshot.get("rows", {})
+    changed_rows = set(changed_rows)
+
+    new_rows = {}
+    updates = []
+    recomputed = 0
+    for i, row in enumerate(all_records[1:]):
+        row_num = i + 2
+        name = _cell(row, 0)
+
+        previous = previous_rows.get(str(row_num))
+        if previous and previous["name"] == name and row_num not in changed_rows:
+            consecutive_misses = previous["streak"]
+        else:
+            consecutive_misses = count_consecutive_misses(row, date_indices)
+            recomputed += 1
+
+        new_rows[str(row_num)] = {"name": name, "streak": consecutive_misses}
+
+        # Update if changed (no cap - show actual count)
+        if _cell(row, missed_idx) != str(consecutive_misses):
+            updates.append((row_num, missed_idx + 1, consecutive_misses, name))
+
+    new_snapshot = {"columns": columns_key, "revision": None, "rows": new_rows, "recomputed": recomputed}
+    return updates, new_snapshot
+
+
+def build_batch_data(updates):
+    """
+    Converts (row, col, value, ...) tuples into a values.batchUpdate payload.
+    Vertically adjacent cells in the same column are merged into one range.
+    """
+    data = []
+    run_start = run_col = prev_row = None
+    run_values = []
+    for row_num, col_num, value, *_ in sorted(updates, key=lambda u: (u[1], u[0])):
+        if run_values and col_num == run_col and row_num == prev_row + 1:
+            run_values.append([value])
+        else:
+            if run_values:
+                data.append(_range_entry(run_start, prev_row, run_col, run_values))
+            run_start, run_col, run_values = row_num, col_num, [[value]]
+        prev_row = row_num
+    if run_values:
+        data.append(_range_entry(run_start, prev_row, run_col, run_values))
+    return data
+
+
+def _range_entry(first_row, last_row, col_num, values):
+    from gspread.utils import rowcol_to_a1
+    cell_range = rowcol_to_a1(first_row, col_num)
+    if last_row != first_row:
+        cell_range += ":" + rowcol_to_a1(last_row, col_num)
+    return {"range": cell_range, "values": values}
+
+
+def load_snapshot(path):
+    """Loads the previous streak snapshot, or None if missing or unreadable."""
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (ValueError, OSError) as e:
+        print(f"Warning: Could not read streak snapshot ({e}). Recomputing all rows.")
+        return None
+
+
+def save_snapshot(path, snapshot):
+    """Persists the streak snapshot atomically."""
+    if not path or snapshot is None:
+        return
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(snapshot, f)
+    os.replace(tmp_path, path)
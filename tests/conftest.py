@@ -0,0 +1,49 @@
+"""
+Shared fixtures. Run the suite from the repository root:
+
+    python -m pytest tests
+"""
+import pytest
+import config
+import api_client
+import main
+import drive_monitor
+import fake_google
+
+# Manual script: OCRs a screenshot given on the command line
+collect_ignore = ["test_ocr.py"]
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Runs the test in tmp_path, with every state file the app writes kept there."""
+    monkeypatch.chdir(tmp_path)  # members.json is written to the working directory
+    monkeypatch.setattr(config, "STREAK_SNAPSHOT_FILE", str(tmp_path / "snapshot.json"))
+    monkeypatch.setattr(config, "ATTENDANCE_STORE_FILE", str(tmp_path / "store.sqlite3"))
+    monkeypatch.setattr(config, "LEDGER_FILE", str(tmp_path / "ledger.sqlite3"))
+    monkeypatch.setattr(config, "DRIVE_STATE_FILE", str(tmp_path / "drive_state.json"))
+    monkeypatch.setattr(config, "METRICS_LOG_FILE", str(tmp_path / "metrics.jsonl"))
+    monkeypatch.setattr(config, "METRICS_TEXTFILE", str(tmp_path / "metrics.prom"))
+    monkeypatch.setattr(config, "OCR_CACHE_FILE", None)
+    monkeypatch.setattr(main, "_ocr_cache", None)
+    return tmp_path
+
+
+@pytest.fixture
+def screenshots(workdir, monkeypatch):
+    """The local screenshots folder (with its processed/ subfolder) inside workdir."""
+    folder = workdir / "screenshots"
+    (folder / "processed").mkdir(parents=True)
+    monkeypatch.setattr(drive_monitor, "LOCAL_SCREENSHOTS_DIR", str(folder))
+    monkeypatch.setattr(drive_monitor, "LOCAL_PROCESSED_DIR", str(folder / "processed"))
+    return folder
+
+
+@pytest.fixture
+def backend(workdir, monkeypatch):
+    """A fresh in-memory fake Google backend, with the API rate limits lifted."""
+    # Buckets are built once per process from the limits in config; start over
+    monkeypatch.setattr(api_client, "_buckets", {})
+    monkeypatch.setattr(config, "SHEETS_REQUESTS_PER_MINUTE", 10 ** 9)
+    monkeypatch.setattr(config, "DRIVE_REQUESTS_PER_MINUTE", 10 ** 9)
+    return fake_google.FakeGoogle()
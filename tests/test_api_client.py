@@ -0,0 +1,55 @@
+import time
+import httplib2
+from googleapiclient.errors import HttpError
+import config
+import api_client
+
+def _http_error(status, reason=None):
+    content = b'{"error": {"errors": [{"reason": "%s"}]}}' % (reason or "x").encode()
+    return HttpError(httplib2.Response({"status": status}), content)
+
+def test_retries_retryable_errors_then_succeeds(monkeypatch):
+    api_client.reset_stats()
+    failures = [_http_error(503), _http_error(403, "userRateLimitExceeded")]
+
+    def flaky():
+        if failures:
+            raise failures.pop(0)
+        return "ok"
+
+    monkeypatch.setattr(config, "API_BACKOFF_BASE_SECONDS", 0)
+    assert api_client.call("drive.files.list", flaky) == "ok"
+    stats = api_client.get_stats()["drive.files.list"]
+    assert stats["calls"] == 3 and stats["errors"] == 2 and stats["retries"] == 2
+
+def test_does_not_retry_permanent_errors():
+    api_client.reset_stats()
+    calls = []
+
+    def forbidden():
+        calls.append(1)
+        raise _http_error(404)
+
+    try:
+        api_client.call("drive.files.get", forbidden)
+        assert False, "expected HttpError"
+    except HttpError:
+        pass
+    assert len(calls) == 1
+    assert api_client.get_stats()["drive.files.get"]["retries"] == 0
+
+def test_token_bucket_limits_rate():
+    bucket = api_client.TokenBucket(rate_per_minute=600, capacity=2)  # 10/s
+    start = time.monotonic()
+    for _ in range(4):
+        bucket.acquire()
+    # Two come from the burst, the other two wait ~0.1 s each
+    assert time.monotonic() - start >= 0.15
+
+def test_sheets_endpoint_names():
+    base = "https://sheets.googleapis.com/v4/spreadsheets/abc"
+    assert api_client.sheets_endpoint("post", base + "/values:batchUpdate") == "sheets.values.batchUpdate"
+    assert api_client.sheets_endpoint("get", base + "/values/Sheet1%21A1") == "sheets.values.get"
+    assert api_client.sheets_endpoint("get", base) == "sheets.spreadsheets.get"
+    assert api_client.sheets_endpoint("post", base + ":batchUpdate") == "sheets.spreadsheets.batchUpdate"
+    assert api_client.sheets_endpoint("get", "https://www.googleapis.com/drive/v3/files") == "drive.files.list"
@@ -0,0 +1,12 @@
+import main
+from assignment import solve_assignment
+
+def test_solver_is_one_to_one():
+    pairs = solve_assignment([[100, 90], [100, 0]])
+    assert pairs == [(0, 1), (1, 0)], pairs
+
+def test_shared_first_name_claims_one_line():
+    members = ["Emre Kaplaner", "Emre Yilmaz", "Onur Celik"]
+    present = main.match_attendance("Emre\nOnur Celik (me)", members, mode="assignment")
+    assert "Onur Celik" in present
+    assert len([m for m in present if m.startswith("Emre")]) == 1, present
@@ -0,0 +1,38 @@
+from attendance_store import AttendanceStore, changed_cells
+
+def _grid():
+    return [
+        ["Name", "# of Meetings Missed in a Row", "02/04/2026"],
+        ["Onur Celik", "0", "TRUE"],
+        ["Batuhan Altan", "1", "FALSE"],
+    ]
+
+def test_round_trip_and_column_updates(tmp_path):
+    store = AttendanceStore(str(tmp_path / "store.sqlite3"))
+    assert store.load("Sheet") is None
+
+    store.save("Sheet", _grid(), "rev1")
+    mirror = store.load("Sheet")
+    assert mirror.grid == _grid() and mirror.revision == "rev1"
+    full_sync_at = mirror.full_sync_at
+
+    grid = _grid()
+    for row, value in zip(grid, ["09/04/2026", "FALSE", "TRUE"]):
+        row.append(value)
+    grid[2][1] = "2"
+    store.save("Sheet", grid, "rev2", columns={2, 4})
+    mirror = store.load("Sheet")
+    assert mirror.grid == grid and mirror.revision == "rev2"
+    assert mirror.full_sync_at == full_sync_at  # a partial save is not a full sync
+
+    store.invalidate("Sheet")
+    assert store.load("Sheet").revision is None
+    store.close()
+
+def test_changed_cells():
+    old = _grid()
+    new = _grid()
+    new[1][2] = "FALSE"
+    new.append(["New Member", "", ""])
+    assert changed_cells(old, new) == [(2, 3, "TRUE", "FALSE"), (4, 1, "", "New Member")]
+    assert changed_cells(old, _grid()) == []
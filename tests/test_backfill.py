@@ -0,0 +1,54 @@
+import os
+import datetime
+import config
+import attendance_store
+import backfill
+
+def _grid():
+    return [
+        ["Name", "# of Meetings Missed in a Row", "02/04/2026", "09/04/2026", "16/04/2026"],
+        ["Onur Celik", "0", "", "", ""],
+        ["Batuhan Altan", "0", "", "", ""],
+    ]
+
+def test_collect_local_groups_by_filename_date(tmp_path):
+    (tmp_path / "april").mkdir()
+    for name in ["april/Screenshot 2026-04-02 at 21.00.png", "april/Screenshot 2026-04-02 at 21.05.png",
+                 "09.04.2026.jpg", "no date.png", "notes.txt"]:
+        (tmp_path / name).touch()
+    by_date, undated = backfill.collect_local(str(tmp_path))
+    assert {d: len(paths) for d, paths in by_date.items()} == {
+        datetime.date(2026, 4, 2): 2, datetime.date(2026, 4, 9): 1}
+    assert [os.path.basename(p) for p in undated] == ["no date.png"]
+
+def test_all_dates_in_one_read_and_one_write(backend):
+    backend.seed_sheet(config.SHEET_NAME, _grid())
+
+    mark = backend.call_mark()
+    written = backfill.backfill_texts(backend.sheets_client(), {
+        datetime.date(2026, 4, 2): ["Onur Celik\nBatuhan Altan"],
+        datetime.date(2026, 4, 9): ["Onur Celik", "Onur Celik (Host)"],
+        datetime.date(2026, 4, 16): ["Batuhan Altan"],
+        datetime.date(2026, 4, 23): ["Onur Celik"],  # no column for this date
+    })
+    assert written == {datetime.date(2026, 4, 2): 2, datetime.date(2026, 4, 9): 1,
+                       datetime.date(2026, 4, 16): 1}
+    backend.assert_budget({"sheets.values.get": 1, "sheets.write": 1}, since=mark)
+
+    grid = backend.grid(config.SHEET_NAME)
+    assert grid[1][2:] == ["TRUE", "TRUE", "FALSE"]
+    assert grid[2][2:] == ["TRUE", "FALSE", "TRUE"]
+    assert [grid[1][1], grid[2][1]] == ["1", "0"]
+
+def test_dry_run_writes_nothing(backend, workdir):
+    backend.seed_sheet(config.SHEET_NAME, _grid())
+
+    mark = backend.call_mark()
+    written = backfill.backfill_texts(backend.sheets_client(),
+                                      {datetime.date(2026, 4, 2): ["Onur Celik"]}, dry_run=True)
+    assert written == {datetime.date(2026, 4, 2): 1}
+    backend.assert_budget({"sheets.write": 0}, since=mark)
+    # Not even the local files
+    assert not (workdir / "members.json").exists()
+    assert not os.path.exists(config.STREAK_SNAPSHOT_FILE)
+    assert attendance_store.get_store().load(config.SHEET_NAME) is None
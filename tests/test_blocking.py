@@ -0,0 +1,69 @@
+import io
+import random
+import contextlib
+from collections import Counter
+from thefuzz import fuzz
+import config
+import main
+import blocking
+from benchmarks import synthetic
+
+def _shared_grams(a, b):
+    return sum((Counter(blocking._grams(a)) & Counter(blocking._grams(b))).values())
+
+def _edit_every_token(name, rng):
+    """OCR-like damage to each word, so the result shares no token with `name`."""
+    words = []
+    for word in name.split():
+        for _ in range(rng.randint(1, 2)):
+            i = rng.randrange(len(word) + 1)
+            op = rng.choice("ids")
+            if op == "i":
+                word = word[:i] + rng.choice("aeilnorst") + word[i:]
+            elif op == "d" and len(word) > 1:
+                word = word[:i] + word[i + 1:]
+            else:
+                word = word[:i] + rng.choice("aeilnorst") + word[i + 1:]
+        words.append(word)
+    return " ".join(words)
+
+def test_bound_holds_for_every_match_without_a_shared_token():
+    rng = random.Random(1)
+    roster = synthetic.make_roster(300, seed=1)
+    checked = 0
+    for _ in range(20000):
+        name = main.normalize_text(rng.choice(roster))
+        line = _edit_every_token(name, rng) if rng.random() < 0.7 else name.replace(" ", "")
+        a, b = blocking.scorer_form(name), blocking.scorer_form(line)
+        if not a or not b or set(a.split()) & set(b.split()):
+            continue
+        score = fuzz.token_set_ratio(name, line)
+        for threshold in (80, 85, 90, 95):
+            if score >= threshold:
+                need = blocking.min_shared_grams(len(a), len(b), threshold)
+                assert need is not None and _shared_grams(a, b) >= need, (name, line, threshold)
+                checked += 1
+    assert checked > 100
+
+def test_substring_index_finds_every_containing_line():
+    lines = ["onur celik", "batuhanaltan host", "ali", "x batuhan altan"]
+    index = blocking.SubstringIndex(lines)
+    assert index.containing("batuhanaltan") == [1, 3]
+    assert index.containing("al") == [1, 2, 3]  # too short for a trigram: every line is checked
+    assert index.containing("zeynep") == []
+
+def _match(monkeypatch, text, index, blocking_on):
+    monkeypatch.setattr(config, "MATCH_BLOCKING", blocking_on)
+    with contextlib.redirect_stdout(io.StringIO()) as out:
+        present = main.match_attendance(text, index, mode="cascade")
+    return present, out.getvalue()
+
+def test_blocked_cascade_matches_exhaustive_cascade(monkeypatch):
+    for seed in range(12):
+        roster = synthetic.make_roster(400, seed=seed)
+        index = main.MemberIndex(roster)
+        text, _ = synthetic.make_ocr_text(roster, present_fraction=0.5, seed=seed, max_present=200)
+        if seed % 2:
+            text = main.OcrText(text, synthetic.line_confidences(text, roster, seed=seed))
+        # Same members, same strategies, same lines and scores in the log
+        assert _match(monkeypatch, text, index, True) == _match(monkeypatch, text, index, False), seed
@@ -0,0 +1,174 @@
+import time
+import datetime
+import pytest
+from googleapiclient.errors import HttpError
+import config
+import attendance_store
+import fake_google
+import main
+import drive_monitor
+from sheet_session import SheetSession
+
+def _grid():
+    return [
+        ["Name", "# of Meetings Missed in a Row", "02/04/2026", "09/04/2026"],
+        ["Onur Celik", "0", "TRUE", ""],
+        ["Batuhan Altan", "0", "FALSE", ""],
+    ]
+
+def test_attendance_update_is_one_read_one_write(backend):
+    backend.seed_sheet(config.SHEET_NAME, _grid())
+    client = backend.sheets_client()
+
+    mark = backend.call_mark()
+    assert main.update_sheet_attendance(client, ["Onur Celik"], datetime.date(2026, 4, 9))
+    backend.assert_budget({"sheets.values.get": 1, "sheets.write": 1, "drive.files.get": 3}, since=mark)
+
+    grid = backend.grid(config.SHEET_NAME)
+    assert [row[3] for row in grid[1:]] == ["TRUE", "FALSE"]
+    assert grid[2][1] == "2"  # Batuhan missed both meetings
+    assert backend.check_budget({"sheets.write": 0}, since=mark) != []
+
+def test_mirror_serves_reads_and_picks_up_manual_edits(backend):
+    backend.seed_sheet(config.SHEET_NAME, _grid())
+    client = backend.sheets_client()
+    day = datetime.date(2026, 4, 9)
+
+    session = SheetSession(client)
+    session.mark_attendance(["Onur Celik"], day)
+    session.recalculate_streaks()
+    assert session.commit() == 3  # two marks + Batuhan's streak
+
+    # Nothing changed since our write: served from the mirror, no cells re-sent
+    mark = backend.call_mark()
+    session = SheetSession(client)
+    assert session.mark_attendance(["Onur Celik"], day) == 0
+    session.recalculate_streaks()
+    assert session._streak_snapshot["recomputed"] == 0  # same revision, nothing changed by us
+    assert session.commit() == 0
+    backend.assert_budget({"sheets.read": 0, "sheets.write": 0}, since=mark)
+
+    # A manual edit moves the revision: the sheet is re-read and the streak follows it
+    backend.write_cells(config.SHEET_NAME, [(3, 4, "TRUE")])
+    mark = backend.call_mark()
+    session = SheetSession(client)
+    assert session.grid[2][3] == "TRUE"
+    session.recalculate_streaks()
+    assert session.commit() == 1
+    backend.assert_budget({"sheets.values.get": 1, "sheets.values.batchUpdate": 1}, since=mark)
+    assert backend.grid(config.SHEET_NAME)[2][1] == "0"
+
+    # Our own write left the mirror current
+    assert SheetSession(client).grid == backend.grid(config.SHEET_NAME)
+
+def test_edit_during_session_invalidates_mirror(backend):
+    backend.seed_sheet(config.SHEET_NAME, _grid())
+    client = backend.sheets_client()
+    day = datetime.date(2026, 4, 9)
+    SheetSession(client).commit()  # fills the mirror
+
+    session = SheetSession(client)
+    session.mark_attendance(["Onur Celik"], day)
+    # A teacher edits the sheet after our read, before our write
+    backend.write_cells(config.SHEET_NAME, [(3, 3, "TRUE")])
+    session.commit()
+    assert attendance_store.get_store().load(config.SHEET_NAME).revision is None
+
+    # The next session re-reads the sheet and sees both changes
+    mark = backend.call_mark()
+    session = SheetSession(client)
+    backend.assert_budget({"sheets.values.get": 1}, since=mark)
+    assert session.grid == backend.grid(config.SHEET_NAME)
+    assert session.grid[2][2] == "TRUE" and session.grid[1][3] == "TRUE"
+
+def test_drive_changes_download_and_move(backend, monkeypatch):
+    monkeypatch.setattr(config, "DRIVE_FOLDER_ID", "src")
+    monkeypatch.setattr(config, "PROCESSED_FOLDER_ID", "done")
+    monkeypatch.setattr(config, "DRIVE_POLL_MODE", "changes")
+    monkeypatch.setattr(config, "DRIVE_DOWNLOAD_CHUNK_SIZE", 4)
+    service = backend.drive_service()
+    first = backend.add_file("2026-04-02 a.png", b"first image", ["src"])
+    backend.add_file("notes.txt", b"text", ["src"], mime_type="text/plain")
+
+    state = {}
+    assert [f["id"] for f in drive_monitor.find_pending_drive_files(service, state)] == [first]
+    second = backend.add_file("2026-04-02 b.png", b"second", ["src"])
+    pending = drive_monitor.find_pending_drive_files(service, state)
+    assert {f["id"] for f in pending} == {first, second}
+
+    meta = next(f for f in pending if f["id"] == first)
+    assert bytes(drive_monitor.download_drive_file(service, meta)) == b"first image"
+
+    mark = backend.call_mark()
+    drive_monitor.finish_drive_file(service, meta, True)
+    backend.assert_budget({"drive.files.update": 1, "drive.files.get": 0}, since=mark)
+    assert backend.file_meta(first)["parents"] == ["done"]
+
+    drive_monitor.mark_drive_files_done(state, {first})
+    assert [f["id"] for f in drive_monitor.find_pending_drive_files(service, state)] == [second]
+
+def test_pending_files_removed_from_drive_are_dropped(backend, monkeypatch):
+    monkeypatch.setattr(config, "DRIVE_FOLDER_ID", "src")
+    monkeypatch.setattr(config, "DRIVE_POLL_MODE", "changes")
+    service = backend.drive_service()
+    ids = [backend.add_file(f"2026-04-02 {n}.png", n.encode(), ["src"]) for n in "abcd"]
+    state = {}
+    assert [f["id"] for f in drive_monitor.find_pending_drive_files(service, state)] == ids
+
+    # None of these gets processed; each leaves the source folder a different way
+    backend.remove_file(ids[0])
+    backend.remove_file(ids[1], trash=True)
+    service.files().update(fileId=ids[2], addParents="elsewhere", removeParents="src").execute()
+    assert [f["id"] for f in drive_monitor.find_pending_drive_files(service, state)] == [ids[3]]
+    assert [f["id"] for f in drive_monitor.load_drive_state()["retry"]] == [ids[3]]
+
+    # Moved back in: pending again
+    service.files().update(fileId=ids[2], addParents="src", removeParents="elsewhere").execute()
+    assert {f["id"] for f in drive_monitor.find_pending_drive_files(service, state)} == {ids[2], ids[3]}
+
+def test_failed_files_back_off(backend, monkeypatch):
+    monkeypatch.setattr(config, "DRIVE_FOLDER_ID", "src")
+    monkeypatch.setattr(config, "DRIVE_POLL_MODE", "changes")
+    monkeypatch.setattr(config, "DRIVE_RETRY_MIN_SECONDS", 60)
+    service = backend.drive_service()
+    file_id = backend.add_file("2026-04-02 a.png", b"a", ["src"])
+    state = {}
+    assert len(drive_monitor.find_pending_drive_files(service, state)) == 1
+
+    now = time.time()
+    drive_monitor.mark_drive_files_failed(state, {file_id}, now=now)
+    drive_monitor.mark_drive_files_failed(state, {file_id}, now=now)
+    assert state["failures"][file_id] == [2, now + 120]  # 60s, then 120s
+    assert drive_monitor.find_pending_drive_files(service, state) == []
+    assert [f["id"] for f in state["retry"]] == [file_id]  # still pending, just not yet
+    assert not drive_monitor.retry_due(state, file_id, now=now + 119)
+    assert drive_monitor.retry_due(state, file_id, now=now + 120)
+
+    drive_monitor.mark_drive_files_done(state, {file_id})
+    assert state["failures"] == {} and state["retry"] == []
+
+def test_download_drive_file_stays_in_memory(backend, monkeypatch):
+    monkeypatch.setattr(config, "DRIVE_DOWNLOAD_CHUNK_SIZE", 4)
+    service = backend.drive_service()
+    content = bytes(range(11))
+    meta = backend.file_meta(backend.add_file("2026-04-02 a.png", content, ["src"]))
+
+    mark = backend.call_mark()
+    data = drive_monitor.download_drive_file(service, meta)
+    assert isinstance(data, memoryview) and bytes(data) == content
+    backend.assert_budget({"drive.files.get_media": 3}, since=mark)  # 4 + 4 + 3 bytes
+
+    # A per-thread connection replaces the request's own
+    http = fake_google.FakeHttp(backend)
+    requests = []
+    monkeypatch.setattr(http, "request", lambda *args, **kwargs: requests.append(1) or
+               fake_google.FakeHttp.request(http, *args, **kwargs))
+    assert bytes(drive_monitor.download_drive_file(service, meta, http=http)) == content
+    assert len(requests) == 3
+
+    missing = dict(meta, id="missing")
+    try:
+        drive_monitor.download_drive_file(service, missing)
+        assert False, "expected HttpError"
+    except HttpError as e:
+        assert e.resp.status == 404
@@ -0,0 +1,84 @@
+import os
+import datetime
+import threading
+import pytest
+from google.oauth2.credentials import Credentials
+import config
+import google_clients
+import fake_google
+import sheet_session
+
+@pytest.fixture(autouse=True)
+def live_auth(tmp_path, monkeypatch):
+    """Fresh client caches, the live backend and a token file in tmp_path."""
+    monkeypatch.setattr(config, "GOOGLE_BACKEND", "live")
+    monkeypatch.setattr(config, "TOKEN_FILE", str(tmp_path / "token.json"))
+    monkeypatch.setattr(config, "CLIENT_ID", None)
+    monkeypatch.setattr(config, "CLIENT_SECRET", None)
+    monkeypatch.setattr(google_clients, "_creds", None)
+    monkeypatch.setattr(google_clients, "_sheet_client", None)
+    monkeypatch.setattr(google_clients, "_drive_service", None)
+    monkeypatch.setattr(google_clients, "_thread_local", threading.local())
+
+def _in_an_hour():
+    return datetime.datetime.utcnow() + datetime.timedelta(hours=1)
+
+def _write_token(expiry=None):
+    expiry = expiry or _in_an_hour()
+    creds = Credentials("access", refresh_token="refresh", token_uri="https://oauth2.googleapis.com/token",
+                        client_id="id", client_secret="secret", scopes=config.SCOPES, expiry=expiry)
+    with open(config.TOKEN_FILE, "w") as f:
+        f.write(creds.to_json())
+
+def test_valid_token_is_read_once_and_not_rewritten():
+    _write_token()
+    os.utime(config.TOKEN_FILE, (0, 0))
+
+    creds = google_clients.get_credentials()
+    assert creds is not None and google_clients.get_credentials() is creds
+    assert os.path.getmtime(config.TOKEN_FILE) == 0
+
+def test_refreshed_token_is_saved(monkeypatch):
+    _write_token(expiry=datetime.datetime(2000, 1, 1))
+
+    def refresh(self, request):
+        self.token = "renewed"
+        self.expiry = _in_an_hour()
+    monkeypatch.setattr(Credentials, "refresh", refresh)
+
+    assert google_clients.get_credentials().token == "renewed"
+    assert Credentials.from_authorized_user_file(config.TOKEN_FILE).token == "renewed"
+
+def test_clients_are_built_once():
+    _write_token()
+
+    sheet_client = google_clients.get_sheet_client()
+    assert sheet_client is not None and google_clients.get_sheet_client() is sheet_client
+    drive_service = google_clients.get_drive_service()
+    assert drive_service is not None and google_clients.get_drive_service() is drive_service
+
+    # One Drive connection per thread
+    http = google_clients.thread_drive_http()
+    assert google_clients.thread_drive_http() is http
+    other = []
+    thread = threading.Thread(target=lambda: other.append(google_clients.thread_drive_http()))
+    thread.start()
+    thread.join()
+    assert other[0] is not http
+
+def test_missing_credentials():
+    assert google_clients.get_sheet_client() is None
+    with pytest.raises(RuntimeError, match="No Google credentials"):
+        google_clients.thread_drive_http()
+
+def test_fake_backend_shares_one_sheet_client(backend, monkeypatch):
+    monkeypatch.setattr(config, "GOOGLE_BACKEND", "memory")
+    monkeypatch.setattr(fake_google, "_backend", backend)
+    monkeypatch.setattr(sheet_session, "_spreadsheets", {})
+    backend.seed_sheet(config.SHEET_NAME, [["Name", "# of Meetings Missed in a Row"], ["Onur Celik", "0"]])
+
+    client = google_clients.get_sheet_client()
+    assert google_clients.get_sheet_client() is client
+    for _ in range(3):
+        sheet_session.SheetSession(google_clients.get_sheet_client())
+    assert len(sheet_session._spreadsheets) == 1  # the open spreadsheet is reused, not re-cached
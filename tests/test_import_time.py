@@ -0,0 +1,29 @@
+from scripts import check_import_time
+
+SAMPLE = """import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   _io
+import time:      1500 |      30000 | site
+import time:       400 |        400 |     numpy._core
+import time:       900 |       1300 |   numpy
+import time:        50 |         50 |   config
+import time:       300 |       1650 | main
+"""
+
+def test_parse_importtime():
+    entries = check_import_time.parse_importtime(SAMPLE)
+    assert entries[0] == ("_io", 1, 120)
+    assert ("numpy._core", 2, 400) in entries
+    assert entries[-1] == ("main", 0, 1650)
+
+def test_forbidden_imports_reports_the_chain():
+    entries = check_import_time.parse_importtime(SAMPLE)
+    found = check_import_time.forbidden_imports(entries, ["numpy", "PIL"])
+    assert found == {"numpy": "numpy <- main"}
+
+def test_entry_points_do_not_load_heavy_dependencies():
+    # Timings depend on the machine; which modules get imported does not
+    startup = check_import_time.startup_modules()
+    for name, (statement, _, forbidden) in check_import_time.ENTRY_POINTS.items():
+        _, entries = check_import_time.import_cost(statement, startup)
+        loaded = check_import_time.forbidden_imports(entries, forbidden)
+        assert not loaded, f"{name}: {loaded}"
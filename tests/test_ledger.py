@@ -0,0 +1,67 @@
+import sqlite3
+import datetime
+from ledger import ProcessingLedger
+
+def test_stages_resume_and_keep_fields(tmp_path):
+    ledger = ProcessingLedger(str(tmp_path / "ledger.sqlite3"))
+    key = ProcessingLedger.drive_key("abc")
+    assert ledger.lookup(key) is None
+
+    ledger.record(key, "downloaded", name="a.png", content_hash="h1",
+                  meeting_date=datetime.date(2026, 4, 2), parents=["src"])
+    ledger.record(key, "ocr", text="Onur Celik", confidences=[93.5])
+    entry = ledger.lookup(key, "h1")
+    assert entry == {"stage": "ocr", "name": "a.png", "meeting_date": "2026-04-02",
+                     "text": "Onur Celik", "confidences": [93.5], "parents": ["src"]}
+
+    ledger.record(key, "written")
+    assert ledger.lookup(key, "h1")["stage"] == "written"
+    ledger.record(key, "moved")
+    assert ledger.lookup(key, "h1") is None
+    ledger.close()
+
+def test_changed_content_starts_over(tmp_path):
+    ledger = ProcessingLedger(str(tmp_path / "ledger.sqlite3"))
+    path = str(tmp_path / "shot.png")
+    with open(path, "wb") as f:
+        f.write(b"first")
+    key = ProcessingLedger.local_key(path)
+    ledger.record(key, "ocr", content_hash=ProcessingLedger.hash_file(path), text="x")
+    assert ledger.lookup(key, ProcessingLedger.hash_file(path))["text"] == "x"
+
+    # New text read without confidences drops the old ones
+    ledger.record(key, "ocr", text="y")
+    assert ledger.lookup(key)["confidences"] is None
+
+    with open(path, "wb") as f:
+        f.write(b"second")
+    assert ledger.lookup(key, ProcessingLedger.hash_file(path)) is None
+
+    # A new download replaces the old entry's text
+    ledger.record(key, "downloaded", content_hash="new")
+    assert ledger.lookup(key)["text"] is None
+    ledger.close()
+
+def test_adds_confidences_to_an_older_ledger(tmp_path):
+    path = str(tmp_path / "ledger.sqlite3")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE files (key TEXT PRIMARY KEY, name TEXT, content_hash TEXT, stage TEXT NOT NULL,"
+                 " meeting_date TEXT, text TEXT, parents TEXT, updated_at REAL NOT NULL)")
+    conn.execute("INSERT INTO files VALUES ('drive:a', 'a.png', 'h1', 'ocr', '2026-04-02', 'Onur Celik', NULL, ?)",
+                 (datetime.datetime.now().timestamp(),))
+    conn.commit()
+    conn.close()
+
+    ledger = ProcessingLedger(path)
+    assert ledger.lookup("drive:a")["confidences"] is None
+    ledger.record("drive:a", "ocr", text="Onur Celik", confidences=[88.0])
+    assert ledger.lookup("drive:a")["confidences"] == [88.0]
+    ledger.close()
+
+def test_prune_by_age(tmp_path):
+    ledger = ProcessingLedger(str(tmp_path / "ledger.sqlite3"))
+    ledger.record("drive:x", "written")
+    ledger.max_age_seconds = -1
+    ledger.prune()
+    assert len(ledger) == 0
+    ledger.close()
@@ -0,0 +1,73 @@
+import os
+import time
+import queue
+import pytest
+from local_watcher import LocalFolderWatcher
+
+SETTLE = 0.3
+
+@pytest.fixture(params=["polling", "inotify"])
+def watch(request, tmp_path, monkeypatch):
+    """Starts a watcher on tmp_path in each mode; returns it. Stopped after the test."""
+    watcher = LocalFolderWatcher(str(tmp_path), {".png", ".jpg"}, settle_seconds=SETTLE, poll_interval=0.1)
+    if request.param == "polling":
+        monkeypatch.setattr(watcher, "_open_inotify", lambda: None)
+    yield watcher.start
+    watcher.stop()
+
+def _drain(watcher, wait):
+    paths = []
+    deadline = time.monotonic() + wait
+    while time.monotonic() < deadline:
+        try:
+            paths.append(watcher.queue.get(timeout=0.05))
+        except queue.Empty:
+            pass
+    return paths
+
+def _write(path, data=b"x"):
+    with open(path, "ab") as f:
+        f.write(data)
+
+def test_debounce(watch, tmp_path):
+    watcher = watch()
+    path = str(tmp_path / "growing.png")
+    # Still being written: never stable for SETTLE seconds
+    for _ in range(8):
+        _write(path)
+        assert _drain(watcher, 0.1) == []
+    start = time.monotonic()
+    assert _drain(watcher, SETTLE * 4) == [path]  # queued once, after it settles
+    assert time.monotonic() - start >= SETTLE
+
+def test_burst(watch, tmp_path):
+    existing = str(tmp_path / "before.png")
+    _write(existing)
+    watcher = watch()
+    burst = [str(tmp_path / f"shot {i}.png") for i in range(3)]
+    for path in burst:
+        _write(path)
+    _write(str(tmp_path / "notes.txt"))
+    assert sorted(_drain(watcher, SETTLE * 4)) == sorted(burst + [existing])
+
+    # A deleted name that reappears is picked up again, even before mark_done;
+    # files left alone are not re-queued
+    os.remove(burst[0])
+    _write(burst[0], b"new")
+    assert _drain(watcher, SETTLE * 4) == [burst[0]]
+    # So is a file rewritten in place, e.g. a failed screenshot saved again
+    _write(burst[1], b"more")
+    assert _drain(watcher, SETTLE * 4) == [burst[1]]
+
+def test_moved_out_and_back(watch, tmp_path):
+    path = str(tmp_path / "shot.png")
+    _write(path)
+    watcher = watch()
+    assert _drain(watcher, SETTLE * 4) == [path]
+
+    # Same size and mtime when it comes back: only the move-out tells it apart
+    (tmp_path / "processed").mkdir()
+    os.rename(path, tmp_path / "processed" / "shot.png")
+    assert _drain(watcher, 0.3) == []
+    os.rename(tmp_path / "processed" / "shot.png", path)
+    assert _drain(watcher, SETTLE * 4) == [path]
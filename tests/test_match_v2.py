@@ -36,3 +36,17 @@ if passed_all:
     print("\nALL TESTS PASSED")
 else:
     print("\nSOME TESTS FAILED")
+
+# Prebuilt index must give the same result and be reused for the same roster
+index = main.get_member_index(members)
+if main.match_attendance(ocr_text, index) == present_members and main.get_member_index(list(members)) is index:
+    print("PASS: MemberIndex reuse")
+else:
+    print("FAIL: MemberIndex reuse")
+
+# Overlapping scrolled screenshots are merged line by line before matching
+merged = main.merge_ocr_texts(["Onur Celik (me)\nbatuhanaltan", "batuhanaltan\nEmre (Patientdesk.ai)"])
+if merged.split("\n") == ["Onur Celik (me)", "batuhanaltan", "Emre (Patientdesk.ai)"]:
+    print("PASS: merge_ocr_texts")
+else:
+    print(f"FAIL: merge_ocr_texts -> {merged!r}")
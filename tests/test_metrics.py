@@ -0,0 +1,78 @@
+import os
+import json
+import pytest
+import config
+import metrics
+
+def _configure(monkeypatch, enabled):
+    """Metrics on or off, writing into workdir, starting from empty counters."""
+    monkeypatch.setattr(config, "METRICS_ENABLED", enabled)
+    monkeypatch.setattr(metrics, "_log_file", None)
+    metrics.reset()
+
+def test_spans_log_json_and_export_histograms(workdir, monkeypatch):
+    _configure(monkeypatch, enabled=True)
+    with metrics.span("download", file="a.png") as s:
+        s.set(bytes=123)
+    try:
+        with metrics.span("ocr"):
+            raise ValueError("boom")
+    except ValueError:
+        pass
+    metrics.inc("attendance_match_total", strategy="substring")
+    metrics.inc("attendance_match_total", 2, strategy="substring")
+    metrics.flush()
+    metrics._log_file.close()
+
+    with open(config.METRICS_LOG_FILE) as f:
+        lines = [json.loads(line) for line in f]
+    assert [(l["span"], l["status"]) for l in lines] == [("download", "ok"), ("ocr", "error")]
+    assert lines[0]["bytes"] == 123 and lines[0]["file"] == "a.png"
+    assert lines[1]["error"] == "ValueError: boom"
+
+    with open(config.METRICS_TEXTFILE) as f:
+        text = f.read()
+    assert '# TYPE attendance_stage_seconds histogram' in text
+    assert 'attendance_stage_seconds_bucket{stage="download",le="+Inf"} 1' in text
+    assert 'attendance_stage_seconds_count{stage="ocr"} 1' in text
+    assert 'attendance_stage_total{stage="ocr",status="error"} 1' in text
+    assert 'attendance_match_total{strategy="substring"} 3' in text
+
+def test_disabled_is_a_noop(workdir, monkeypatch):
+    _configure(monkeypatch, enabled=False)
+    with metrics.span("download") as s:
+        s.set(bytes=1)
+    metrics.inc("attendance_match_total", strategy="substring")
+    metrics.flush()
+    assert metrics.render() == "\n"
+    assert not os.path.exists(config.METRICS_LOG_FILE)
+    assert not os.path.exists(config.METRICS_TEXTFILE)
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork")
+def test_forked_worker_leaves_the_textfile_alone(workdir, monkeypatch):
+    _configure(monkeypatch, enabled=True)
+    metrics.inc("attendance_match_total", 5, strategy="substring")
+    metrics.flush()
+    with open(config.METRICS_TEXTFILE) as f:
+        exported = f.read()
+    metrics.inc("attendance_match_total", 2, strategy="substring")  # not flushed yet
+
+    pid = os.fork()
+    if pid == 0:
+        # An OCR worker: a stale copy of the counters, and every span tries to flush
+        try:
+            config.METRICS_FLUSH_SECONDS = 0
+            metrics.reset()
+            with metrics.span("ocr"):
+                pass
+            metrics.flush()
+        finally:
+            os._exit(0)
+    os.waitpid(pid, 0)
+
+    with open(config.METRICS_TEXTFILE) as f:
+        assert f.read() == exported
+    assert not os.path.exists(config.METRICS_TEXTFILE + ".tmp")
+    metrics.flush()
+    with open(config.METRICS_TEXTFILE) as f:
+        assert 'attendance_match_total{strategy="substring"} 7' in f.read()
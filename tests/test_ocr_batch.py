@@ -0,0 +1,50 @@
+import io
+import contextlib
+import multiprocessing
+import pytest
+from PIL import Image
+import config
+import ocr_backends
+import main
+
+class _SizeBackend:
+    """Reads every image as its size, so results show which image they came from."""
+    name = "size"
+
+    def image_to_string(self, image):
+        return f"{image.width}x{image.height}"
+
+    def settings(self):
+        return {"engine": self.name}
+
+@pytest.fixture
+def plain_ocr(workdir, monkeypatch):
+    monkeypatch.setattr(ocr_backends, "_backend", _SizeBackend())
+    monkeypatch.setattr(config, "PANEL_DETECTION", False)
+    monkeypatch.setattr(config, "OCR_MODE", "text")
+    return workdir
+
+def _batch(folder, max_workers):
+    paths = []
+    for name, size in [("a.png", (30, 20)), ("b.png", (40, 10))]:
+        paths.append(str(folder / name))
+        Image.new("L", size, 255).save(paths[-1])
+    broken = str(folder / "broken.png")
+    with open(broken, "wb") as f:
+        f.write(b"not an image")
+    missing = str(folder / "missing.png")
+    with contextlib.redirect_stdout(io.StringIO()):
+        texts = main.extract_texts_parallel(paths + [broken, missing], max_workers=max_workers)
+    return [texts[p] for p in paths], texts[broken], texts[missing]
+
+def test_failed_images_give_none_in_process(plain_ocr):
+    assert _batch(plain_ocr, 1) == (["30x20", "40x10"], None, None)
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != "fork",
+                    reason="workers inherit the scripted backend only when forked")
+def test_failed_images_give_none_in_pool(plain_ocr):
+    assert _batch(plain_ocr, 3) == (["30x20", "40x10"], None, None)
+
+def test_single_image_keeps_empty_text_on_error(plain_ocr):
+    with contextlib.redirect_stdout(io.StringIO()):
+        assert main.extract_text_from_image(b"not an image") == ""
@@ -0,0 +1,43 @@
+import threading
+from ocr_cache import OcrCache
+
+def test_roundtrip_and_settings_in_key(tmp_path):
+    cache = OcrCache(str(tmp_path / "cache.sqlite3"))
+    key = OcrCache.make_key(b"image-bytes", {"engine": "a"})
+    assert cache.get(key) is None
+    cache.put(key, "Onur Celik", [96.0, 91.5])
+    assert cache.get(key) == {"text": "Onur Celik", "confidences": [96.0, 91.5]}
+    assert OcrCache.make_key(b"image-bytes", {"engine": "b"}) != key
+    cache.close()
+
+def test_eviction_by_size_and_age(tmp_path):
+    cache = OcrCache(str(tmp_path / "cache.sqlite3"), max_entries=2)
+    for i in range(3):
+        cache.put(f"k{i}", f"text {i}")
+    assert len(cache) == 2 and cache.get("k0") is None
+    cache.max_age_seconds = -1
+    assert cache.get("k2") is None
+    cache.close()
+
+def test_shared_between_threads(tmp_path):
+    # The monitor OCRs in a thread pool when it has a single worker; they all share one cache
+    cache = OcrCache(str(tmp_path / "cache.sqlite3"))
+    cache.put("main", "Onur Celik")
+    errors = []
+
+    def worker(n):
+        try:
+            for i in range(50):
+                cache.put(f"t{n}-{i}", f"text {i}")
+                assert cache.get(f"t{n}-{i}")["text"] == f"text {i}"
+            assert cache.get("main")["text"] == "Onur Celik"
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == [] and len(cache) == 101
+    cache.close()
@@ -0,0 +1,82 @@
+import pickle
+import numpy as np
+from PIL import Image, ImageDraw
+import config
+import ocr_backends
+import main
+
+def _quietly(fn, *args):
+    import io, contextlib
+    with contextlib.redirect_stdout(io.StringIO()):
+        return fn(*args)
+
+def test_lines_from_tesseract_data():
+    data = {
+        "text": ["", "Onur", "Celik", "", "Batuhan", "Altan"],
+        "conf": [-1, 96, 90, -1, "40", "60"],
+        "block_num": [1, 1, 1, 1, 1, 1],
+        "par_num": [1, 1, 1, 1, 1, 1],
+        "line_num": [0, 1, 1, 2, 2, 2],
+        "left": [0, 10, 60, 0, 10, 90],
+        "top": [0, 5, 6, 0, 40, 41],
+        "width": [0, 45, 50, 0, 75, 55],
+        "height": [0, 20, 19, 0, 20, 20],
+    }
+    assert ocr_backends.lines_from_tesseract_data(data) == [
+        ("Onur Celik", 93.0, (10, 5, 110, 25)),
+        ("Batuhan Altan", 50.0, (10, 40, 145, 61)),
+    ]
+
+class _ScriptedBackend:
+    """Reports one confident and one doubtful line; reads the doubtful one better on its own."""
+    name = "scripted"
+
+    def __init__(self):
+        self.second_pass = []
+
+    def image_to_lines(self, image, single_line=False):
+        if single_line:
+            self.second_pass.append(image)
+            return [("Batuhan Altan", 88.0, (0, 0, image.width, image.height))]
+        return [("Onur Celik", 95.0, (10, 10, 200, 30)), ("Batuhn A1tan", 40.0, (10, 40, 200, 60))]
+
+def test_only_low_confidence_lines_get_a_second_pass(monkeypatch):
+    backend = _ScriptedBackend()
+    monkeypatch.setattr(ocr_backends, "_backend", backend)
+    monkeypatch.setattr(config, "OCR_MODE", "confidence")
+    monkeypatch.setattr(config, "PANEL_DETECTION", False)
+    text = _quietly(main.ocr_image, Image.new("RGB", (300, 100), "white"))
+    assert text == "Onur Celik\nBatuhan Altan"
+    assert text.confidences == [95.0, 88.0]
+    assert len(backend.second_pass) == 1
+    crop = backend.second_pass[0]
+    assert crop.mode == "L" and crop.size == (2 * 198, 2 * 28)  # padded line box, upscaled
+    assert pickle.loads(pickle.dumps(text)).confidences == [95.0, 88.0]
+
+def test_preprocess_binarizes_to_dark_text_on_light():
+    image = Image.new("RGB", (60, 20), (30, 30, 30))
+    ImageDraw.Draw(image).text((5, 5), "Onur", fill=(220, 220, 220))
+    pixels = np.asarray(main.preprocess_for_reocr(image, scale=3))
+    assert pixels.shape == (60, 180)
+    assert set(np.unique(pixels)) == {0, 255}
+    assert pixels.mean() > 128
+
+def test_matcher_adapts_to_confidence():
+    index = main.MemberIndex(["Onur Celik", "Batuhan Altan", "Ayse Kaya"])
+    lines = "Onur Celik\nbatuh alt"  # "batuh alt" scores 82 against Batuhan Altan
+
+    plain = _quietly(main.match_attendance, lines, index, "cascade")
+    assert plain == ["Onur Celik"]
+    doubtful = main.OcrText(lines, [97.0, 45.0])
+    for mode in ("cascade", "assignment"):
+        assert _quietly(main.match_attendance, doubtful, index, mode) == ["Onur Celik", "Batuhan Altan"]
+    confident = main.OcrText(lines, [97.0, 95.0])
+    assert _quietly(main.match_attendance, confident, index, "cascade") == ["Onur Celik"]
+
+def test_merge_keeps_best_confidence():
+    first = main.OcrText("Onur Celik\nBatuhn Altan", [95.0, 40.0])
+    second = main.OcrText("onur celik\nAyse Kaya", [80.0, 91.0])
+    merged = main.merge_ocr_texts([first, second, "Ayse Kaya"])
+    assert merged == "Onur Celik\nBatuhn Altan\nAyse Kaya"
+    assert merged.confidences == [95.0, 40.0, 91.0]
+    assert not hasattr(main.merge_ocr_texts(["a", "b"]), "confidences")
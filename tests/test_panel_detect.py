@@ -0,0 +1,33 @@
+import random
+from PIL import Image, ImageDraw
+from panel_detect import find_panel_regions
+
+def make_screenshot(panel_bg, text_fill, width=2880, height=1800):
+    """Video tiles on the left, a participant list panel on the right."""
+    rnd = random.Random(0)
+    image = Image.new("RGB", (width, height), (30, 30, 30))
+    draw = ImageDraw.Draw(image)
+    panel_x = int(width * 0.72)
+    for x in range(0, panel_x, 80):
+        for y in range(0, height, 80):
+            draw.rectangle([x, y, x + 80, y + 80], fill=tuple(rnd.randrange(256) for _ in range(3)))
+    draw.rectangle([panel_x, 0, width, height], fill=panel_bg)
+    for i in range(25):
+        draw.text((panel_x + 60, 120 + i * 60), f"Member Name {i} (Host)", fill=text_fill, font_size=28)
+    return image, panel_x
+
+def test_finds_right_panel():
+    for panel_bg, text_fill in [((250, 250, 250), (20, 20, 20)), ((36, 36, 36), (230, 230, 230))]:
+        image, panel_x = make_screenshot(panel_bg, text_fill)
+        regions = find_panel_regions(image)
+        assert len(regions) == 1, regions
+        left, top, right, bottom = regions[0]
+        assert abs(left - panel_x) < 60 and right == image.width, regions
+        assert top <= 120 and bottom >= 120 + 24 * 60, regions
+
+def test_full_frame_fallback():
+    page = Image.new("RGB", (800, 1200), "white")
+    draw = ImageDraw.Draw(page)
+    for i in range(15):
+        draw.text((20, 20 + i * 60), f"Member {i}", fill="black", font_size=28)
+    assert find_panel_regions(page) == []
@@ -0,0 +1,187 @@
+import io
+import os
+import asyncio
+import datetime
+import contextlib
+import pytest
+from PIL import Image
+import config
+import metrics
+import ocr_backends
+import main
+import drive_monitor
+from ledger import ProcessingLedger
+from pipeline import MonitorPipeline, WorkItem
+
+DAY = datetime.date(2026, 4, 9)
+
+def _grid(names=("Ayse Kaya", "Ayse Kara", "Mehmet Oz")):
+    header = ["Name", "# of Meetings Missed in a Row", "02/04/2026", "09/04/2026"]
+    return [header] + [[name, "0", "TRUE", ""] for name in names]
+
+@pytest.fixture(autouse=True)
+def monitor_files(screenshots, monkeypatch):
+    """Every file the monitor writes goes to the test's workdir; OCR stays in-process."""
+    monkeypatch.setattr(config, "OCR_WORKERS", 1)
+
+def _local_item(name, text):
+    path = os.path.join(drive_monitor.LOCAL_SCREENSHOTS_DIR, name)
+    with open(path, "w") as f:
+        f.write(text)
+    item = WorkItem(path, name, "local", path=path)
+    item.meeting_date = DAY
+    item.text = text
+    return item
+
+def test_overlapping_screenshots_are_matched_once(backend, monkeypatch):
+    monkeypatch.setattr(config, "MATCH_MODE", "assignment")
+    backend.seed_sheet(config.SHEET_NAME, _grid())
+    pipeline = MonitorPipeline(backend.drive_service(), backend.sheets_client())
+
+    # "Ayse Karsu" is a guest. Read with low confidence it would pass for Ayse Kara;
+    # the second screenshot reads the same line clearly, and the merge keeps that.
+    first = _local_item("first.png", main.OcrText("Ayse Kaya\nAyse Karsu", [95, 50]))
+    second = _local_item("second.png", main.OcrText("Ayse Karsu\nMehmet Oz", [95, 95]))
+    results = pipeline._write_batch([first, second])
+    pipeline.ledger.close()
+
+    assert [success for _, success in results] == [True, True]
+    column = [row[3] for row in backend.grid(config.SHEET_NAME)[1:]]
+    assert column == ["TRUE", "FALSE", "TRUE"]
+
+def test_resume_from_ocr_keeps_confidences_and_parents(backend):
+    backend.seed_sheet(config.SHEET_NAME, _grid())
+    pipeline = MonitorPipeline(backend.drive_service(), backend.sheets_client())
+    key = ProcessingLedger.drive_key("f1")
+    pipeline.ledger.record(key, "downloaded", name="a.png", content_hash="h1", meeting_date=DAY, parents=["source"])
+    pipeline.ledger.record(key, "ocr", text="Ayse Kaya\nAyse Karsu", confidences=[95, 50])
+
+    # A retry entry from drive_state carries no parents
+    item = WorkItem("f1", "a.png", "drive", file_meta={"id": "f1", "name": "a.png", "md5Checksum": "h1"})
+    asyncio.run(pipeline._enqueue(item, pipeline.download_q))
+    pipeline.ledger.close()
+
+    assert pipeline.match_q.get_nowait() is item and pipeline.download_q.empty()
+    assert item.meeting_date == DAY
+    assert item.text == "Ayse Kaya\nAyse Karsu" and item.text.confidences == [95, 50]
+    assert item.file_meta["parents"] == ["source"]
+
+class _SizeBackend:
+    """Reads every image as its size."""
+    name = "size"
+
+    def image_to_string(self, image):
+        return f"{image.width}x{image.height}"
+
+    def settings(self):
+        return {"engine": self.name}
+
+def test_threaded_ocr_shares_the_cache_and_metrics(backend, workdir, screenshots, monkeypatch):
+    # No process pool: OCR runs in the event loop's default thread pool, through the real cache
+    monkeypatch.setattr(ocr_backends, "_backend", _SizeBackend())
+    monkeypatch.setattr(config, "OCR_MODE", "text")
+    monkeypatch.setattr(config, "PANEL_DETECTION", False)
+    monkeypatch.setattr(config, "OCR_CACHE_FILE", str(workdir / "ocr_cache.sqlite3"))
+    monkeypatch.setattr(config, "METRICS_ENABLED", True)
+    monkeypatch.setattr(metrics, "_log_file", None)
+    metrics.reset()
+    cache = main.get_ocr_cache()  # created here, used from the pool's threads
+    backend.seed_sheet(config.SHEET_NAME, _grid())
+    pipeline = MonitorPipeline(backend.drive_service(), backend.sheets_client())
+    assert pipeline.ocr_pool is None
+
+    sizes = [(30 + i, 20) for i in range(6)]
+    paths = []
+    for i, size in enumerate(sizes):
+        paths.append(str(screenshots / f"shot {i}.png"))
+        Image.new("L", size, 255).save(paths[-1])
+
+    async def ocr(paths):
+        for path in paths:
+            await pipeline.ocr_q.put(WorkItem(path, os.path.basename(path), "local", path=path))
+        await pipeline.ocr_q.put(None)
+        await pipeline.ocr_worker()
+        return [pipeline.match_q.get_nowait().text for _ in paths]
+
+    expected = [f"{w}x{h}" for w, h in sizes]
+    with contextlib.redirect_stdout(io.StringIO()):
+        assert asyncio.run(ocr(paths)) == expected
+        assert asyncio.run(ocr(paths)) == expected  # second time from the cache
+    pipeline.ledger.close()
+    metrics._log_file.close()
+    assert len(cache) == len(sizes)
+    assert f'attendance_stage_total{{stage="ocr_job",status="ok"}} {2 * len(sizes)}' in metrics.render()
+
+def test_retried_files_do_not_keep_polling_fast(backend, monkeypatch):
+    monkeypatch.setattr(config, "DRIVE_FOLDER_ID", "source")
+    monkeypatch.setattr(config, "DRIVE_POLL_MODE", "changes")
+    failing = backend.add_file("2026-04-09 a.png", b"unreadable", ["source"])
+    pipeline = MonitorPipeline(backend.drive_service(), backend.sheets_client())
+    polls = []
+
+    def record_poll(active):
+        polls.append(active)
+        pipeline.stop()
+    monkeypatch.setattr(pipeline.scheduler, "record_poll", record_poll)
+
+    def poll():
+        pipeline.stopping.clear()
+        pipeline.in_flight.clear()
+        with contextlib.redirect_stdout(io.StringIO()):
+            asyncio.run(pipeline.drive_lister())
+        return [pipeline.download_q.get_nowait().key for _ in range(pipeline.download_q.qsize())]
+
+    assert poll() == [failing] and polls == [True]
+    assert poll() == [failing] and polls == [True, False]  # a retry is not activity
+    drive_monitor.mark_drive_files_failed(pipeline.drive_state, {failing})
+    assert poll() == [] and polls == [True, False, False]  # backing off
+    fresh = backend.add_file("2026-04-09 b.png", b"new", ["source"])
+    assert poll() == [fresh] and polls[-1] is True
+    pipeline.ledger.close()
+
+def _text_ocr(source, raise_errors=False):
+    """Stand-in OCR: a "screenshot" holds its own text (bytes from Drive, or a local path)."""
+    if isinstance(source, str):
+        with open(source) as f:
+            return f.read()
+    return bytes(source).decode("utf-8")
+
+def test_run_drains_in_flight_items_on_stop(backend, monkeypatch):
+    monkeypatch.setattr(config, "GOOGLE_BACKEND", "memory")
+    monkeypatch.setattr(config, "DRIVE_FOLDER_ID", "source")
+    monkeypatch.setattr(config, "PROCESSED_FOLDER_ID", "processed")
+    monkeypatch.setattr(config, "DRIVE_POLL_MODE", "changes")
+    monkeypatch.setattr(main, "extract_text_from_image", _text_ocr)
+    backend.seed_sheet(config.SHEET_NAME, _grid(["Onur Celik", "Batuhan Altan", "Mehmet Oz", "Elif Sahin"]))
+    drive_ids = [
+        backend.add_file("2026-04-09 first.png", b"Onur Celik", ["source"]),
+        backend.add_file("2026-04-09 second.png", b"Onur Celik\nMehmet Oz", ["source"]),
+    ]
+    local = os.path.join(drive_monitor.LOCAL_SCREENSHOTS_DIR, "2026-04-09 local.png")
+    with open(local, "w") as f:
+        f.write("Batuhan Altan")
+    os.utime(local, (0, 0))  # long settled
+
+    class StopOncePickedUp(set):
+        """Stops the pipeline the moment all three screenshots are in flight."""
+        picked = set()
+
+        def add(self, key):
+            super().add(key)
+            self.picked.add(key)
+            if len(self.picked) == 3:
+                pipeline.stop()  # everything already picked up must still finish
+
+    log = io.StringIO()
+    with contextlib.redirect_stdout(log):
+        pipeline = MonitorPipeline(backend.drive_service(), backend.sheets_client())
+        pipeline.in_flight = StopOncePickedUp()
+        asyncio.run(asyncio.wait_for(pipeline.run(), timeout=60))
+
+    assert "Stopping: draining in-flight items..." in log.getvalue()
+    assert log.getvalue().rstrip().endswith("Stopped.")
+    assert not pipeline.in_flight
+    assert [backend.file_meta(i)["parents"] for i in drive_ids] == [["processed"], ["processed"]]
+    assert os.listdir(drive_monitor.LOCAL_PROCESSED_DIR) == ["2026-04-09 local.png"]
+    grid = backend.grid(config.SHEET_NAME)
+    assert [row[3] for row in grid[1:]] == ["TRUE", "TRUE", "TRUE", "FALSE"]
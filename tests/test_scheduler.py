@@ -0,0 +1,45 @@
+import datetime
+from scheduler import AdaptivePollScheduler
+
+def make_scheduler():
+    return AdaptivePollScheduler(
+        meeting_weekday=3, meeting_start="19:00", meeting_minutes=120,
+        window_before_minutes=30, window_after_minutes=180,
+        fast_seconds=15, idle_min_seconds=60, idle_max_seconds=3600,
+        activity_hold_minutes=30,
+    )
+
+THURSDAY_EVENING = datetime.datetime(2026, 4, 9, 20, 0)
+MONDAY_NOON = datetime.datetime(2026, 4, 6, 12, 0)
+
+def test_fast_during_meeting_window():
+    scheduler = make_scheduler()
+    assert scheduler.in_meeting_window(THURSDAY_EVENING)
+    assert scheduler.next_interval(THURSDAY_EVENING) == 15
+    # Window runs until 3h after the meeting ends
+    assert scheduler.in_meeting_window(datetime.datetime(2026, 4, 10, 0, 0))
+    assert not scheduler.in_meeting_window(MONDAY_NOON)
+
+def test_exponential_backoff_when_idle():
+    scheduler = make_scheduler()
+    intervals = []
+    for _ in range(8):
+        scheduler.record_poll(False, MONDAY_NOON)
+        intervals.append(scheduler.next_interval(MONDAY_NOON))
+    assert intervals == [60, 120, 240, 480, 960, 1920, 3600, 3600], intervals
+
+def test_activity_resets_backoff():
+    scheduler = make_scheduler()
+    for _ in range(5):
+        scheduler.record_poll(False, MONDAY_NOON)
+    scheduler.record_poll(True, MONDAY_NOON)
+    assert scheduler.next_interval(MONDAY_NOON + datetime.timedelta(minutes=10)) == 15
+    scheduler.record_poll(False, MONDAY_NOON + datetime.timedelta(hours=1))
+    assert scheduler.next_interval(MONDAY_NOON + datetime.timedelta(hours=1)) == 60
+
+def test_never_sleeps_past_next_window():
+    scheduler = make_scheduler()
+    for _ in range(10):
+        scheduler.record_poll(False)
+    just_before = datetime.datetime(2026, 4, 9, 18, 20)  # window opens 18:30
+    assert scheduler.next_interval(just_before) == 600
@@ -0,0 +1,55 @@
+import datetime
+import streaks
+
+TODAY = datetime.date(2026, 4, 20)
+
+def make_grid():
+    return [
+        ["Name", "# of Meetings Missed in a Row", "02/04/2026", "09/04/2026", "16/04/2026", "23/04/2026"],
+        ["Onur Celik", "0", "TRUE", "FALSE", "FALSE", ""],
+        ["Batuhan Altan", "0", "FALSE", "", "TRUE", ""],
+        ["Emre Kaplaner", "3", "FALSE", "FALSE", "FALSE", ""],
+    ]
+
+def test_counts_and_only_changed_cells():
+    updates, snapshot = streaks.compute_streak_updates(make_grid(), today=TODAY)
+    # Future column (23/04) ignored; only Onur's counter is stale
+    assert [(u[0], u[1], u[2]) for u in updates] == [(2, 2, 2)]
+    assert snapshot["recomputed"] == 3
+
+def _snapshot_at(revision):
+    _, snapshot = streaks.compute_streak_updates(make_grid(), today=TODAY)
+    snapshot["revision"] = revision
+    return snapshot
+
+def test_snapshot_recounts_only_changed_rows():
+    grid = make_grid()
+    grid[2][4] = "FALSE"
+    updates, snapshot = streaks.compute_streak_updates(
+        grid, _snapshot_at("rev1"), today=TODAY, revision="rev1", changed_rows={3})
+    assert snapshot["recomputed"] == 1
+    assert [(u[0], u[2]) for u in updates] == [(2, 2), (3, 2)]
+
+def test_other_revision_recounts_every_row():
+    grid = make_grid()
+    grid[2][4] = "FALSE"  # a manual edit: not in changed_rows, but the revision moved
+    updates, snapshot = streaks.compute_streak_updates(grid, _snapshot_at("rev1"), today=TODAY, revision="rev2")
+    assert snapshot["recomputed"] == 3
+    assert [(u[0], u[2]) for u in updates] == [(2, 2), (3, 2)]
+    _, snapshot = streaks.compute_streak_updates(grid, _snapshot_at(None), today=TODAY, revision=None)
+    assert snapshot["recomputed"] == 3
+
+def test_new_date_column_invalidates_snapshot():
+    _, snapshot = streaks.compute_streak_updates(
+        make_grid(), _snapshot_at("rev1"), today=datetime.date(2026, 4, 30), revision="rev1")
+    assert snapshot["recomputed"] == 3
+
+def test_batch_payload():
+    data = streaks.build_batch_data([(2, 2, 5, "Onur Celik")])
+    assert data == [{"range": "B2", "values": [[5]]}]
+    data = streaks.build_batch_data([(3, 2, 1), (2, 2, 0), (5, 2, 4), (2, 3, True)])
+    assert data == [
+        {"range": "B2:B3", "values": [[0], [1]]},
+        {"range": "B5", "values": [[4]]},
+        {"range": "C2", "values": [[True]]},
+    ]